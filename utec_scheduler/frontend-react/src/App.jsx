@@ -1,40 +1,102 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import Schedule from "./components/Schedule";
 import Filters from "./components/Filters";
 import Modal from "./components/Modal";
 import Notification from "./components/Notification";
+import GenerationProgress from "./components/GenerationProgress";
 import "./App.css";
 
 function App() {
   const [schedules, setSchedules] = useState([]);
   const [courses, setCourses] = useState([]);
   const [rooms, setRooms] = useState([]);
-  const [filters, setFilters] = useState({ course: "", room: "" });
+  const [teachers, setTeachers] = useState([]);
+  const [filters, setFilters] = useState({ course: "", room: "", teacher: "", day: "" });
   const [modalOpen, setModalOpen] = useState(false);
   const [notification, setNotification] = useState({ message: "", type: "" });
+  const [generating, setGenerating] = useState(false);
+  const [progress, setProgress] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Descarta respuestas de filtros anteriores
+  const request = useRef(0);
+
+  // Cargar la primera página de horarios filtrados en el servidor
+  const loadSchedules = async (activeFilters) => {
+    const params = new URLSearchParams({ page_size: 100 });
+    Object.entries(activeFilters).forEach(([key, value]) => {
+      if (value) params.append(key, value);
+    });
+    const current = ++request.current;
+    const data = await fetch(`/api/schedules/?${params}`).then(res => res.json());
+    if (current !== request.current) return;
+    setSchedules(data.results);
+    setNextPage(data.next);
+  };
+
+  // Siguiente página del cursor, solo cuando se pide
+  const loadMore = async () => {
+    if (!nextPage) return;
+    const current = request.current;
+    setLoadingMore(true);
+    try {
+      const data = await fetch(nextPage).then(res => res.json());
+      if (current !== request.current) return;
+      setSchedules(prev => [...prev, ...data.results]);
+      setNextPage(data.next);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  useEffect(() => {
+    loadSchedules(filters);
+  }, [filters]);
 
   // Cargar datos iniciales
   useEffect(() => {
-    fetch("/api/schedules/")
-      .then(res => res.json())
-      .then(data => {
-        // Si viene como {schedules: [...]}, usar schedules; si es array, usar data
-        if (Array.isArray(data)) {
-          setSchedules(data);
-        } else if (Array.isArray(data.schedules)) {
-          setSchedules(data.schedules);
-        } else {
-          setSchedules([]);
-        }
-      });
     fetch("/api/courses/")
       .then(res => res.json())
       .then(setCourses);
     fetch("/api/rooms/")
       .then(res => res.json())
       .then(setRooms);
+    fetch("/api/teachers/")
+      .then(res => res.json())
+      .then(setTeachers);
   }, []);
 
+  // Generar horarios: encola el trabajo y sigue su progreso por SSE
+  const handleGenerate = async () => {
+    setGenerating(true);
+    setProgress([]);
+    try {
+      const res = await fetch("/api/schedules/generate/", { method: "POST" });
+      if (!res.ok) throw new Error("No se pudo iniciar la generación");
+      const { job_id } = await res.json();
+      const events = new EventSource(`/api/generation-jobs/${job_id}/events/`);
+      events.addEventListener("progress", (e) => {
+        const event = JSON.parse(e.data);
+        setProgress(prev => [...prev, event]);
+      });
+      events.addEventListener("done", async (e) => {
+        events.close();
+        setGenerating(false);
+        const { status, error } = JSON.parse(e.data);
+        if (status !== "SUCCESS") {
+          setNotification({ message: error || "La generación falló", type: "error" });
+          return;
+        }
+        const job = await fetch(`/api/generation-jobs/${job_id}/`).then(r => r.json());
+        await loadSchedules(filters);
+        setNotification({ message: job.result.message, type: "success" });
+      });
+    } catch (error) {
+      setGenerating(false);
+      setNotification({ message: error.message, type: "error" });
+    }
+  };
+
   // Manejar cambios en los horarios (edición/eliminación)
   const handleScheduleChange = (updatedSchedules) => {
     setSchedules(updatedSchedules);
@@ -48,12 +110,22 @@ function App() {
         setFilters={setFilters}
         courses={courses}
         rooms={rooms}
+        teachers={teachers}
       />
       <button onClick={() => setModalOpen(true)}>Nuevo horario</button>
+      <button onClick={handleGenerate} disabled={generating}>
+        {generating ? "Generando..." : "Generar horarios"}
+      </button>
+      <GenerationProgress progress={progress} />
       <Schedule
         schedules={schedules}
         onScheduleChange={handleScheduleChange}
       />
+      {nextPage && (
+        <button onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? "Cargando..." : "Cargar más"}
+        </button>
+      )}
       <Modal open={modalOpen} onClose={() => setModalOpen(false)} />
       <Notification 
         message={notification.message}
@@ -1,6 +1,6 @@
 import React from 'react';
 
-const Filters = ({ filters, setFilters, courses, rooms }) => {
+const Filters = ({ filters, setFilters, courses, rooms, teachers = [] }) => {
   return (
     <div className="controls-bar">
       <div className="filters">
@@ -32,6 +32,34 @@ const Filters = ({ filters, setFilters, courses, rooms }) => {
           ))}
         </select>
 
+        <select
+          id="teacher-filter"
+          className="filter-select"
+          value={filters.teacher || ""}
+          onChange={(e) => setFilters({ ...filters, teacher: e.target.value })}
+        >
+          <option value="">Todos los profesores</option>
+          {teachers.map(teacher => (
+            <option key={teacher.id} value={teacher.id}>
+              {teacher.name}
+            </option>
+          ))}
+        </select>
+
+        <select
+          id="day-filter"
+          className="filter-select"
+          value={filters.day || ""}
+          onChange={(e) => setFilters({ ...filters, day: e.target.value })}
+        >
+          <option value="">Todos los días</option>
+          <option value="MON">Lunes</option>
+          <option value="TUE">Martes</option>
+          <option value="WED">Miércoles</option>
+          <option value="THU">Jueves</option>
+          <option value="FRI">Viernes</option>
+        </select>
+
         <button id="week-selector" className="time-selector active">
           Semana actual
         </button>
@@ -0,0 +1,42 @@
+import React from 'react';
+
+const WIDTH = 320;
+const HEIGHT = 80;
+
+// Muestra la convergencia de una generación en curso (eventos SSE del backend)
+const GenerationProgress = ({ progress }) => {
+  if (!progress.length) return null;
+
+  const last = progress[progress.length - 1];
+  const values = progress.map(p => p.best_fitness);
+  const min = Math.min(...values);
+  const span = Math.max(...values) - min || 1;
+  const points = progress
+    .map((p, i) => {
+      const x = (i / Math.max(progress.length - 1, 1)) * WIDTH;
+      const y = HEIGHT - ((p.best_fitness - min) / span) * HEIGHT;
+      return `${x.toFixed(1)},${y.toFixed(1)}`;
+    })
+    .join(' ');
+  const penalties = Object.entries(last.penalties).filter(([, value]) => value > 0);
+
+  return (
+    <div className="generation-progress">
+      <p>
+        Generación {last.generation} | Mejor fitness: {last.best_fitness} | Promedio: {last.mean_fitness.toFixed(1)}
+      </p>
+      <svg width={WIDTH} height={HEIGHT} className="convergence-chart">
+        <polyline fill="none" stroke="#2c7be5" strokeWidth="2" points={points} />
+      </svg>
+      {penalties.length > 0 && (
+        <ul className="penalty-breakdown">
+          {penalties.map(([name, value]) => (
+            <li key={name}>{name}: {value}</li>
+          ))}
+        </ul>
+      )}
+    </div>
+  );
+};
+
+export default GenerationProgress;
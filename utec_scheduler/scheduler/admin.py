@@ -1,8 +1,9 @@
 from django.contrib import admin
-from .models import Room, Course, Subject, Teacher, Schedule
+from .models import Room, Course, Subject, Teacher, Schedule, GenerationJob
 
 admin.site.register(Room)
 admin.site.register(Course)
 admin.site.register(Subject)
 admin.site.register(Teacher)
-admin.site.register(Schedule)
\ No newline at end of file
+admin.site.register(Schedule)
+admin.site.register(GenerationJob)
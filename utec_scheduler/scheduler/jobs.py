@@ -0,0 +1,274 @@
+import json
+import subprocess
+import sys
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from utec_scheduler.genetic_algorithm import ScheduleGenerator
+from .models import GenerationJob, GenerationProgress, Schedule
+from .serializers import ScheduleSerializer
+
+
+def enqueue(params=None):
+    """Crea un trabajo de generación pendiente y, si corresponde, lanza un worker local"""
+    job = GenerationJob.objects.create(params=params or {})
+    if getattr(settings, 'GENERATION_WORKER_AUTOSPAWN', True):
+        spawn_worker()
+    return job
+
+
+def spawn_worker():
+    """Lanza `manage.py generation_worker --once` fuera del proceso HTTP"""
+    subprocess.Popen(
+        [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'generation_worker', '--once'],
+        start_new_session=True,
+    )
+
+
+def claim_next_job():
+    """
+    Toma el trabajo pendiente más antiguo. La base de datos hace de broker:
+    el UPDATE condicional garantiza que un solo worker lo reclama.
+    """
+    while True:
+        job = GenerationJob.objects.filter(status='PENDING').order_by('created_at', 'id').first()
+        if job is None:
+            return None
+        now = timezone.now()
+        claimed = GenerationJob.objects.filter(id=job.id, status='PENDING').update(
+            status='RUNNING', started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+class Heartbeat:
+    """
+    Renueva el lease (heartbeat_at) de un trabajo RUNNING cada `interval`
+    segundos (GENERATION_JOB_HEARTBEAT, por defecto 30) desde un hilo propio,
+    de modo que no depende del progreso del GA: la fase de clusters, la
+    reparación final o una generación lenta no publican eventos pero el
+    trabajo sigue vivo. Se usa como context manager alrededor de la ejecución.
+    """
+
+    def __init__(self, job, interval=None):
+        self.job = job
+        self.interval = interval if interval is not None else getattr(settings, 'GENERATION_JOB_HEARTBEAT', 30)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def beat(self):
+        GenerationJob.objects.filter(id=self.job.id, status='RUNNING').update(heartbeat_at=timezone.now())
+
+    def _run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                self.beat()
+        finally:
+            # Cada hilo tiene su propia conexión
+            connection.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+def requeue_stale_jobs(stale_after=None):
+    """
+    Devuelve a PENDING los trabajos que quedaron RUNNING porque su worker murió
+    (reinicio del contenedor, timeout): su lease venció, es decir, pasaron más
+    de stale_after segundos (GENERATION_JOB_STALE_AFTER, por defecto 300) desde
+    el último heartbeat_at. Al volver a ejecutarse, una generación con
+    checkpoint continúa desde el último guardado. Devuelve la cantidad reencolada.
+    """
+    if stale_after is None:
+        stale_after = getattr(settings, 'GENERATION_JOB_STALE_AFTER', 300)
+    limit = timezone.now() - timedelta(seconds=stale_after)
+    # Un solo UPDATE condicional: un heartbeat que llega en el medio gana
+    expired = Q(heartbeat_at__lt=limit) | Q(heartbeat_at__isnull=True, started_at__lt=limit)
+    return GenerationJob.objects.filter(expired, status='RUNNING').update(
+        status='PENDING', started_at=None, heartbeat_at=None
+    )
+
+
+def save_schedules(generator, result):
+    """
+    Reemplaza los horarios existentes por los generados en una sola transacción.
+    Las relaciones se toman del modelo en memoria del generador, de modo que
+    guardar y serializar la respuesta cuesta un número constante de consultas.
+    """
+    courses = {c.id: c for c in generator.courses}
+    subjects = {s.id: s for s in generator.subjects}
+    teachers = {t.id: t for t in generator.teachers}
+    rooms = {r.id: r for r in generator.rooms}
+    schedules = [
+        Schedule(
+            course=courses[assignment['course_id']],
+            subject=subjects[assignment['subject_id']],
+            teacher=teachers[assignment['teacher_id']],
+            room=rooms[assignment['room_id']],
+            day=assignment['day'],
+            start_time=f"{assignment['start_time']}:00" if len(assignment['start_time']) == 5 else assignment['start_time'],
+            end_time=assignment['end_time'],
+            duration=assignment['duration']
+        )
+        for assignment in result['assignments']
+    ]
+    try:
+        with transaction.atomic():
+            Schedule.objects.all().delete()
+            return Schedule.objects.bulk_create(schedules)
+    except IntegrityError:
+        # En PostgreSQL las restricciones de exclusión rechazan choques de salón o profesor
+        raise ValueError("El horario generado tiene choques de salón o profesor; no se guardó")
+
+
+def save_changes(result):
+    """
+    Aplica solo los cambios de una re-optimización: actualiza los bloques movidos,
+    crea los nuevos y elimina los que ya no corresponden. El resto no se toca.
+    """
+    changes = result['changes']
+    updated = [
+        Schedule(id=change['schedule_id'], duration=change['duration'], **change['after'])
+        for change in changes if change['schedule_id'] is not None and change['after'] is not None
+    ]
+    created = [
+        Schedule(course_id=change['course_id'], subject_id=change['subject_id'],
+                 duration=change['duration'], **change['after'])
+        for change in changes if change['schedule_id'] is None
+    ]
+    removed = [change['schedule_id'] for change in changes if change['after'] is None]
+    try:
+        with transaction.atomic():
+            Schedule.objects.filter(id__in=removed).delete()
+            Schedule.objects.bulk_update(updated, ['teacher', 'room', 'day', 'start_time', 'end_time', 'duration'])
+            Schedule.objects.bulk_create(created)
+    except IntegrityError:
+        raise ValueError("El horario re-optimizado tiene choques de salón o profesor; no se guardó")
+    return list(Schedule.objects.select_related('course', 'subject', 'teacher', 'room')
+                .prefetch_related('teacher__subjects').order_by('id'))
+
+
+def profile_path(job):
+    """Archivo del informe de Profiler de un trabajo (GENERATION_PROFILE_DIR, por defecto BASE_DIR/profiles)"""
+    directory = Path(getattr(settings, 'GENERATION_PROFILE_DIR', settings.BASE_DIR / 'profiles'))
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f'generation-job-{job.id}.json'
+
+
+def checkpoint_dir():
+    """Directorio de los checkpoints de generación (GENERATION_CHECKPOINT_DIR, por defecto BASE_DIR/checkpoints)"""
+    directory = Path(getattr(settings, 'GENERATION_CHECKPOINT_DIR', settings.BASE_DIR / 'checkpoints'))
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def publish_progress(job, event):
+    """Canal de progreso: una fila por generación, leída por el endpoint SSE"""
+    GenerationProgress.objects.create(job=job, **event)
+
+
+def prune_progress(keep_for=None):
+    """
+    Borra los eventos de progreso de los trabajos terminados hace más de keep_for
+    segundos (GENERATION_PROGRESS_RETENTION, por defecto 3600). Mientras tanto, un
+    cliente SSE que se reconecta todavía puede leerlos. Devuelve la cantidad borrada.
+    """
+    if keep_for is None:
+        keep_for = getattr(settings, 'GENERATION_PROGRESS_RETENTION', 3600)
+    limit = timezone.now() - timedelta(seconds=keep_for)
+    deleted, _ = GenerationProgress.objects.filter(
+        job__status__in=('SUCCESS', 'FAILURE'), job__finished_at__lt=limit
+    ).delete()
+    return deleted
+
+
+def run_job(job):
+    """Ejecuta el algoritmo genético de un trabajo y guarda su resultado"""
+    # El lease se renueva mientras dure la ejecución, publique progreso o no
+    with Heartbeat(job):
+        try:
+            params = dict(job.params)
+            mode = params.pop('mode', 'generate')
+            options = {name: params.pop(name) for name in ScheduleGenerator.RUN_OPTIONS if name in params}
+            if options.get('profile') and mode != 'reoptimize':
+                options['profile_path'] = profile_path(job)
+            if options.pop('checkpoint', False) and mode != 'reoptimize':
+                # El archivo depende solo de la entrada: otro trabajo con los mismos datos lo retoma
+                options['checkpoint_dir'] = checkpoint_dir()
+            generator = ScheduleGenerator(**params)
+            on_progress = lambda event: publish_progress(job, event)
+            if mode == 'reoptimize':
+                result = generator.reoptimize(on_progress=on_progress, **options)
+            else:
+                result = generator.generate(on_progress=on_progress, **options)
+            if not isinstance(result, dict) or 'assignments' not in result:
+                raise ValueError("Formato de resultado inválido")
+            if mode == 'reoptimize':
+                schedules = save_changes(result)
+                message = f"Se re-optimizaron {result['reoptimized']} bloques ({len(result['changes'])} cambios)"
+            else:
+                schedules = save_schedules(generator, result)
+                message = f'Se generaron {len(schedules)} horarios'
+            job.result = {
+                'message': message,
+                'schedules': ScheduleSerializer(schedules, many=True).data,
+                'fitness': result.get('fitness'),
+                'feasibility': result.get('feasibility'),
+                'cached': result.get('cached', False),
+                'resumed_from': result.get('resumed_from'),
+                'repaired': result.get('repaired', False),
+            }
+            if mode == 'reoptimize':
+                job.result['changes'] = result['changes']
+            if 'profile' in result:
+                job.result['profile'] = result['profile']
+            job.status = 'SUCCESS'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'FAILURE'
+    job.finished_at = timezone.now()
+    job.save(update_fields=['result', 'error', 'status', 'finished_at'])
+    prune_progress()
+    return job
+
+
+def format_sse(event, data, event_id=None):
+    message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    if event_id is not None:
+        message = f"id: {event_id}\n" + message
+    return message
+
+
+def progress_stream(job_id, last_id=0, poll_interval=0.5):
+    """Genera los eventos SSE de un trabajo hasta que termina"""
+    while True:
+        events = list(GenerationProgress.objects.filter(job_id=job_id, id__gt=last_id))
+        for event in events:
+            last_id = event.id
+            yield format_sse('progress', {
+                'generation': event.generation,
+                'best_fitness': event.best_fitness,
+                'mean_fitness': event.mean_fitness,
+                'penalties': event.penalties,
+            }, event.id)
+        if events:
+            continue
+        job_status, error = GenerationJob.objects.values_list('status', 'error').get(id=job_id)
+        if job_status in ('SUCCESS', 'FAILURE'):
+            yield format_sse('done', {'status': job_status, 'error': error})
+            return
+        time.sleep(poll_interval)
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from utec_scheduler.genetic_algorithm import ScheduleGenerator
+from utec_scheduler.parallel_fitness import ParallelFitness
+
+
+class Command(BaseCommand):
+    help = 'Mide la evaluación de fitness en serie y en paralelo sobre los datos actuales'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--population', type=int, default=1500)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--workers', type=int, nargs='+', default=[2, 4])
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        generator = ScheduleGenerator()
+        population = generator.random_population(options['population'], seed=options['seed'])
+        repeat = options['repeat']
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            expected = generator.vectorized.batch_fitness(population)
+        serial = (time.perf_counter() - start) / repeat
+        self.stdout.write(f"serie: {serial * 1000:.1f} ms por población de {len(population)}")
+
+        for workers in options['workers']:
+            with ParallelFitness(generator.vectorized, workers) as parallel:
+                parallel.batch_fitness(population)  # arranque del pool fuera de la medición
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    result = parallel.batch_fitness(population)
+                elapsed = (time.perf_counter() - start) / repeat
+            if not (result == expected).all():
+                self.stderr.write(f"{workers} procesos: el resultado difiere del modo en serie")
+            self.stdout.write(
+                f"{workers} procesos: {elapsed * 1000:.1f} ms por población, aceleración x{serial / elapsed:.2f}"
+            )
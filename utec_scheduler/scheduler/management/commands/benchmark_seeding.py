@@ -0,0 +1,41 @@
+import contextlib
+import io
+import time
+
+from django.core.management.base import BaseCommand
+
+from utec_scheduler.genetic_algorithm import ScheduleGenerator
+
+
+class Command(BaseCommand):
+    help = 'Compara el arranque aleatorio con la siembra greedy: tiempo hasta alcanzar un fitness objetivo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fractions', type=float, nargs='+', default=[0.0, 0.2, 0.5])
+        parser.add_argument('--target', type=float, default=None,
+                            help='Fitness objetivo (por defecto, el final del arranque aleatorio)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def run(self, generator, seed_fraction, seed):
+        """Ejecuta el GA y devuelve el fitness final y (generación, segundos) de cada mejora"""
+        history = []
+        start = time.perf_counter()
+
+        def track(event):
+            history.append((event['best_fitness'], event['generation'], time.perf_counter() - start))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = generator.generate(random_seed=seed, seed_fraction=seed_fraction, on_progress=track)
+        return result['fitness'], history
+
+    def handle(self, *args, **options):
+        generator = ScheduleGenerator()
+        runs = {f: self.run(generator, f, options['seed']) for f in options['fractions']}
+        target = options['target']
+        if target is None:
+            target = runs[min(runs)][0]
+        self.stdout.write(f"objetivo: fitness >= {target}")
+        for fraction, (fitness, history) in runs.items():
+            reached = next(((g, s) for best, g, s in history if best >= target), None)
+            when = f"generación {reached[0]} ({reached[1]:.1f} s)" if reached else "no alcanzado"
+            self.stdout.write(f"siembra {fraction:.0%}: fitness final {fitness}, objetivo {when}")
@@ -0,0 +1,98 @@
+import contextlib
+import io
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from scheduler.jobs import save_schedules
+from scheduler.models import Course, Room, Schedule, Subject, Teacher
+from scheduler.synthetic import build_institution
+from utec_scheduler.genetic_algorithm import ScheduleGenerator
+
+
+class Command(BaseCommand):
+    help = ('Mide el generador sobre instituciones sintéticas de distintos tamaños y escribe '
+            'los resultados en JSON (los datos se crean en una transacción que se revierte)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 500],
+                            help='Cantidad de cursos de cada institución')
+        parser.add_argument('--generations', type=int, default=10)
+        parser.add_argument('--population', type=int, default=40)
+        parser.add_argument('--samples', type=int, default=20,
+                            help='Cromosomas para medir decodificación y fitness')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Archivo JSON (por defecto, la salida estándar)')
+
+    @staticmethod
+    def measure(func):
+        """Ejecuta func y devuelve (resultado, segundos, consultas)"""
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        return result, elapsed, len(queries)
+
+    def run_size(self, courses, options):
+        with transaction.atomic():
+            for model in (Schedule, Teacher, Subject, Course, Room):
+                model.objects.all().delete()
+            dataset = build_institution(courses, seed=options['seed'])
+
+            generator, init_seconds, init_queries = self.measure(ScheduleGenerator)
+            population = generator.random_population(options['samples'], seed=options['seed'])
+            _, decode_seconds, _ = self.measure(lambda: [generator.decode(s) for s in population])
+            _, format_seconds, _ = self.measure(lambda: [generator._decode_solution(s) for s in population])
+            _, fitness_seconds, _ = self.measure(
+                lambda: [generator.fitness_func(None, s, i) for i, s in enumerate(population)])
+            _, batch_seconds, _ = self.measure(lambda: generator.vectorized.batch_fitness(population))
+
+            population_size = options['population']
+            ga = ScheduleGenerator(num_generations=options['generations'], sol_per_pop=population_size,
+                                   num_parents_mating=max(2, min(50, population_size // 2)), stop_criteria=[])
+            generations = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                result, generate_seconds, generate_queries = self.measure(
+                    lambda: ga.generate(random_seed=options['seed'], cache=False,
+                                        on_progress=lambda event: generations.append(event['generation'])))
+            _, save_seconds, save_queries = self.measure(lambda: save_schedules(ga, result))
+            transaction.set_rollback(True)
+        samples = len(population)
+        return {
+            'dataset': {**dataset, 'assignments': generator.num_assignments, 'genes': generator.num_genes},
+            'init': {'seconds': init_seconds, 'queries': init_queries},
+            'decode': {'ms_per_call': decode_seconds / samples * 1000},
+            'format': {'ms_per_call': format_seconds / samples * 1000},
+            'fitness_func': {'ms_per_call': fitness_seconds / samples * 1000},
+            'batch_fitness': {'ms_per_solution': batch_seconds / samples * 1000},
+            'generate': {
+                'seconds': generate_seconds,
+                'queries': generate_queries,
+                'generations': len(generations),
+                'generations_per_second': len(generations) / generate_seconds if generate_seconds else None,
+                'fitness': result['fitness'],
+            },
+            'persist': {'seconds': save_seconds, 'queries': save_queries},
+        }
+
+    def handle(self, *args, **options):
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'params': {name: options[name] for name in ('generations', 'population', 'samples', 'seed')},
+            'results': {},
+        }
+        for courses in options['sizes']:
+            report['results'][str(courses)] = self.run_size(courses, options)
+            if options['output']:
+                generate = report['results'][str(courses)]['generate']
+                self.stdout.write(f"{courses} cursos: {generate['generations_per_second']:.2f} generaciones/s")
+        data = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(data + '\n')
+        else:
+            self.stdout.write(data)
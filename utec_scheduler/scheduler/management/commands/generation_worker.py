@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from scheduler.jobs import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Procesa los trabajos de generación de horarios pendientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Procesa los trabajos pendientes y termina')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Segundos entre consultas a la cola')
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Se reencolaron {requeued} trabajos abandonados")
+        while True:
+            job = claim_next_job()
+            if job is not None:
+                self.stdout.write(f"Trabajo {job.id}: en ejecución")
+                job = run_job(job)
+                self.stdout.write(f"Trabajo {job.id}: {job.status}")
+                continue
+            if options['once']:
+                return
+            time.sleep(options['interval'])
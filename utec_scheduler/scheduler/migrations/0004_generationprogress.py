@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-18 15:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0003_generationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generation', models.IntegerField()),
+                ('best_fitness', models.FloatField()),
+                ('mean_fitness', models.FloatField()),
+                ('penalties', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='scheduler.generationjob')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 3.2.25 on 2026-10-18 15:42
+
+from django.db import migrations, models
+
+# Rango ocupado por un bloque; las horas se anclan a una fecha fija para usar tsrange
+BLOCK_RANGE = "tsrange(DATE '2000-01-01' + start_time, DATE '2000-01-01' + end_time)"
+
+EXCLUSION_CONSTRAINTS = {
+    'schedule_room_no_overlap': 'room_id',
+    'schedule_teacher_no_overlap': 'teacher_id',
+}
+
+
+def find_overlaps(schedules, column):
+    """Pares de ids de bloques existentes que comparten column y día con horarios superpuestos"""
+    by_resource = {}
+    for row in schedules.order_by(column, 'day', 'start_time').values('id', column, 'day', 'start_time', 'end_time'):
+        by_resource.setdefault((row[column], row['day']), []).append(row)
+    overlaps = []
+    for rows in by_resource.values():
+        for i, row in enumerate(rows):
+            for other in rows[i + 1:]:
+                if other['start_time'] >= row['end_time']:
+                    break
+                overlaps.append((row['id'], other['id']))
+    return overlaps
+
+
+def add_exclusion_constraints(apps, schema_editor):
+    """Solo PostgreSQL: rechaza reservas superpuestas del mismo salón o profesor"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    # Con filas superpuestas el ALTER TABLE fallaría con un error poco claro
+    Schedule = apps.get_model('scheduler', 'Schedule')
+    problems = {column: find_overlaps(Schedule.objects, column) for column in EXCLUSION_CONSTRAINTS.values()}
+    problems = {column: pairs for column, pairs in problems.items() if pairs}
+    if problems:
+        detail = '; '.join(f'{column}: {len(pairs)} pares, por ejemplo ids {pairs[:5]}'
+                           for column, pairs in problems.items())
+        raise RuntimeError(
+            'No se pueden agregar las restricciones de exclusión: hay horarios superpuestos '
+            f'({detail}). Corrija o elimine esos bloques (o vuelva a generar el horario) y '
+            'ejecute migrate de nuevo.'
+        )
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    for name, column in EXCLUSION_CONSTRAINTS.items():
+        # DEFERRED: permite reemplazar o intercambiar bloques dentro de una transacción
+        schema_editor.execute(
+            f'ALTER TABLE scheduler_schedule ADD CONSTRAINT {name} '
+            f'EXCLUDE USING gist ({column} WITH =, day WITH =, {BLOCK_RANGE} WITH &&) '
+            f'DEFERRABLE INITIALLY DEFERRED'
+        )
+
+
+def remove_exclusion_constraints(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in EXCLUSION_CONSTRAINTS:
+        schema_editor.execute(f'ALTER TABLE scheduler_schedule DROP CONSTRAINT IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0004_generationprogress'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['room', 'day', 'start_time'], name='schedule_room_day_start'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['teacher', 'day', 'start_time'], name='schedule_teacher_day_start'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['course', 'day'], name='schedule_course_day'),
+        ),
+        migrations.RunPython(add_exclusion_constraints, remove_exclusion_constraints),
+    ]
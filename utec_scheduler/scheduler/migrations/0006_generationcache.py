@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-18 15:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0005_schedule_conflict_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=64, unique=True)),
+                ('solution', models.JSONField()),
+                ('fitness', models.FloatField()),
+                ('feasibility', models.JSONField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0007_generationjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConstraintVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
 
 class Room(models.Model):
     ROOM_TYPES = [
@@ -44,6 +45,17 @@ class Teacher(models.Model):
     subjects = models.ManyToManyField(Subject)
     from_montevideo = models.BooleanField(default=False)
 
+class ScheduleQuerySet(models.QuerySet):
+    def overlapping(self, day, start_time, end_time):
+        """Bloques del día cuyo rango horario se superpone con [start_time, end_time)"""
+        return self.filter(day=day, start_time__lt=end_time, end_time__gt=start_time)
+
+    def conflicts(self, schedule):
+        """Bloques que ocupan el mismo salón o profesor que `schedule` al mismo tiempo"""
+        return (self.overlapping(schedule.day, schedule.start_time, schedule.end_time)
+                .filter(Q(room_id=schedule.room_id) | Q(teacher_id=schedule.teacher_id))
+                .exclude(pk=schedule.pk))
+
 class Schedule(models.Model):
     DAYS = [
         ('MON', 'Lunes'),
@@ -60,4 +72,81 @@ class Schedule(models.Model):
     day = models.CharField(max_length=3, choices=DAYS)
     start_time = models.TimeField()
     end_time = models.TimeField()
-    duration = models.IntegerField(default=120)  # Duración en minutos, por defecto 2h
\ No newline at end of file
+    duration = models.IntegerField(default=120)  # Duración en minutos, por defecto 2h
+
+    objects = ScheduleQuerySet.as_manager()
+
+    class Meta:
+        # Consultas de disponibilidad: "¿está libre el salón/profesor el martes a las 10?"
+        # En PostgreSQL además hay restricciones de exclusión (migración 0005)
+        indexes = [
+            models.Index(fields=['room', 'day', 'start_time'], name='schedule_room_day_start'),
+            models.Index(fields=['teacher', 'day', 'start_time'], name='schedule_teacher_day_start'),
+            models.Index(fields=['course', 'day'], name='schedule_course_day'),
+        ]
+
+class GenerationJob(models.Model):
+    STATUSES = [
+        ('PENDING', 'Pendiente'),
+        ('RUNNING', 'En ejecución'),
+        ('SUCCESS', 'Completado'),
+        ('FAILURE', 'Fallido'),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUSES, default='PENDING')
+    params = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Lease del worker que lo ejecuta: se renueva periódicamente (ver jobs.Heartbeat)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+class GenerationProgress(models.Model):
+    job = models.ForeignKey(GenerationJob, on_delete=models.CASCADE, related_name='progress')
+    generation = models.IntegerField()
+    best_fitness = models.FloatField()
+    mean_fitness = models.FloatField()
+    penalties = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+class GenerationCache(models.Model):
+    """
+    Cromosoma guardado por ScheduleGenerator.generate(): la élite de una entrada
+    o el resultado de una semilla y time_budget concretos (ver fingerprint)
+    """
+    fingerprint = models.CharField(max_length=64, unique=True)
+    solution = models.JSONField()
+    fitness = models.FloatField()
+    feasibility = models.JSONField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+class ConstraintVersion(models.Model):
+    """
+    Contador (una sola fila) que aumenta con cada cambio en salones, cursos,
+    materias o profesores (ver scheduler.signals). Lo leen todos los procesos
+    para saber si su ScheduleGenerator en memoria quedó desactualizado.
+    """
+    version = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def current(cls):
+        return cls.objects.values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls):
+        if cls.objects.filter(id=1).update(version=models.F('version') + 1):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(id=1, version=1)
+        except IntegrityError:
+            # Otro proceso creó la fila al mismo tiempo
+            cls.objects.filter(id=1).update(version=models.F('version') + 1)
@@ -1,5 +1,8 @@
+import re
+
 from rest_framework import serializers
-from .models import Room, Course, Subject, Teacher, Schedule
+from .models import Room, Course, Subject, Teacher, Schedule, GenerationJob
+from utec_scheduler.genetic_algorithm import ScheduleGenerator
 
 class RoomSerializer(serializers.ModelSerializer):
     class Meta:
@@ -21,7 +24,26 @@ class TeacherSerializer(serializers.ModelSerializer):
         model = Teacher
         fields = '__all__'
 
-class ScheduleSerializer(serializers.ModelSerializer):
+class ScheduleConflictMixin:
+    """Rechaza ediciones que reservan un salón o profesor ya ocupado en ese horario"""
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        candidate = Schedule(**{
+            f.attname: getattr(self.instance, f.attname) for f in Schedule._meta.concrete_fields
+        }) if self.instance is not None else Schedule()
+        for field, value in attrs.items():
+            setattr(candidate, field, value)
+        if None in (candidate.room_id, candidate.teacher_id, candidate.day,
+                    candidate.start_time, candidate.end_time):
+            return attrs
+        conflicts = list(Schedule.objects.conflicts(candidate).values_list('id', flat=True))
+        if conflicts:
+            raise serializers.ValidationError(
+                f'El salón o el profesor ya están ocupados en ese horario (horarios {conflicts})'
+            )
+        return attrs
+
+class ScheduleSerializer(ScheduleConflictMixin, serializers.ModelSerializer):
     room = RoomSerializer(read_only=True)
     course = CourseSerializer(read_only=True)
     subject = SubjectSerializer(read_only=True)
@@ -29,4 +51,121 @@ class ScheduleSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Schedule
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class ScheduleFlatSerializer(ScheduleConflictMixin, serializers.ModelSerializer):
+    """Representación compacta: course, subject, teacher y room como ids"""
+    class Meta:
+        model = Schedule
+        fields = '__all__'
+
+class ScheduleEditSerializer(serializers.Serializer):
+    """Edición propuesta: con id modifica un horario existente, sin id es un bloque nuevo"""
+    id = serializers.IntegerField(required=False)
+    course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all(), required=False)
+    subject = serializers.PrimaryKeyRelatedField(queryset=Subject.objects.all(), required=False)
+    teacher = serializers.PrimaryKeyRelatedField(queryset=Teacher.objects.all(), required=False)
+    room = serializers.PrimaryKeyRelatedField(queryset=Room.objects.all(), required=False)
+    day = serializers.ChoiceField(choices=Schedule.DAYS, required=False)
+    start_time = serializers.TimeField(required=False)
+    end_time = serializers.TimeField(required=False)
+
+    def validate(self, attrs):
+        if 'id' not in attrs:
+            missing = [f for f in ('course', 'subject', 'teacher', 'room', 'day', 'start_time', 'end_time')
+                       if f not in attrs]
+            if missing:
+                raise serializers.ValidationError(f'Faltan campos para un bloque nuevo: {missing}')
+        if 'start_time' in attrs and 'end_time' in attrs and attrs['end_time'] <= attrs['start_time']:
+            raise serializers.ValidationError('end_time debe ser posterior a start_time')
+        if 'subject' in attrs and 'course' in attrs and attrs['subject'].course_id != attrs['course'].id:
+            raise serializers.ValidationError('La materia no pertenece al curso')
+        return attrs
+
+class ScheduleCheckSerializer(serializers.Serializer):
+    edits = ScheduleEditSerializer(many=True, allow_empty=False)
+
+class GenerateSerializer(serializers.Serializer):
+    """
+    Parámetros opcionales de POST /api/schedules/generate/.
+    Los omitidos toman los valores por defecto de ScheduleGenerator.GA_PARAMS y generate().
+    """
+    STOP_CRITERION = re.compile(r'^(reach_-?\d+(\.\d+)?|saturate_\d+)$')
+
+    # Población y operadores de PyGAD
+    num_generations = serializers.IntegerField(min_value=1, max_value=10000, required=False)
+    sol_per_pop = serializers.IntegerField(min_value=4, max_value=5000, required=False)
+    num_parents_mating = serializers.IntegerField(min_value=2, required=False)
+    mutation_percent_genes = serializers.FloatField(min_value=0.1, max_value=100, required=False)
+    crossover_type = serializers.ChoiceField(
+        choices=['single_point', 'two_points', 'uniform', 'scattered'], required=False)
+    parent_selection_type = serializers.ChoiceField(
+        choices=['sss', 'rws', 'sus', 'rank', 'random', 'tournament'], required=False)
+    K_tournament = serializers.IntegerField(min_value=2, required=False)
+    keep_parents = serializers.IntegerField(min_value=-1, required=False)
+    stop_criteria = serializers.ListField(child=serializers.CharField(), required=False)
+    prune_gene_space = serializers.BooleanField(required=False)
+    # Ejecución
+    time_budget = serializers.FloatField(min_value=1, required=False, help_text='Segundos de reloj')
+    random_seed = serializers.IntegerField(min_value=0, required=False)
+    workers = serializers.IntegerField(min_value=1, max_value=32, required=False)
+    engine = serializers.ChoiceField(choices=ScheduleGenerator.FITNESS_ENGINES, required=False)
+    islands = serializers.IntegerField(min_value=1, max_value=32, required=False)
+    migration_interval = serializers.IntegerField(min_value=1, required=False)
+    migrants = serializers.IntegerField(min_value=1, required=False)
+    repair = serializers.BooleanField(required=False)
+    seed_fraction = serializers.FloatField(min_value=0, max_value=1, required=False)
+    decompose = serializers.BooleanField(required=False)
+    profile = serializers.BooleanField(required=False)
+    checkpoint = serializers.BooleanField(required=False)
+    checkpoint_interval = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_stop_criteria(self, value):
+        invalid = [criterion for criterion in value if not self.STOP_CRITERION.match(criterion)]
+        if invalid:
+            raise serializers.ValidationError(f'Criterios inválidos (reach_<fitness> o saturate_<n>): {invalid}')
+        return value
+
+    def validate(self, attrs):
+        defaults = ScheduleGenerator.GA_PARAMS
+        if 'sol_per_pop' in attrs:
+            # Los valores por defecto están pensados para sol_per_pop=150: si no se
+            # indican, se ajustan a la población pedida en lugar de rechazarla
+            sol_per_pop = attrs['sol_per_pop']
+            if 'num_parents_mating' not in attrs:
+                ratio = defaults['num_parents_mating'] / defaults['sol_per_pop']
+                attrs['num_parents_mating'] = max(2, min(defaults['num_parents_mating'], round(sol_per_pop * ratio)))
+            for name in ('K_tournament', 'keep_parents'):
+                if name not in attrs:
+                    attrs[name] = min(defaults[name], sol_per_pop)
+        params = {**defaults, **attrs}
+        if params['num_parents_mating'] > params['sol_per_pop']:
+            raise serializers.ValidationError('num_parents_mating no puede superar a sol_per_pop')
+        if params['keep_parents'] > params['sol_per_pop']:
+            raise serializers.ValidationError('keep_parents no puede superar a sol_per_pop')
+        if params['K_tournament'] > params['sol_per_pop']:
+            raise serializers.ValidationError('K_tournament no puede superar a sol_per_pop')
+        if attrs.get('engine', 'numpy') != 'numpy' and (
+                attrs.get('workers', 1) > 1 or attrs.get('islands', 1) > 1 or attrs.get('decompose')):
+            raise serializers.ValidationError("workers, islands y decompose requieren engine='numpy'")
+        if attrs.get('checkpoint') and (attrs.get('islands', 1) > 1 or attrs.get('decompose')):
+            raise serializers.ValidationError('checkpoint no se admite con islands ni decompose')
+        return attrs
+
+
+class ReoptimizeSerializer(GenerateSerializer):
+    """
+    Recursos que dejan de estar disponibles (profesor que se va, salón que se cierra)
+    y los parámetros de GenerateSerializer que admite ScheduleGenerator.reoptimize().
+    """
+    exclude_teachers = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    exclude_rooms = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    # Opciones de generate() sin efecto en la re-optimización
+    workers = engine = islands = migration_interval = migrants = None
+    repair = seed_fraction = decompose = profile = checkpoint = checkpoint_interval = None
+
+
+class GenerationJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GenerationJob
+        fields = '__all__'
@@ -0,0 +1,22 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ConstraintVersion, Course, GenerationCache, Room, Subject, Teacher
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Subject)
+@receiver(post_save, sender=Teacher)
+@receiver(post_delete, sender=Room)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Subject)
+@receiver(post_delete, sender=Teacher)
+@receiver(m2m_changed, sender=Teacher.subjects.through)
+def invalidate_generation_cache(sender, **kwargs):
+    """
+    Cualquier cambio en el modelo de restricciones deja obsoletos los resultados
+    guardados y los generadores en memoria de todos los procesos (ConstraintVersion)
+    """
+    GenerationCache.objects.all().delete()
+    ConstraintVersion.bump()
@@ -0,0 +1,62 @@
+import random
+
+from django.db.models import Max
+
+from .models import Course, Room, Subject, Teacher
+
+# Proporciones aproximadas de una sede: turnos, laboratorios y docentes de Montevideo
+SHIFT_MIX = [('MORNING', 0.4), ('AFTERNOON', 0.35), ('NIGHT', 0.25)]
+LAB_SUBJECTS = 0.25
+LAB_ROOMS = 0.2
+SUBJECTS_PER_COURSE = (4, 7)
+HOURS_PER_WEEK = (2, 3, 4, 5, 6)
+TEACHERS_PER_COURSE = 1.5
+SUBJECTS_PER_TEACHER = (2, 5)
+COURSES_PER_ROOM = 2
+FROM_MONTEVIDEO = 0.4
+
+
+def _bulk_create(model, objects):
+    """bulk_create que devuelve los objetos con id también en SQLite (Django 3.2 no los completa)"""
+    last_id = model.objects.aggregate(last=Max('id'))['last'] or 0
+    model.objects.bulk_create(objects)
+    return list(model.objects.filter(id__gt=last_id).order_by('id'))
+
+
+def build_institution(courses, seed=0):
+    """
+    Crea una institución sintética con `courses` cursos, sus materias,
+    profesores y salones. Usa bulk_create (no dispara señales): conviene
+    llamarla dentro de una transacción que luego se revierte.
+    Devuelve un dict con la cantidad de cada entidad creada.
+    """
+    rng = random.Random(seed)
+    shifts, weights = zip(*SHIFT_MIX)
+    created_courses = _bulk_create(Course, [
+        Course(name=f'Curso sintético {i}', shift=rng.choices(shifts, weights)[0]) for i in range(courses)
+    ])
+    subjects = _bulk_create(Subject, [
+        Subject(name=f'Materia {course.id}-{j}', code=f'S{course.id}-{j}',
+                hours_per_week=rng.choice(HOURS_PER_WEEK), course=course,
+                requires_lab=rng.random() < LAB_SUBJECTS)
+        for course in created_courses
+        for j in range(rng.randint(*SUBJECTS_PER_COURSE))
+    ])
+    num_rooms = max(1, courses // COURSES_PER_ROOM)
+    rooms = _bulk_create(Room, [
+        Room(name=f'Salón {i}', capacity=rng.choice((20, 30, 40)),
+             room_type=rng.choice(('COMP', 'LOG')) if rng.random() < LAB_ROOMS else rng.choice(('CLASS', 'MULTI')))
+        for i in range(num_rooms)
+    ])
+    teachers = _bulk_create(Teacher, [
+        Teacher(name=f'Docente {i}', from_montevideo=rng.random() < FROM_MONTEVIDEO)
+        for i in range(max(1, int(courses * TEACHERS_PER_COURSE)))
+    ])
+    # Cada materia tiene al menos un profesor; el resto de la carga se reparte al azar
+    through = Teacher.subjects.through
+    links = {(rng.choice(teachers).id, subject.id) for subject in subjects}
+    for teacher in teachers:
+        for subject in rng.sample(subjects, min(len(subjects), rng.randint(*SUBJECTS_PER_TEACHER))):
+            links.add((teacher.id, subject.id))
+    through.objects.bulk_create([through(teacher_id=t, subject_id=s) for t, s in links])
+    return {'courses': courses, 'subjects': len(subjects), 'teachers': len(teachers), 'rooms': len(rooms)}
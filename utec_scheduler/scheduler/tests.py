@@ -1,3 +1,1017 @@
-from django.test import TestCase
+import importlib
+import io
+import json
+import random
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.db import connection
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from scheduler import jobs
+from scheduler.models import (ConstraintVersion, Course, Subject, Teacher, Room, Schedule, GenerationJob,
+                              GenerationCache, GenerationProgress)
+from scheduler.serializers import ReoptimizeSerializer, ScheduleSerializer
+from utec_scheduler.genetic_algorithm import ScheduleGenerator
+from utec_scheduler.parallel_fitness import ParallelFitness
+from utec_scheduler import island_model
+from utec_scheduler.island_model import IslandModel
+from utec_scheduler.occupancy import (OccupancyIndex, SCHEDULE_FIELDS, reset_shared_generator, shared_generator,
+                                      to_assignment)
+from utec_scheduler.assignment import Assignment, minutes
+from utec_scheduler.incremental_fitness import IncrementalFitness
+from utec_scheduler.repair import ScheduleRepair
+from utec_scheduler.seeding import GreedyConstructor
+from utec_scheduler import decomposition as decomposition_module
+from utec_scheduler.decomposition import Decomposition, course_clusters, scarce_room_classes
+from utec_scheduler.snapshot import ProblemSnapshot
+from utec_scheduler.checkpoint import Checkpoint
+from utec_scheduler.reoptimize import Reoptimizer
+from scheduler.synthetic import build_institution
+
+
+def random_solution(generator, rng):
+    """Cromosoma aleatorio tomado del gene_space del generador"""
+    return np.array([rng.choice(space) for space in generator.gene_space], dtype=float)
+
+
+class SchedulerTestCase(TestCase):
+    fixtures = ['courses', 'rooms', 'subjects', 'teachers']
+
+    @classmethod
+    def setUpTestData(cls):
+        # Más materias para que haya colisiones y horas impares en todos los cursos
+        teacher = Teacher.objects.create(name='Docente extra', from_montevideo=True)
+        for course in Course.objects.all():
+            for hours in (3, 4, 7):
+                subject = Subject.objects.create(
+                    name=f'Extra {course.id}-{hours}', code=f'EX{course.id}{hours}',
+                    hours_per_week=hours, course=course, requires_lab=hours == 7,
+                )
+                teacher.subjects.add(subject)
+                Teacher.objects.get(id=1).subjects.add(subject)
+
+
+class VectorizedFitnessTests(SchedulerTestCase):
+    def test_penalties_match_python_engine(self):
+        generator = ScheduleGenerator()
+        rng = random.Random(7)
+        for _ in range(300):
+            solution = random_solution(generator, rng)
+            expected = generator.calculate_penalties(generator.decode(solution))
+            self.assertEqual(generator.vectorized.calculate_penalties(solution), expected)
+            self.assertEqual(
+                generator.vectorized.fitness_func(None, solution, 0),
+                generator.fitness_func(None, solution, 0),
+            )
+
+    def test_batch_matches_single_solution(self):
+        generator = ScheduleGenerator()
+        rng = random.Random(11)
+        population = np.array([random_solution(generator, rng) for _ in range(64)])
+        expected = [generator.fitness_func(None, solution, idx) for idx, solution in enumerate(population)]
+        batch = generator.vectorized.batch_fitness_func(None, population, list(range(len(population))))
+        self.assertEqual(list(batch), expected)
+
+    def test_fitness_sweep_issues_no_queries(self):
+        generator = ScheduleGenerator()
+        rng = random.Random(3)
+        population = [random_solution(generator, rng) for _ in range(50)]
+        with self.assertNumQueries(0):
+            for idx, solution in enumerate(population):
+                generator.fitness_func(None, solution, idx)
+                generator.vectorized.fitness_func(None, solution, idx)
+            generator.vectorized.batch_fitness_func(None, np.array(population), list(range(len(population))))
+
+    def test_pruned_gene_space_drops_infeasible_values(self):
+        generator = ScheduleGenerator(prune_gene_space=True)
+        rng = random.Random(5)
+        for _ in range(50):
+            penalties = generator.vectorized.calculate_penalties(random_solution(generator, rng))
+            self.assertEqual(penalties['course_shift'], 0)
+        lab_rooms = {r.id for r in generator.rooms if r.room_type in ['COMP', 'LOG']}
+        for i, (course, subject, slot_hours) in enumerate(generator.assignments):
+            rooms = set(generator.gene_space[i * generator.assignment_size + 1])
+            self.assertEqual(rooms <= lab_rooms, subject.requires_lab)
+
+    def test_parallel_matches_serial(self):
+        generator = ScheduleGenerator()
+        population = generator.random_population(101, seed=2)
+        with ParallelFitness(generator.vectorized, 3) as parallel:
+            result = parallel.batch_fitness(population)
+        self.assertEqual(list(result), list(generator.vectorized.batch_fitness(population)))
+
+    def test_island_model_returns_reproducible_global_best(self):
+        generator = ScheduleGenerator()
+        runs = [IslandModel(generator, islands=2, migration_interval=2, random_seed=9).run(4, 60)
+                for _ in range(2)]
+        (solution, fitness), (other_solution, other_fitness) = runs
+        self.assertEqual(fitness, generator.vectorized.fitness_func(None, solution, 0))
+        self.assertEqual(fitness, other_fitness)
+        self.assertTrue((solution == other_solution).all())
+
+    def test_island_keeps_its_ga_between_epochs(self):
+        generator = ScheduleGenerator(num_parents_mating=10)
+        options = generator.ga_options()
+        options.pop('num_genes')
+        island_model._init_island(generator.vectorized, options)
+        self.addCleanup(island_model._init_island, None, None)
+        with mock.patch.object(generator.vectorized, 'batch_fitness_func',
+                               wraps=generator.vectorized.batch_fitness_func) as evaluate:
+            island = island_model._Island(generator.random_population(20, seed=3), 5, None, None)
+            population, fitness = island.evolve(2)
+            migrants = generator.random_population(2, seed=4)
+            island.receive(np.array([0, 1]), migrants, generator.vectorized.batch_fitness(migrants))
+            population, fitness = island.evolve(2)
+        self.assertEqual(island.ga_instance.generations_completed, 4)
+        # Una evaluación por la población inicial y una por generación: al continuar,
+        # la época siguiente reutiliza el fitness conocido en lugar de reevaluar la población
+        self.assertEqual(evaluate.call_count, 1 + 4)
+        self.assertEqual(len(evaluate.call_args_list[0].args[1]), 20)
+        self.assertEqual(list(fitness), list(generator.vectorized.batch_fitness(population)))
+
+    def test_island_model_stops_at_reach(self):
+        generator = ScheduleGenerator(stop_criteria=['reach_-1000000'])
+        with mock.patch.object(generator, 'progress_event', wraps=generator.progress_event) as progress:
+            IslandModel(generator, islands=2, migration_interval=2, random_seed=9).run(
+                10, 60, reach=generator.reach_fitness(), on_progress=lambda event: None)
+        self.assertEqual(progress.call_count, 1)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            ScheduleGenerator().generate(engine='fortran')
+
+
+class AssignmentTests(SchedulerTestCase):
+    def test_decode_keeps_integers_and_formats_at_the_boundary(self):
+        generator = ScheduleGenerator()
+        solution = generator.random_population(1, seed=1)[0]
+        decoded = generator.decode(solution)
+        self.assertFalse(hasattr(decoded[0], '__dict__'))
+        for assignment, data in zip(decoded, generator._decode_solution(solution)):
+            self.assertIsInstance(assignment.start, int)
+            self.assertEqual(data['day'], generator.DAYS[assignment.day])
+            self.assertIn(data['start_time'], generator.TIME_SLOTS)
+            self.assertEqual(minutes(data['start_time']), assignment.start)
+            self.assertEqual(minutes(data['end_time']), assignment.end)
+
+    def test_equal_assignments_hash_alike(self):
+        first = Assignment(course_id=1, subject_id=2, teacher_id=3, room_id=4, day=1, start=8 * 60, duration=120)
+        same = first.replace()
+        moved = first.replace(day=2)
+        self.assertEqual(hash(first), hash(same))
+        self.assertEqual({first, same, moved}, {first, moved})
+        self.assertEqual({first: 'a'}[same], 'a')
+
+
+class IncrementalFitnessTests(SchedulerTestCase):
+    def test_single_gene_moves_match_full_evaluation(self):
+        generator = ScheduleGenerator()
+        rng = random.Random(8)
+        solution = random_solution(generator, rng)
+        evaluator = IncrementalFitness.from_solution(generator, solution)
+        for _ in range(300):
+            gene = rng.randrange(generator.num_genes)
+            value = rng.choice(generator.gene_space[gene])
+            moved = solution.copy()
+            moved[gene] = value
+            move = evaluator.gene_move(gene, value)
+            expected = generator.calculate_penalties(generator.decode(moved))
+            delta = evaluator.delta(move)
+            self.assertEqual({k: evaluator.penalties[k] + delta[k] for k in delta}, expected)
+            self.assertEqual(evaluator.fitness_after(move), generator.fitness_func(None, moved, 0))
+            # Se aplica la mitad de los movimientos para recorrer estados distintos
+            if rng.random() < 0.5:
+                evaluator.apply(move)
+                solution = moved
+                self.assertEqual(evaluator.penalties, expected)
+
+    def test_assignment_moves_match_full_evaluation(self):
+        generator = ScheduleGenerator()
+        rng = random.Random(12)
+        evaluator = IncrementalFitness.from_solution(generator, random_solution(generator, rng))
+        for _ in range(100):
+            moves = {}
+            for position in rng.sample(range(generator.num_assignments), 3):
+                genes = random_solution(generator, rng)[position * generator.assignment_size:
+                                                        (position + 1) * generator.assignment_size]
+                moves[position] = generator._decode_assignment(position, genes)
+            assignments = [moves.get(i, a) for i, a in enumerate(evaluator.assignments)]
+            expected = generator.calculate_penalties(assignments)
+            evaluator.apply(moves)
+            self.assertEqual(evaluator.penalties, expected)
+
+
+class ScheduleRepairTests(SchedulerTestCase):
+    def test_repair_removes_clashes_and_split_teachers(self):
+        generator = ScheduleGenerator()
+        repair = ScheduleRepair(generator)
+        population = generator.random_population(20, seed=6)
+        before = generator.vectorized.batch_penalties(population)
+        repaired = repair.on_mutation(None, population)
+        after = generator.vectorized.batch_penalties(repaired)
+        self.assertEqual(after['split_teacher'].sum(), 0)
+        hard = sum(after[k] for k in generator.HARD_PENALTIES)
+        self.assertLess(hard.sum(), sum(before[k] for k in generator.HARD_PENALTIES).sum())
+        # Los genes reparados siguen dentro del gene_space
+        for solution in repaired:
+            for gene, space in enumerate(generator.gene_space):
+                self.assertIn(solution[gene], space)
+
+    def test_records_first_feasible_generation(self):
+        generator = ScheduleGenerator()
+        repaired = ScheduleRepair(generator).on_mutation(None, generator.random_population(1, seed=6))
+        generator._started = 0
+        clashing = dict(generator.vectorized.calculate_penalties(repaired[0]), overlap=1)
+        generator.record_progress({'generation': 1, 'penalties': clashing})
+        self.assertIsNone(generator.feasibility)
+        generator.record_progress(generator.progress_event(2, repaired, [0.0]))
+        generator.record_progress(generator.progress_event(3, repaired, [0.0]))
+        self.assertEqual(generator.feasibility['generation'], 2)
+
+    def test_generate_repairs_clashing_best(self):
+        generator = ScheduleGenerator()
+        clashing = generator.random_population(1, seed=1)[0]
+        self.assertGreater(generator.hard_violations(generator.vectorized.calculate_penalties(clashing)), 0)
+        with mock.patch.object(ScheduleGenerator, 'run_ga', return_value=(clashing, -1e6)):
+            result = generator.generate(cache=False)
+        self.assertTrue(result['repaired'])
+        repaired = ScheduleRepair(generator).repair(clashing)
+        self.assertEqual(generator.hard_violations(generator.vectorized.calculate_penalties(repaired)), 0)
+        self.assertEqual(result['assignments'], generator._decode_solution(repaired))
+        self.assertEqual(result['fitness'], generator.vectorized.fitness_func(None, repaired, 0))
+
+
+class GreedySeedingTests(SchedulerTestCase):
+    def test_constructed_solutions_beat_random_ones(self):
+        generator = ScheduleGenerator()
+        constructor = GreedyConstructor(generator)
+        rng = np.random.default_rng(1)
+        seeded = np.array([constructor.construct(rng) for _ in range(10)])
+        for solution in seeded:
+            for gene, space in enumerate(generator.gene_space):
+                self.assertIn(solution[gene], space)
+        penalties = generator.vectorized.batch_penalties(seeded)
+        self.assertEqual(penalties['split_teacher'].sum(), 0)
+        random_fitness = generator.vectorized.batch_fitness(generator.random_population(10, seed=1))
+        self.assertGreater(generator.vectorized.batch_fitness(seeded).min(), random_fitness.max())
+
+    def test_initial_population_mixes_seeded_and_random(self):
+        generator = ScheduleGenerator()
+        population = generator.initial_population(10, seed_fraction=0.3, seed=2)
+        self.assertEqual(population.shape, (10, generator.num_genes))
+        self.assertTrue((population == generator.initial_population(10, seed_fraction=0.3, seed=2)).all())
+        self.assertTrue((population[3:] == generator.random_population(10, seed=2)[3:]).all())
+
+
+class ProblemSnapshotTests(SchedulerTestCase):
+    def test_startup_query_count_is_constant(self):
+        with self.assertNumQueries(5):
+            small = ScheduleGenerator()
+        build_institution(20)
+        with self.assertNumQueries(5):
+            large = ScheduleGenerator()
+        self.assertGreater(large.num_assignments, small.num_assignments)
+
+    def test_snapshot_round_trips_through_disk(self):
+        generator = ScheduleGenerator()
+        with tempfile.NamedTemporaryFile(suffix='.pickle') as output:
+            generator.snapshot.save(output.name)
+            with self.assertNumQueries(0):
+                restored = ScheduleGenerator(snapshot=ProblemSnapshot.from_file(output.name))
+        self.assertEqual(restored.gene_space, generator.gene_space)
+        self.assertEqual(restored.fingerprint(), generator.fingerprint())
+        population = generator.random_population(20, seed=3)
+        self.assertEqual(list(restored.vectorized.batch_fitness(population)),
+                         list(generator.vectorized.batch_fitness(population)))
+        self.assertFalse(restored.snapshot.subject_hours.flags.writeable)
+
+    def test_gene_space_matches_teacher_subjects(self):
+        generator = ScheduleGenerator()
+        for i, (course, subject, slot_hours) in enumerate(generator.assignments):
+            expected = sorted(Teacher.objects.filter(subjects=subject).values_list('id', flat=True))
+            self.assertEqual(generator.gene_space[i * generator.assignment_size], expected)
+
+
+class DecompositionTests(SchedulerTestCase):
+    def test_clusters_split_by_shift(self):
+        generator = ScheduleGenerator()
+        clusters = course_clusters(generator)
+        self.assertEqual(sorted(i for cluster in clusters for i in cluster), list(range(generator.num_assignments)))
+        self.assertEqual(len(clusters), len(set(generator.course_shifts.values())))
+        for cluster in clusters:
+            shifts = {generator.course_shifts[generator.assignments[i][0].id] for i in cluster}
+            self.assertEqual(len(shifts), 1)
+
+    def isolated_courses(self, requires_lab=False):
+        """Dos cursos de la mañana con materias y profesores propios"""
+        courses = []
+        for name in ('Aislado A', 'Aislado B'):
+            course = Course.objects.create(name=name, shift='MORNING')
+            subject = Subject.objects.create(name=f'Materia {name}', code=f'IS{course.id}', hours_per_week=2,
+                                             course=course, requires_lab=requires_lab)
+            Teacher.objects.create(name=f'Docente {name}', from_montevideo=False).subjects.add(subject)
+            courses.append(course)
+        return courses
+
+    def cluster_of(self, generator, clusters, course):
+        return next(i for i, cluster in enumerate(clusters)
+                    if any(generator.assignments[position][0].id == course.id for position in cluster))
+
+    def test_clusters_follow_teacher_sharing(self):
+        first, second = self.isolated_courses()
+        generator = ScheduleGenerator()
+        self.assertNotIn(('MORNING', False), scarce_room_classes(generator))
+        clusters = course_clusters(generator)
+        self.assertEqual(len({self.cluster_of(generator, clusters, c) for c in (first, second)}), 2)
+        # Un profesor habilitado en las dos materias acopla a los cursos
+        Teacher.objects.get(name='Docente Aislado A').subjects.add(Subject.objects.get(course=second))
+        generator = ScheduleGenerator()
+        clusters = course_clusters(generator)
+        self.assertEqual(len({self.cluster_of(generator, clusters, c) for c in (first, second)}), 1)
+
+    def test_scarce_labs_couple_courses(self):
+        first, second = self.isolated_courses(requires_lab=True)
+        Room.objects.filter(room_type__in=['COMP', 'LOG']).delete()
+        generator = ScheduleGenerator()
+        self.assertIn(('MORNING', True), scarce_room_classes(generator))
+        clusters = course_clusters(generator)
+        self.assertEqual(len({self.cluster_of(generator, clusters, c) for c in (first, second)}), 1)
+
+    def test_subproblem_matches_full_fitness_on_its_genes(self):
+        generator = ScheduleGenerator()
+        cluster = course_clusters(generator)[0]
+        sub = generator.subproblem(cluster)
+        self.assertEqual(sub.num_genes, len(cluster) * generator.assignment_size)
+        solution = sub.random_population(1, seed=4)[0]
+        self.assertEqual(sub.vectorized.calculate_penalties(solution)['course_shift'], 0)
+        self.assertEqual(sub.vectorized.fitness_func(None, solution, 0), sub.fitness_func(None, solution, 0))
+
+    def test_decomposed_run_returns_full_solution(self):
+        generator = ScheduleGenerator()
+        solution, fitness = Decomposition(generator, random_seed=3).run(3, 60, coordination_generations=2)
+        self.assertEqual(len(solution), generator.num_genes)
+        for gene, space in enumerate(generator.gene_space):
+            self.assertIn(solution[gene], space)
+        self.assertEqual(fitness, generator.vectorized.fitness_func(None, solution, 0))
+
+    def test_cluster_pool_is_bounded_and_reports_progress(self):
+        generator = ScheduleGenerator()
+        decomposition = Decomposition(generator, random_seed=3)
+        events = []
+        pool = decomposition_module.ProcessPoolExecutor
+        with mock.patch.object(decomposition_module, 'ProcessPoolExecutor', side_effect=pool) as executor:
+            decomposition.run(2, 60, coordination_generations=1, workers=1, on_progress=events.append)
+        self.assertEqual(executor.call_args.kwargs['max_workers'], 1)
+        # Un evento por cluster terminado, antes de la coordinación
+        self.assertEqual(len(events), len(decomposition.clusters))
+        self.assertEqual({event['generation'] for event in events}, {0})
+        self.assertEqual(set(events[0]['penalties']), set(generator.vectorized.calculate_penalties(
+            generator.random_population(1, seed=1)[0])))
+
+
+class GenerationCacheTests(SchedulerTestCase):
+    def setUp(self):
+        # Los cromosomas de prueba se guardan tal cual, sin pasar por la reparación final
+        patcher = mock.patch.object(ScheduleGenerator, 'repair_best',
+                                    lambda self, solution, fitness: (solution, fitness, False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.generator = ScheduleGenerator()
+        self.solution = self.generator.random_population(1, seed=5)[0]
+
+    def test_fingerprint_tracks_model_and_params(self):
+        key = self.generator.fingerprint(repair=False)
+        self.assertEqual(ScheduleGenerator().fingerprint(repair=False), key)
+        self.assertNotEqual(self.generator.fingerprint(repair=True), key)
+        self.assertNotEqual(ScheduleGenerator(prune_gene_space=True).fingerprint(repair=False), key)
+        Subject.objects.filter(id=Subject.objects.first().id).update(hours_per_week=9)
+        self.assertNotEqual(ScheduleGenerator().fingerprint(repair=False), key)
+
+    def test_pinned_seed_returns_cached_result(self):
+        with mock.patch.object(ScheduleGenerator, 'run_ga', return_value=(self.solution, -5.0)) as run_ga:
+            first = self.generator.generate(random_seed=1)
+            second = ScheduleGenerator().generate(random_seed=1)
+        self.assertEqual(run_ga.call_count, 1)
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['fitness'], -5.0)
+        self.assertEqual(second['assignments'], first['assignments'])
+
+    def test_cached_result_is_per_seed_and_budget(self):
+        better = self.generator.random_population(1, seed=6)[0]
+        with mock.patch.object(ScheduleGenerator, 'run_ga', return_value=(self.solution, -5.0)) as run_ga:
+            self.generator.generate(random_seed=1)
+            self.assertFalse(ScheduleGenerator().generate(random_seed=2)['cached'])
+            self.assertFalse(ScheduleGenerator().generate(random_seed=1, time_budget=2)['cached'])
+        self.assertEqual(run_ga.call_count, 3)
+        # Una ejecución sin semilla mejora la élite, pero no cambia lo que devuelve la semilla 1
+        with mock.patch.object(ScheduleGenerator, 'run_ga', return_value=(better, -1.0)):
+            ScheduleGenerator().generate()
+        self.assertEqual(GenerationCache.objects.get(fingerprint=self.generator.fingerprint_key).fitness, -1.0)
+        result = ScheduleGenerator().generate(random_seed=1)
+        self.assertTrue(result['cached'])
+        self.assertEqual(result['fitness'], -5.0)
+
+    def test_pinned_seed_does_not_warm_start(self):
+        GenerationCache.objects.create(fingerprint=self.generator.fingerprint(
+            islands=1, migration_interval=10, migrants=2, repair=False, seed_fraction=0.0, decompose=False,
+        ), solution=[int(gene) for gene in self.solution], fitness=-5.0)
+        with mock.patch.object(ScheduleGenerator, 'run_ga', return_value=(self.solution, -5.0)) as run_ga:
+            self.generator.generate(random_seed=3)
+        self.assertIsNone(run_ga.call_args.kwargs['initial_population'])
+
+    def test_unpinned_seed_warm_starts_from_cached_elite(self):
+        with mock.patch.object(ScheduleGenerator, 'run_ga', return_value=(self.solution, -5.0)) as run_ga:
+            self.generator.generate()
+            self.generator.generate()
+        self.assertEqual(run_ga.call_count, 2)
+        self.assertIsNone(run_ga.call_args_list[0].kwargs['initial_population'])
+        self.assertTrue((run_ga.call_args.kwargs['initial_population'][0] == self.solution).all())
+
+    def test_model_changes_invalidate_cache(self):
+        GenerationCache.objects.create(fingerprint='x', solution=[], fitness=0)
+        room = Room.objects.first()
+        room.capacity += 1
+        room.save()
+        self.assertFalse(GenerationCache.objects.exists())
+        GenerationCache.objects.create(fingerprint='x', solution=[], fitness=0)
+        Teacher.objects.first().subjects.clear()
+        self.assertFalse(GenerationCache.objects.exists())
+
+
+class ProfilerTests(SchedulerTestCase):
+    def test_profile_reports_sections_and_restores_methods(self):
+        generator = ScheduleGenerator(num_generations=3, sol_per_pop=10, num_parents_mating=4, stop_criteria=[])
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            result = generator.generate(random_seed=2, profile=True, profile_path=output.name)
+            self.assertEqual(json.load(open(output.name))['sections'].keys(), result['profile']['sections'].keys())
+        sections = result['profile']['sections']
+        self.assertEqual(sections['generation']['calls'], 3)
+        # Una evaluación por lote, el desglose del mejor en cada evento de progreso
+        # y la revisión final de choques (dos si se reparó)
+        self.assertEqual(sections['penalty.overlap']['calls'],
+                         sections['fitness']['calls'] + 3 + 1 + result['repaired'])
+        for name in ['decode', 'operator.crossover', 'operator.mutation', 'operator.select_parents'] + [
+                f'penalty.{penalty}' for penalty in generator.WEIGHTS]:
+            self.assertGreater(sections[name]['calls'], 0, name)
+        # Consultas del caché de resultados (lectura y escritura)
+        self.assertGreater(result['profile']['queries'], 0)
+        self.assertNotIn('penalty_functions', vars(generator))
+        self.assertNotIn('overlap_penalty', vars(generator.vectorized))
+        self.assertNotIn('profile', generator.generate(random_seed=2, cache=False))
+
+    def test_python_engine_profiles_each_decode(self):
+        generator = ScheduleGenerator(num_generations=2, sol_per_pop=10, num_parents_mating=4, stop_criteria=[])
+        result = generator.generate(engine='python', batch=False, profile=True, cache=False)
+        sections = result['profile']['sections']
+        self.assertGreater(sections['decode']['calls'], sections['fitness']['calls'])
+        self.assertEqual(sections['penalty.hours']['calls'], sections['fitness']['calls'] + 2 + 1 + result['repaired'])
+
+
+class CheckpointTests(SchedulerTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def make_generator(self):
+        return ScheduleGenerator(num_generations=6, sol_per_pop=10, num_parents_mating=4, stop_criteria=[])
+
+    def test_resumed_run_matches_uninterrupted_run(self):
+        expected = self.make_generator().generate(random_seed=3, cache=False)
+
+        def crash(event):
+            if event['generation'] == 5:
+                raise RuntimeError('reinicio del contenedor')
+
+        # PyGAD registra la excepción antes de propagarla
+        with self.assertRaises(RuntimeError), self.assertLogs('pygad', level='ERROR'):
+            self.make_generator().generate(random_seed=3, cache=False, on_progress=crash,
+                                           checkpoint_dir=self.directory, checkpoint_interval=3)
+        generations = []
+        result = self.make_generator().generate(random_seed=3, cache=False, checkpoint_dir=self.directory,
+                                                on_progress=lambda event: generations.append(event['generation']))
+        self.assertEqual(result['resumed_from'], 3)
+        self.assertEqual(generations, [4, 5, 6])
+        self.assertEqual(result['fitness'], expected['fitness'])
+        self.assertEqual(result['assignments'], expected['assignments'])
+        # La ejecución terminó: el checkpoint ya no hace falta
+        self.assertEqual(list(Path(self.directory).iterdir()), [])
+
+    def test_time_budget_slice_leaves_checkpoint(self):
+        with mock.patch.object(ScheduleGenerator, 'deadline_reached', return_value=True):
+            first = self.make_generator().generate(cache=False, checkpoint_dir=self.directory)
+        path, = Path(self.directory).iterdir()
+        checkpoint = Checkpoint.load(path)
+        self.assertEqual(checkpoint.generation, 1)
+        self.assertEqual(checkpoint.population.shape, (10, self.make_generator().num_genes))
+        self.assertIsNone(first['resumed_from'])
+        self.assertEqual(self.make_generator().generate(cache=False, checkpoint_dir=self.directory)['resumed_from'], 1)
+
+    def test_other_input_does_not_resume(self):
+        with mock.patch.object(ScheduleGenerator, 'deadline_reached', return_value=True):
+            self.make_generator().generate(cache=False, checkpoint_dir=self.directory)
+        result = self.make_generator().generate(cache=False, repair=True, checkpoint_dir=self.directory)
+        self.assertIsNone(result['resumed_from'])
+        with self.assertRaises(ValueError):
+            self.make_generator().generate(decompose=True, checkpoint_dir=self.directory)
+
+
+class BenchmarkSuiteTests(SchedulerTestCase):
+    def test_synthetic_benchmark_reports_json_and_rolls_back(self):
+        courses = Course.objects.count()
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command('benchmark_suite', sizes=[3], generations=2, population=10, samples=2,
+                         output=output.name, stdout=io.StringIO())
+            report = json.load(open(output.name))
+        result = report['results']['3']
+        self.assertEqual(result['dataset']['courses'], 3)
+        self.assertEqual(result['generate']['generations'], 2)
+        self.assertEqual(result['generate']['queries'], 0)
+        for step in ('init', 'persist'):
+            self.assertGreater(result[step]['queries'], 0)
+        self.assertEqual(Course.objects.count(), courses)
+
+
+def fake_generate(self, **kwargs):
+    """Sustituye al GA en las pruebas de la API: decodifica un cromosoma aleatorio"""
+    solution = self.random_population(1, seed=0)[0]
+    return {'assignments': self._decode_solution(solution), 'fitness': -1.0}
+
+
+@override_settings(GENERATION_WORKER_AUTOSPAWN=False)
+class GenerationJobTests(SchedulerTestCase):
+    def test_generate_returns_job_immediately(self):
+        response = self.client.post('/api/schedules/generate/')
+        self.assertEqual(response.status_code, 202)
+        job = GenerationJob.objects.get(id=response.json()['job_id'])
+        self.assertEqual(job.status, 'PENDING')
+
+    def test_generate_validates_parameters(self):
+        params = {'sol_per_pop': 40, 'num_parents_mating': 10, 'time_budget': 30, 'random_seed': 4,
+                  'stop_criteria': ['saturate_20'], 'crossover_type': 'uniform'}
+        response = self.client.post('/api/schedules/generate/', params, format='json')
+        self.assertEqual(response.status_code, 202)
+        stored = GenerationJob.objects.get(id=response.json()['job_id']).params
+        self.assertEqual({name: stored[name] for name in params}, params)
+        for invalid in ({'sol_per_pop': 20, 'num_parents_mating': 30}, {'stop_criteria': ['forever']},
+                        {'engine': 'python', 'workers': 2}, {'crossover_type': 'three_points'},
+                        {'checkpoint': True, 'islands': 2}):
+            response = self.client.post('/api/schedules/generate/', invalid, format='json')
+            self.assertEqual(response.status_code, 400, invalid)
+
+    def test_small_population_scales_default_operators(self):
+        response = self.client.post('/api/schedules/generate/', {'sol_per_pop': 20}, format='json')
+        self.assertEqual(response.status_code, 202)
+        params = GenerationJob.objects.get(id=response.json()['job_id']).params
+        self.assertEqual((params['num_parents_mating'], params['K_tournament'], params['keep_parents']), (7, 5, 2))
+        # Un valor explícito se sigue validando
+        response = self.client.post('/api/schedules/generate/', {'sol_per_pop': 20, 'num_parents_mating': 30},
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+        # La población mínima queda con parámetros que PyGAD acepta
+        response = self.client.post('/api/schedules/generate/', {'sol_per_pop': 4, 'num_generations': 2},
+                                    format='json')
+        params = GenerationJob.objects.get(id=response.json()['job_id']).params
+        self.assertEqual((params['num_parents_mating'], params['K_tournament'], params['keep_parents']), (2, 4, 2))
+        result = ScheduleGenerator(**params).generate(cache=False)
+        self.assertEqual(len(result['assignments']), ScheduleGenerator().num_assignments)
+
+    def test_worker_splits_problem_and_run_options(self):
+        job = jobs.enqueue({'sol_per_pop': 40, 'prune_gene_space': True, 'random_seed': 4, 'time_budget': 30})
+        calls = []
+
+        def generate(generator, **kwargs):
+            calls.append((generator.ga_params['sol_per_pop'], generator.prune_gene_space, kwargs))
+            return fake_generate(generator)
+
+        with mock.patch.object(ScheduleGenerator, 'generate', generate):
+            jobs.run_job(job)
+        (sol_per_pop, prune, kwargs), = calls
+        self.assertEqual((sol_per_pop, prune), (40, True))
+        self.assertEqual((kwargs['random_seed'], kwargs['time_budget']), (4, 30))
+        self.assertNotIn('checkpoint_dir', kwargs)
+
+    def test_worker_passes_checkpoint_dir(self):
+        job = jobs.enqueue({'checkpoint': True, 'checkpoint_interval': 5})
+        calls = []
+
+        def generate(generator, **kwargs):
+            calls.append((generator.validated_data, kwargs))
+            return fake_generate(generator)
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(GENERATION_CHECKPOINT_DIR=directory):
+            with mock.patch.object(ScheduleGenerator, 'generate', generate):
+                jobs.run_job(job)
+        (validated_data, kwargs), = calls
+        self.assertEqual(validated_data, {})
+        self.assertEqual((kwargs['checkpoint_dir'], kwargs['checkpoint_interval']), (Path(directory), 5))
+        self.assertNotIn('checkpoint', kwargs)
+
+    def test_time_budget_stops_the_run(self):
+        generator = ScheduleGenerator(num_generations=100000, sol_per_pop=20, num_parents_mating=10,
+                                      stop_criteria=[])
+        started = time.perf_counter()
+        result = generator.generate(time_budget=0.5, cache=False)
+        self.assertLess(time.perf_counter() - started, 10)
+        self.assertEqual(len(result['assignments']), generator.num_assignments)
+
+    @mock.patch.object(ScheduleGenerator, 'generate', fake_generate)
+    def test_worker_runs_pending_job(self):
+        job = jobs.enqueue()
+        claimed = jobs.claim_next_job()
+        self.assertEqual(claimed.id, job.id)
+        self.assertIsNone(jobs.claim_next_job())
+        jobs.run_job(claimed)
+
+        response = self.client.get(f'/api/generation-jobs/{job.id}/')
+        data = response.json()
+        self.assertEqual(data['status'], 'SUCCESS')
+        self.assertEqual(len(data['result']['schedules']), Schedule.objects.count())
+
+    def test_requeues_only_jobs_with_expired_lease(self):
+        old = timezone.now() - timedelta(hours=2)
+        abandoned = GenerationJob.objects.create(status='RUNNING', started_at=old, heartbeat_at=old)
+        # Vivo pero sin progreso hace dos horas (fase de clusters, reparación, generación lenta)
+        quiet = GenerationJob.objects.create(status='RUNNING', started_at=old, heartbeat_at=timezone.now())
+        GenerationProgress.objects.create(job=quiet, generation=40, best_fitness=-1, mean_fitness=-2)
+        GenerationProgress.objects.filter(job=quiet).update(created_at=old)
+        recent = GenerationJob.objects.create(status='RUNNING', started_at=timezone.now())
+        done = GenerationJob.objects.create(status='SUCCESS', started_at=old, heartbeat_at=old)
+        self.assertEqual(jobs.requeue_stale_jobs(stale_after=600), 1)
+        statuses = dict(GenerationJob.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[abandoned.id], 'PENDING')
+        self.assertEqual([statuses[job.id] for job in (quiet, recent, done)], ['RUNNING', 'RUNNING', 'SUCCESS'])
+
+    def test_heartbeat_renews_lease_while_running(self):
+        job = jobs.enqueue()
+        job = jobs.claim_next_job()
+        GenerationJob.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        jobs.Heartbeat(job).beat()
+        job.refresh_from_db()
+        self.assertGreater(job.heartbeat_at, timezone.now() - timedelta(minutes=1))
+        # El hilo late por su cuenta, sin depender del progreso del GA
+        with mock.patch.object(jobs.Heartbeat, 'beat') as beat:
+            with jobs.Heartbeat(job, interval=0.01):
+                time.sleep(0.2)
+        self.assertGreater(beat.call_count, 1)
+
+    def test_restarted_worker_resumes_checkpointed_job(self):
+        job = jobs.enqueue({'checkpoint': True, 'checkpoint_interval': 3, 'num_generations': 6, 'sol_per_pop': 10,
+                            'num_parents_mating': 4, 'stop_criteria': [], 'random_seed': 3})
+        publish = jobs.publish_progress
+
+        def die(job, event):
+            # El contenedor se reinicia: el proceso muere sin marcar el trabajo
+            if event['generation'] == 5:
+                raise KeyboardInterrupt
+            publish(job, event)
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(GENERATION_CHECKPOINT_DIR=directory):
+            with mock.patch.object(jobs, 'publish_progress', die), self.assertRaises(KeyboardInterrupt):
+                jobs.run_job(jobs.claim_next_job())
+            self.assertEqual(GenerationJob.objects.get(id=job.id).status, 'RUNNING')
+            old = timezone.now() - timedelta(hours=1)
+            GenerationJob.objects.filter(id=job.id).update(started_at=old, heartbeat_at=old)
+            call_command('generation_worker', '--once', stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'SUCCESS')
+        self.assertEqual(job.result['resumed_from'], 3)
+        self.assertEqual(list(job.progress.values_list('generation', flat=True)), [1, 2, 3, 4, 4, 5, 6])
+
+    def test_save_and_serialize_use_constant_queries(self):
+        generator = ScheduleGenerator()
+        result = fake_generate(generator)
+        query_counts = []
+        for copies in (1, 3):
+            scaled = {'assignments': result['assignments'] * copies}
+            with CaptureQueriesContext(connection) as queries:
+                created = jobs.save_schedules(generator, scaled)
+                ScheduleSerializer(created, many=True).data
+            query_counts.append(len(queries))
+            self.assertEqual(Schedule.objects.count(), generator.num_assignments * copies)
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_progress_events_stream(self):
+        generator = ScheduleGenerator()
+        job = GenerationJob.objects.create(status='SUCCESS')
+        population = generator.random_population(10, seed=1)
+        fitness = generator.vectorized.batch_fitness(population)
+        for generation in (1, 2):
+            jobs.publish_progress(job, generator.progress_event(generation, population, fitness))
+
+        response = self.client.get(f'/api/generation-jobs/{job.id}/events/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(body.count('event: progress'), 2)
+        self.assertIn('"best_fitness": %s' % float(fitness.max()), body)
+        self.assertTrue(body.endswith('event: done\ndata: {"status": "SUCCESS", "error": ""}\n\n'))
+
+    @mock.patch.object(ScheduleGenerator, 'generate', fake_generate)
+    def test_finished_job_prunes_old_progress(self):
+        old = GenerationJob.objects.create(status='SUCCESS', finished_at=timezone.now() - timedelta(days=2))
+        recent = GenerationJob.objects.create(status='SUCCESS', finished_at=timezone.now())
+        running = GenerationJob.objects.create(status='RUNNING', started_at=timezone.now() - timedelta(days=2))
+        for job in (old, recent, running):
+            GenerationProgress.objects.create(job=job, generation=1, best_fitness=-1, mean_fitness=-2)
+        jobs.enqueue()
+        jobs.run_job(jobs.claim_next_job())
+        kept = set(GenerationProgress.objects.values_list('job_id', flat=True))
+        self.assertEqual(kept, {recent.id, running.id})
+
+
+class ScheduleListTests(SchedulerTestCase):
+    def setUp(self):
+        self.generator = ScheduleGenerator()
+
+    def save(self, copies=1):
+        result = fake_generate(self.generator)
+        return jobs.save_schedules(self.generator, {'assignments': result['assignments'] * copies})
+
+    def test_list_uses_constant_queries(self):
+        query_counts = []
+        for copies in (1, 4):
+            self.save(copies)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/api/schedules/')
+            self.assertEqual(len(response.json()['results']), self.generator.num_assignments * copies)
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_cursor_pagination_and_filters(self):
+        self.save(3)
+        response = self.client.get('/api/schedules/', {'page_size': 5})
+        data = response.json()
+        self.assertEqual(len(data['results']), 5)
+        self.assertIsNotNone(data['next'])
+
+        schedule = Schedule.objects.first()
+        results = self.client.get('/api/schedules/', {
+            'course': schedule.course_id, 'room': schedule.room_id,
+            'teacher': schedule.teacher_id, 'day': schedule.day,
+        }).json()['results']
+        expected = Schedule.objects.filter(course=schedule.course, room=schedule.room,
+                                           teacher=schedule.teacher, day=schedule.day)
+        self.assertEqual(len(results), expected.count())
+        self.assertTrue(all(r['course']['id'] == schedule.course_id for r in results))
+
+    def test_flat_representation(self):
+        self.save()
+        result = self.client.get('/api/schedules/', {'representation': 'flat'}).json()['results'][0]
+        self.assertIsInstance(result['course'], int)
+        self.assertIsInstance(result['teacher'], int)
+
+
+class ScheduleConflictTests(SchedulerTestCase):
+    def block(self, **fields):
+        values = dict(course=Course.objects.first(), subject=Subject.objects.first(),
+                      teacher=Teacher.objects.first(), room=Room.objects.first(),
+                      day='TUE', start_time='08:00', end_time='11:00', duration=180)
+        values.update(fields)
+        return Schedule.objects.create(**values)
+
+    def test_edit_into_occupied_slot_is_rejected(self):
+        self.block()
+        other = self.block(day='WED', teacher=Teacher.objects.last())
+        response = self.client.patch(f'/api/schedules/{other.id}/', {
+            'day': 'TUE', 'start_time': '10:00', 'end_time': '12:00',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(f'/api/schedules/{other.id}/', {
+            'day': 'TUE', 'start_time': '14:00', 'end_time': '16:00',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_migration_reports_existing_overlaps(self):
+        migration = importlib.import_module('scheduler.migrations.0005_schedule_conflict_indexes')
+        first = self.block()
+        self.block(start_time='11:00', end_time='13:00', teacher=Teacher.objects.last())
+        self.assertEqual(migration.find_overlaps(Schedule.objects, 'room_id'), [])
+        self.assertEqual(migration.find_overlaps(Schedule.objects, 'teacher_id'), [])
+        clash = self.block(start_time='09:00', end_time='10:30', room=Room.objects.last())
+        self.assertEqual(migration.find_overlaps(Schedule.objects, 'teacher_id'), [(first.id, clash.id)])
+        self.assertEqual(migration.find_overlaps(Schedule.objects, 'room_id'), [])
+
+    def test_overlap_penalties_use_time_ranges(self):
+        generator = ScheduleGenerator()
+        first = Assignment(course_id=1, subject_id=1, teacher_id=1, room_id=1, day=1, start=8 * 60, duration=180)
+        second = first.replace(course_id=2, start=10 * 60, end=12 * 60, duration=120)
+        self.assertEqual(generator.calculate_overlap_penalty([first, second]), 10)
+        self.assertEqual(generator.calculate_teacher_overlap_penalty([first, second]), 10)
+        later = second.replace(start=14 * 60, end=16 * 60)
+        self.assertEqual(generator.calculate_teacher_overlap_penalty([first, later]), 0)
+
+
+class ScheduleCheckTests(SchedulerTestCase):
+    def setUp(self):
+        reset_shared_generator()
+        self.addCleanup(reset_shared_generator)
+        self.generator = ScheduleGenerator()
+        jobs.save_schedules(self.generator, fake_generate(self.generator))
+
+    def full_penalties(self, edits=()):
+        """Penalizaciones del horario completo, con las ediciones aplicadas en su lugar"""
+        rows = Schedule.objects.order_by('id').values(
+            'id', 'course_id', 'subject_id', 'teacher_id', 'room_id', 'day', 'start_time', 'end_time', 'duration')
+        assignments = {row['id']: to_assignment(row) for row in rows}
+        for edit in edits:
+            assignments[edit['id']] = assignments[edit['id']].replace(
+                day=self.generator.DAYS.index(edit['day']), start=minutes(edit['start_time']),
+                room_id=edit['room_id'], teacher_id=edit['teacher_id'],
+                duration=edit['duration'], slot_hours=edit['slot_hours'],
+            )
+        return self.generator.calculate_penalties(list(assignments.values()))
+
+    def test_delta_matches_full_rescoring(self):
+        rng = random.Random(4)
+        schedules = list(Schedule.objects.order_by('id'))
+        for _ in range(20):
+            edits = []
+            for schedule in rng.sample(schedules, 3):
+                # end_time se mantiene: solo inicios anteriores a él
+                end = schedule.end_time.strftime('%H:%M')
+                edits.append({
+                    'id': schedule.id, 'day': rng.choice(self.generator.DAYS),
+                    'start_time': rng.choice([t for t in self.generator.TIME_SLOTS if t < end]),
+                    'room_id': rng.choice(self.generator.rooms).id,
+                    'teacher_id': rng.choice(self.generator.teachers).id,
+                })
+            payload = [{'id': e['id'], 'day': e['day'], 'start_time': e['start_time'],
+                        'end_time': Schedule.objects.get(id=e['id']).end_time.strftime('%H:%M'),
+                        'room': e['room_id'], 'teacher': e['teacher_id']} for e in edits]
+            response = self.client.post('/api/schedules/check/', {'edits': payload},
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            # end_time se mantiene: la duración cambia igual que en el endpoint
+            for edit, item in zip(edits, payload):
+                start, end = int(item['start_time'][:2]), int(item['end_time'][:2])
+                edit['duration'] = (end - start) * 60
+                edit['slot_hours'] = edit['duration'] // 60
+            before, after = self.full_penalties(), self.full_penalties(edits)
+            expected = {name: after[name] - before[name] for name in before}
+            self.assertEqual(response.json()['penalty_delta'], expected)
+
+    def test_check_reads_only_the_edited_neighborhood(self):
+        schedule = Schedule.objects.order_by('id').first()
+        payload = {'edits': [{'id': schedule.id, 'day': 'FRI', 'start_time': '19:00', 'end_time': '21:00'}]}
+        self.client.post('/api/schedules/check/', payload, content_type='application/json')
+        with mock.patch('utec_scheduler.occupancy.IncrementalFitness._group_penalties',
+                        autospec=True, side_effect=IncrementalFitness._group_penalties) as evaluated, \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/schedules/check/', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        # Generador reutilizado (una consulta a ConstraintVersion): solo el bloque editado y su vecindario
+        self.assertEqual(len(queries), 3)
+        # Antes y después de cada grupo afectado (6 tipos de grupo, a lo sumo 2 grupos por tipo)
+        self.assertGreater(evaluated.call_count, 0)
+        self.assertLessEqual(evaluated.call_count, 6 * 2 * 2)
+        index, proposals = OccupancyIndex.around(self.generator, [{'id': schedule.id, 'day': 'FRI',
+                                                                   'start_time': '19:00', 'end_time': '21:00'}])
+        self.assertLess(len(index.evaluator.assignments), Schedule.objects.count())
+        full = OccupancyIndex(self.generator, Schedule.objects.order_by('id').values(*SCHEDULE_FIELDS))
+        self.assertEqual(index.check(proposals), full.check(proposals))
+        self.assertEqual(response.json(), json.loads(json.dumps(full.check(proposals))))
+
+    def test_constraint_changes_reset_shared_generator(self):
+        generator = shared_generator()
+        self.assertIs(shared_generator(), generator)
+        room = Room.objects.first()
+        room.save()
+        self.assertIsNot(shared_generator(), generator)
+
+    def test_change_in_another_process_rebuilds_shared_generator(self):
+        generator = shared_generator()
+        # Otro proceso guardó un salón: sus señales no corren en este
+        ConstraintVersion.bump()
+        self.assertIsNot(shared_generator(), generator)
+
+    def test_unknown_reference_is_a_validation_error(self):
+        shared_generator()
+        # Profesor creado sin señales: el generador compartido no lo conoce
+        Teacher.objects.bulk_create([Teacher(name='Sin señales')])
+        teacher = Teacher.objects.get(name='Sin señales')
+        schedule = Schedule.objects.order_by('id').first()
+        response = self.client.post('/api/schedules/check/', {'edits': [{'id': schedule.id, 'teacher': teacher.id}]},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Referencia desconocida', json.dumps(response.json(), ensure_ascii=False))
+
+    def test_rejects_negative_durations_and_foreign_subjects(self):
+        schedule = Schedule.objects.order_by('id').first()
+        response = self.client.post('/api/schedules/check/', {'edits': [{
+            'id': schedule.id, 'start_time': '16:00', 'end_time': '14:00',
+        }]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        # Solo end_time: se compara con el start_time guardado
+        response = self.client.post('/api/schedules/check/', {'edits': [{
+            'id': schedule.id, 'end_time': schedule.start_time.strftime('%H:%M'),
+        }]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        other = Subject.objects.exclude(course_id=schedule.course_id).first()
+        response = self.client.post('/api/schedules/check/', {'edits': [{
+            'course': schedule.course_id, 'subject': other.id, 'teacher': schedule.teacher_id,
+            'room': schedule.room_id, 'day': 'MON', 'start_time': '08:00', 'end_time': '10:00',
+        }]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('no pertenece al curso', json.dumps(response.json(), ensure_ascii=False))
+
+    def test_reports_room_conflicts(self):
+        first, second = Schedule.objects.order_by('id')[:2]
+        response = self.client.post('/api/schedules/check/', {'edits': [{
+            'id': second.id, 'room': first.room_id, 'day': first.day,
+            'start_time': first.start_time.strftime('%H:%M'), 'end_time': first.end_time.strftime('%H:%M'),
+        }]}, content_type='application/json')
+        self.assertIn({'type': 'room', 'schedule': second.id, 'conflicts_with': first.id},
+                      response.json()['conflicts'])
+
+    def test_new_block_requires_all_fields(self):
+        response = self.client.post('/api/schedules/check/', {'edits': [{'day': 'MON'}]},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ReoptimizeTests(SchedulerTestCase):
+    def setUp(self):
+        self.generator = ScheduleGenerator()
+        jobs.save_schedules(self.generator, fake_generate(self.generator))
+        self.before = {s.id: (s.teacher_id, s.room_id, s.day, s.start_time) for s in Schedule.objects.all()}
+        self.teacher = Schedule.objects.order_by('id').first().teacher_id
+
+    @override_settings(GENERATION_WORKER_AUTOSPAWN=False)
+    def test_only_affected_blocks_change(self):
+        reoptimizer = Reoptimizer(self.generator, Schedule.objects.order_by('id'), exclude_teachers=[self.teacher])
+        freed = {reoptimizer.rows[i].id for i in reoptimizer.free_positions}
+        response = self.client.post('/api/schedules/reoptimize/', {
+            'exclude_teachers': [self.teacher], 'num_generations': 20, 'sol_per_pop': 20, 'random_seed': 1,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        job = jobs.run_job(jobs.claim_next_job())
+        self.assertEqual(job.status, 'SUCCESS', job.error)
+        self.assertLessEqual(job.progress.count(), 20)
+
+        changed = {c['schedule_id'] for c in job.result['changes']}
+        self.assertTrue(changed <= freed)
+        # El profesor excluido solo queda donde nadie más puede dictar la materia
+        for schedule in Schedule.objects.filter(teacher_id=self.teacher):
+            self.assertEqual(list(schedule.subject.teacher_set.values_list('id', flat=True)), [self.teacher])
+        for schedule in Schedule.objects.exclude(id__in=freed):
+            self.assertEqual((schedule.teacher_id, schedule.room_id, schedule.day, schedule.start_time),
+                             self.before[schedule.id])
+
+    def test_neighborhood_frees_blocks_sharing_course_room_or_teacher(self):
+        schedules = Schedule.objects.order_by('id')
+        edited = schedules.first()
+        reoptimizer = Reoptimizer(self.generator, schedules, exclude_rooms=[edited.room_id])
+        direct = Reoptimizer(self.generator, schedules, exclude_rooms=[edited.room_id], neighborhood=False)
+        self.assertEqual(reoptimizer.affected, direct.free_positions)
+        self.assertTrue(set(direct.free_positions) < set(reoptimizer.free_positions))
+        freed = {reoptimizer.rows[i].id for i in reoptimizer.free_positions}
+        # Los bloques del mismo curso ese día también pueden moverse
+        same_course = schedules.filter(course_id=edited.course_id, day=edited.day)
+        self.assertTrue(set(same_course.values_list('id', flat=True)) <= freed)
+        # Ningún bloque fijo queda en el salón excluido
+        for i in set(range(len(reoptimizer.rows))) - set(reoptimizer.free_positions):
+            self.assertNotEqual(reoptimizer.rows[i].room_id, edited.room_id)
+
+    def test_rejects_generate_only_options(self):
+        response = self.client.post('/api/schedules/reoptimize/', {'sol_per_pop': 2},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        serializer = ReoptimizeSerializer(data={'islands': 4, 'sol_per_pop': 10})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertNotIn('islands', serializer.validated_data)
+        self.assertEqual(serializer.validated_data['num_parents_mating'], 3)
+
+    def test_clashing_best_is_repaired_moving_only_free_blocks(self):
+        generator = ScheduleGenerator(exclude_teachers=[self.teacher])
+        reoptimizer = Reoptimizer(generator, Schedule.objects.order_by('id'), exclude_teachers=[self.teacher])
+        size = generator.assignment_size
+        free = reoptimizer.free_positions[0]
+        fixed = next(i for i in range(generator.num_assignments) if i not in reoptimizer.free_positions)
+        # El mejor individuo deja un bloque libre en el salón, día y franja de uno fijo
+        clashing = reoptimizer.base.copy()
+        clashing[free * size + 1:free * size + 4] = clashing[fixed * size + 1:fixed * size + 4]
+        violations = generator.hard_violations(generator.vectorized.calculate_penalties(clashing))
+        fitness = float(generator.vectorized.batch_fitness(clashing)[0])
+        with mock.patch.object(Reoptimizer, 'run', return_value=(clashing, fitness)):
+            result = generator.reoptimize()
+        self.assertTrue(result['repaired'])
+        solution = np.array([[a['teacher_id'], a['room_id'], generator.DAYS.index(a['day']),
+                              generator.slot_index[a['start_time']]] for a in result['assignments']]).reshape(-1)
+        self.assertLess(generator.hard_violations(generator.vectorized.calculate_penalties(solution)), violations)
+        pinned = [i * size + g for i in range(generator.num_assignments) if i not in reoptimizer.free_positions
+                  for g in range(size)]
+        np.testing.assert_array_equal(solution[pinned], reoptimizer.base[pinned])
+
+    def test_nothing_to_reoptimize_keeps_plan(self):
+        result = self.generator.reoptimize()
+        self.assertEqual(result['reoptimized'], 0)
+        self.assertEqual(result['changes'], [])
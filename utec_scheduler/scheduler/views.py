@@ -1,13 +1,16 @@
-from django.shortcuts import render
-from django.http import JsonResponse
+from django.shortcuts import render, get_object_or_404
+from django.http import JsonResponse, StreamingHttpResponse
 
 #from scheduler.genetic_algorithm import ScheduleGenerator
 
 from rest_framework import viewsets
-from .models import Room, Course, Subject, Teacher, Schedule
+from .models import Room, Course, Subject, Teacher, Schedule, GenerationJob
 from .serializers import (RoomSerializer, CourseSerializer, 
                          SubjectSerializer, TeacherSerializer, 
-                         ScheduleSerializer)
+                         ScheduleSerializer, ScheduleFlatSerializer,
+                         ScheduleCheckSerializer, ReoptimizeSerializer, GenerateSerializer,
+                         GenerationJobSerializer)
+from . import jobs
 
 # froms to fix
 from rest_framework.decorators import api_view
@@ -16,9 +19,14 @@ from .models import Schedule
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import viewsets, status
+from rest_framework.reverse import reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from django_filters.rest_framework import DjangoFilterBackend
 from .models import Schedule
 
 from utec_scheduler.genetic_algorithm import ScheduleGenerator
+from utec_scheduler.occupancy import OccupancyIndex, shared_generator
 
 
 class RoomViewSet(viewsets.ModelViewSet):
@@ -37,56 +45,107 @@ class TeacherViewSet(viewsets.ModelViewSet):
     queryset = Teacher.objects.all()
     serializer_class = TeacherSerializer
 
+class ScheduleCursorPagination(CursorPagination):
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
 class ScheduleViewSet(viewsets.ModelViewSet):
-    queryset = Schedule.objects.all()
+    """
+    Horarios paginados por cursor y filtrables por curso, salón, profesor y día.
+    Con ?representation=flat las relaciones se devuelven como ids.
+    """
+    queryset = (Schedule.objects
+                .select_related('course', 'subject', 'teacher', 'room')
+                .prefetch_related('teacher__subjects'))
     serializer_class = ScheduleSerializer
+    pagination_class = ScheduleCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['course', 'room', 'teacher', 'day']
+
+    def get_serializer_class(self):
+        if self.request is not None and self.request.query_params.get('representation') == 'flat':
+            return ScheduleFlatSerializer
+        return super().get_serializer_class()
 
     @action(detail=False, methods=['post'])
     def generate(self, request):
         """
-        Genera horarios usando el algoritmo genético.
-        Endpoint: POST /api/schedules/generate/
+        Encola la generación de horarios con el algoritmo genético.
+        Endpoint: POST /api/schedules/generate/ con parámetros opcionales
+        (ver GenerateSerializer), p. ej. {"sol_per_pop": 80, "time_budget": 30, "random_seed": 1}
+        Responde de inmediato con el id del trabajo; el estado y el resultado
+        se consultan en /api/generation-jobs/<id>/
+        """
+        serializer = GenerateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = jobs.enqueue(serializer.validated_data)
+        return self.accepted(request, job)
+
+    @action(detail=False, methods=['post'])
+    def reoptimize(self, request):
+        """
+        Encola una re-optimización a partir del horario guardado.
+        Endpoint: POST /api/schedules/reoptimize/ con {"exclude_teachers": [...], "exclude_rooms": [...]}
+        y, opcionalmente, los parámetros del GA, random_seed y time_budget como en generate/.
+        Solo se mueven los bloques afectados y su vecindario; el resultado del trabajo incluye los cambios.
         """
+        serializer = ReoptimizeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = jobs.enqueue({'mode': 'reoptimize', **serializer.validated_data})
+        return self.accepted(request, job)
+
+    def accepted(self, request, job):
+        return Response({
+            'status': 'accepted',
+            'job_id': job.id,
+            'job_status': job.status,
+            'status_url': reverse('generationjob-detail', args=[job.id], request=request),
+            'events_url': reverse('generation-job-events', args=[job.id], request=request),
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['post'])
+    def check(self, request):
+        """
+        Verifica ediciones propuestas sin guardarlas.
+        Endpoint: POST /api/schedules/check/ con {"edits": [{"id": 3, "day": "TUE", ...}, ...]}
+        Devuelve los choques de salón, profesor y curso y la variación de cada penalización.
+        """
+        serializer = ScheduleCheckSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        edits = [{f'{k}_id' if k in ('course', 'subject', 'teacher', 'room') else k:
+                  v.id if k in ('course', 'subject', 'teacher', 'room') else v
+                  for k, v in edit.items()} for edit in serializer.validated_data['edits']]
         try:
-            # Instancia el generador
-            generator = ScheduleGenerator()
-            
-            # Genera el mejor horario
-            result = generator.generate()
-            
-            if not isinstance(result, dict) or 'assignments' not in result:
-                raise ValueError("Formato de resultado inválido")
-            
-            # Limpia los horarios existentes
-            Schedule.objects.all().delete()
-            
-            # Guarda los nuevos horarios
-            created_schedules = []
-            for assignment in result['assignments']:
-                schedule = Schedule.objects.create(
-                    course_id=assignment['course_id'],
-                    subject_id=assignment['subject_id'],
-                    teacher_id=assignment['teacher_id'],
-                    room_id=assignment['room_id'],
-                    day=assignment['day'],
-                    start_time=f"{assignment['start_time']}:00" if len(assignment['start_time']) == 5 else assignment['start_time'],
-                    end_time=assignment['end_time'],
-                    duration=assignment['duration']
-                )
-                created_schedules.append(schedule)
-            
-            return Response({
-                'status': 'success',
-                'message': f'Se generaron {len(created_schedules)} horarios',
-                'schedules': self.get_serializer(created_schedules, many=True).data,
-                'fitness': result.get('fitness')
-            })
-            
-        except Exception as e:
-            return Response({
-                'status': 'error',
-                'message': str(e)
-            }, status=status.HTTP_400_BAD_REQUEST)
+            # Solo se leen los bloques de los grupos que tocan las ediciones
+            index, proposals = OccupancyIndex.around(shared_generator(), edits)
+        except KeyError as missing:
+            raise ValidationError({'edits': [f"No existe el horario {missing.args[0]}"]})
+        invalid = [proposal.id for proposal in proposals if proposal.end <= proposal.start]
+        if invalid:
+            raise ValidationError({'edits': [f"end_time debe ser posterior a start_time (horarios {invalid})"]})
+        try:
+            return Response(index.check(proposals))
+        except KeyError as missing:
+            # Un id que el generador no conoce (p. ej. cargado sin pasar por las señales)
+            raise ValidationError({'edits': [f"Referencia desconocida en las ediciones: {missing.args[0]}"]})
+
+class GenerationJobViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = GenerationJob.objects.all()
+    serializer_class = GenerationJobSerializer
+
+def generation_job_events(request, pk):
+    """
+    Progreso de un trabajo de generación como Server-Sent Events.
+    Endpoint: GET /api/generation-jobs/<id>/events/
+    """
+    job = get_object_or_404(GenerationJob, pk=pk)
+    last_id = int(request.headers.get('Last-Event-ID') or 0)
+    response = StreamingHttpResponse(jobs.progress_stream(job.id, last_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx no debe acumular el stream
+    return response
 
 @api_view(['POST'])
 def generate_schedules(request):
@@ -2,4 +2,7 @@
 # Ejecuta migraciones y luego inicia Gunicorn
 python manage.py makemigrations --noinput
 python manage.py migrate --noinput
-gunicorn --bind 0.0.0.0:8000 --timeout 3600 utec_scheduler.wsgi:application
+# Workers con hilos: cada stream SSE de progreso (/api/generation-jobs/<id>/events/)
+# ocupa un hilo mientras dura el trabajo, no el worker completo
+gunicorn --bind 0.0.0.0:8000 --timeout 3600 --worker-class gthread \
+    --workers "${GUNICORN_WORKERS:-2}" --threads "${GUNICORN_THREADS:-8}" utec_scheduler.wsgi:application
@@ -0,0 +1,80 @@
+def minutes(value):
+    """Minutos desde las 00:00 de un 'HH:MM[:SS]' o de un datetime.time"""
+    if isinstance(value, str):
+        hour, minute = value.split(':')[:2]
+        return int(hour) * 60 + int(minute)
+    return value.hour * 60 + value.minute
+
+
+def clock(total_minutes, seconds=False):
+    """'HH:MM' (o 'HH:MM:SS') a partir de minutos desde las 00:00"""
+    text = f"{total_minutes // 60:02d}:{total_minutes % 60:02d}"
+    return f"{text}:00" if seconds else text
+
+
+class Assignment:
+    """
+    Asignación decodificada compacta: solo enteros en __slots__.
+
+    day es el índice en ScheduleGenerator.DAYS; start y end son minutos desde
+    las 00:00. Las penalizaciones comparan enteros directamente; los textos
+    ('TUE', '08:00', '10:00:00') se arman recién en as_dict(), al salir hacia
+    la API o la base de datos.
+    """
+
+    __slots__ = ('course_id', 'subject_id', 'teacher_id', 'room_id', 'day', 'start', 'end', 'duration',
+                 'slot_hours', 'id')
+    MAX_END = 23 * 60  # end_time se limita a las 23:00
+
+    def __init__(self, course_id, subject_id, teacher_id, room_id, day, start, duration, end=None,
+                 slot_hours=None, id=None):
+        self.course_id = course_id
+        self.subject_id = subject_id
+        self.teacher_id = teacher_id
+        self.room_id = room_id
+        self.day = day
+        self.start = start
+        self.duration = duration
+        self.end = min(start + duration, self.MAX_END) if end is None else end
+        self.slot_hours = duration // 60 if slot_hours is None else slot_hours
+        self.id = id
+
+    @property
+    def start_hour(self):
+        return self.start // 60
+
+    def replace(self, **fields):
+        """Copia con algunos campos cambiados"""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(fields)
+        return Assignment(**values)
+
+    def as_dict(self, days):
+        """Formato de la API (day como código, horas como texto)"""
+        data = {
+            'course_id': self.course_id,
+            'subject_id': self.subject_id,
+            'teacher_id': self.teacher_id,
+            'room_id': self.room_id,
+            'day': days[self.day],
+            'start_time': clock(self.start),
+            'slot_hours': self.slot_hours,
+            'duration': self.duration,
+            'end_time': clock(self.end, seconds=True),
+        }
+        if self.id is not None:
+            data['id'] = self.id
+        return data
+
+    def __eq__(self, other):
+        if not isinstance(other, Assignment):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self):
+        # Mismos campos que __eq__: las asignaciones no se modifican (replace() crea una copia)
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'Assignment({fields})'
@@ -0,0 +1,91 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+class Checkpoint:
+    """
+    Estado de una ejecución de PyGAD para continuarla más tarde: población,
+    fitness, generación y el estado de los dos generadores aleatorios de la
+    instancia (numpy_random_generator y python_random_generator).
+
+    Se guarda como un .npz comprimido sin pickle. Con el mismo fingerprint,
+    una ejecución retomada con restore() sigue exactamente como la original.
+    """
+
+    def __init__(self, fingerprint, generation, population, fitness, numpy_state, python_state,
+                 feasibility=None):
+        self.fingerprint = fingerprint
+        self.generation = generation
+        self.population = population
+        self.fitness = fitness
+        self.numpy_state = numpy_state
+        self.python_state = python_state
+        self.feasibility = feasibility
+
+    @classmethod
+    def capture(cls, fingerprint, ga_instance, feasibility=None):
+        """Checkpoint de una instancia de pygad.GA al terminar una generación"""
+        return cls(
+            fingerprint,
+            ga_instance.generations_completed,
+            np.array(ga_instance.population, dtype=np.int32),
+            np.array(ga_instance.last_generation_fitness, dtype=float),
+            ga_instance.numpy_random_generator.get_state(),
+            ga_instance.python_random_generator.getstate(),
+            feasibility,
+        )
+
+    def restore(self, ga_instance):
+        """Prepara una instancia creada con initial_population=self.population para continuar"""
+        ga_instance.generations_completed = self.generation
+        ga_instance.numpy_random_generator.set_state(self.numpy_state)
+        ga_instance.python_random_generator.setstate(self.python_state)
+
+    def best(self):
+        """(mejor cromosoma, fitness) del checkpoint, sin reevaluar la población"""
+        best = int(np.argmax(self.fitness))
+        return self.population[best], float(self.fitness[best])
+
+    def save(self, path):
+        """Escribe el checkpoint; se reemplaza el archivo anterior de forma atómica"""
+        name, keys, position, has_gauss, cached_gaussian = self.numpy_state
+        version, python_keys, gauss_next = self.python_state
+        temporary = f'{path}.tmp'
+        with open(temporary, 'wb') as output:
+            np.savez_compressed(
+                output,
+                fingerprint=self.fingerprint,
+                generation=self.generation,
+                population=self.population,
+                fitness=self.fitness,
+                numpy_keys=keys,
+                numpy_meta=np.array([position, has_gauss]),
+                numpy_gauss=cached_gaussian,
+                python_keys=np.array(python_keys, dtype=np.int64),
+                python_meta=np.array([version]),
+                python_gauss=np.nan if gauss_next is None else gauss_next,
+                feasibility=json.dumps(self.feasibility),
+            )
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """Checkpoint guardado en path, o None si no existe"""
+        if not Path(path).exists():
+            return None
+        with np.load(path) as data:
+            position, has_gauss = (int(value) for value in data['numpy_meta'])
+            gauss_next = float(data['python_gauss'])
+            return cls(
+                str(data['fingerprint']),
+                int(data['generation']),
+                data['population'],
+                data['fitness'],
+                ('MT19937', data['numpy_keys'], position, has_gauss, float(data['numpy_gauss'])),
+                (int(data['python_meta'][0]), tuple(int(key) for key in data['python_keys']),
+                 None if np.isnan(gauss_next) else gauss_next),
+                json.loads(str(data['feasibility'])),
+            )
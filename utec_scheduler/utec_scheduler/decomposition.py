@@ -0,0 +1,167 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import logging
+import os
+import warnings
+
+import numpy as np
+import pygad
+
+from .island_model import stop_at_deadline
+from .repair import ScheduleRepair
+
+logger = logging.getLogger(__name__)
+
+def course_clusters(generator):
+    """
+    Agrupa las asignaciones en clusters débilmente acoplados.
+
+    Dos cursos del mismo turno quedan en el mismo cluster si comparten algún
+    profesor habilitado, o si necesitan el mismo tipo de salón (laboratorio o
+    común, ver scarce_room_classes()) y ese tipo no alcanza para la demanda del
+    turno. Cursos de turnos distintos nunca se unen: sus franjas del turno no
+    se superponen en el tiempo.
+    Devuelve una lista de listas de posiciones (índices en generator.assignments).
+    """
+    size = generator.assignment_size
+    scarce = scarce_room_classes(generator)
+    parent = {}
+
+    def find(course_id):
+        while parent[course_id] != course_id:
+            parent[course_id] = parent[parent[course_id]]
+            course_id = parent[course_id]
+        return course_id
+
+    # Primer curso de cada turno que usa un recurso; los siguientes se unen a él
+    owners = {}
+    for i, (course, subject, slot_hours) in enumerate(generator.assignments):
+        parent.setdefault(course.id, course.id)
+        shift = generator.course_shifts[course.id]
+        keys = [('teacher', teacher) for teacher in generator.gene_space[i * size]]
+        if (shift, subject.requires_lab) in scarce:
+            keys.append(('rooms', subject.requires_lab))
+        for key in keys:
+            owner = owners.setdefault((shift, key), course.id)
+            parent[find(course.id)] = find(owner)
+    clusters = {}
+    for i, (course, subject, slot_hours) in enumerate(generator.assignments):
+        clusters.setdefault(find(course.id), []).append(i)
+    return list(clusters.values())
+
+
+def scarce_room_classes(generator):
+    """
+    Pares (turno, requires_lab) cuyos salones no alcanzan para la demanda: las
+    horas de bloque del turno superan las horas disponibles en los salones de
+    ese tipo. Solo esos salones acoplan cursos; si sobran, cada cluster puede
+    elegir los suyos sin competir con los demás.
+    """
+    is_lab = generator.snapshot.room_is_lab
+    rooms = {True: int(np.sum(is_lab)), False: int(np.sum(~np.asarray(is_lab)))}
+    demand, shift_hours = {}, {}
+    for course, subject, slot_hours in generator.assignments:
+        shift = generator.course_shifts[course.id]
+        key = (shift, subject.requires_lab)
+        demand[key] = demand.get(key, 0) + slot_hours
+        start, end = generator.SHIFT_HOURS[shift]
+        shift_hours[shift] = end - start
+    return {(shift, lab) for (shift, lab), hours in demand.items()
+            if hours > rooms[lab] * len(generator.DAYS) * shift_hours[shift]}
+
+
+def _solve_cluster(engine, options, population, num_generations, seed, stop_criteria, deadline):
+    """Evoluciona un cluster en su proceso y devuelve (mejor cromosoma, fitness)"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        ga_instance = pygad.GA(
+            num_generations=num_generations,
+            fitness_func=engine.batch_fitness_func,
+            fitness_batch_size=len(population),
+            initial_population=population,
+            stop_criteria=stop_criteria,
+            random_seed=seed,
+            on_generation=stop_at_deadline(deadline),
+            suppress_warnings=True,
+            **options
+        )
+        ga_instance.run()
+    solution, solution_fitness, _ = ga_instance.best_solution(ga_instance.last_generation_fitness)
+    return solution, float(solution_fitness)
+
+
+class Decomposition:
+    """
+    Resolución por sub-problemas.
+
+    Cada cluster de course_clusters se resuelve en su propio proceso con un
+    cromosoma que solo contiene sus asignaciones (y franjas de su turno). Los
+    resultados se unen en el cromosoma completo y una pasada de coordinación
+    concilia los recursos compartidos entre clusters: ScheduleRepair mueve los
+    bloques que chocan y un GA corto sobre el problema completo, sembrado con
+    la unión reparada, ajusta las penalizaciones que cruzan clusters (carga y
+    traslados de los profesores).
+
+    Solo la primera fase trabaja con cromosomas reducidos: la coordinación
+    recorre el cromosoma completo. Si los profesores habilitados conectan a
+    todos los cursos de un turno, los clusters son simplemente los turnos.
+    """
+
+    def __init__(self, generator, random_seed=None):
+        self.generator = generator
+        self.random_seed = random_seed
+        self.clusters = course_clusters(generator)
+
+    def _seed(self, index):
+        if self.random_seed is None:
+            return None
+        return self.random_seed + index
+
+    def genes(self, positions):
+        """Índices de los genes del cromosoma completo que corresponden a las posiciones"""
+        size = self.generator.assignment_size
+        return np.array([i * size + g for i in positions for g in range(size)], dtype=int)
+
+    def run(self, num_generations, sol_per_pop, coordination_generations=30, repair=False, seed_fraction=0.0,
+            on_generation=None, workers=None, on_progress=None):
+        """
+        workers: procesos para los clusters (por defecto os.cpu_count()); nunca más
+        que la cantidad de clusters.
+        on_progress: recibe un evento por cluster terminado (generation=0, con el
+        fitness y las penalizaciones de su sub-problema), de modo que el progreso
+        no queda en silencio hasta la coordinación.
+        """
+        generator = self.generator
+        jobs = []
+        subs = []
+        for index, positions in enumerate(self.clusters):
+            sub = generator.subproblem(positions)
+            seed = self._seed(index)
+            options = sub.ga_options(repair)
+            options['num_parents_mating'] = min(options['num_parents_mating'], sol_per_pop // 2)
+            subs.append(sub)
+            jobs.append((sub.vectorized, options, sub.initial_population(sol_per_pop, seed_fraction, seed),
+                         num_generations, seed, sub.ga_params['stop_criteria'], generator.deadline))
+        results = [None] * len(jobs)
+        with ProcessPoolExecutor(max_workers=min(len(jobs), workers or os.cpu_count() or 1)) as pool:
+            futures = {pool.submit(_solve_cluster, *job): index for index, job in enumerate(jobs)}
+            for future in as_completed(futures):
+                index = futures[future]
+                solution, solution_fitness = results[index] = future.result()
+                logger.debug("Cluster %s/%s | Best Fitness: %s", index + 1, len(jobs), solution_fitness)
+                if on_progress is not None:
+                    on_progress({
+                        'generation': 0,
+                        'best_fitness': solution_fitness,
+                        'mean_fitness': solution_fitness,
+                        'penalties': subs[index].vectorized.calculate_penalties(solution),
+                    })
+        merged = np.empty(generator.num_genes)
+        for positions, (solution, _) in zip(self.clusters, results):
+            merged[self.genes(positions)] = solution
+        # Coordinación: conciliar profesores y salones compartidos entre clusters
+        merged = ScheduleRepair(generator).repair(merged).astype(float)
+        seed = self._seed(len(self.clusters))
+        population = generator.initial_population(sol_per_pop, seed_fraction, seed)
+        population[0] = merged
+        return generator.run_ga(coordination_generations, sol_per_pop, random_seed=seed, repair=repair,
+                                initial_population=population, on_generation=on_generation)
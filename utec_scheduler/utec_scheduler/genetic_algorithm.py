@@ -1,28 +1,124 @@
 import pygad
 import numpy as np
-from scheduler.models import Room, Course, Subject, Teacher
+from scheduler.models import Schedule, GenerationCache
+from .vectorized_fitness import VectorizedFitness
+from .parallel_fitness import ParallelFitness
+from .island_model import IslandModel
+from .repair import ScheduleRepair
+from .seeding import GreedyConstructor
+from .reoptimize import Reoptimizer
+from .decomposition import Decomposition
+from .profiling import Profiler
+from .snapshot import ProblemSnapshot
+from .assignment import Assignment, minutes
+from .checkpoint import Checkpoint
+import copy
+import hashlib
+import json
+import logging
 import random
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
 
 class ScheduleGenerator:
-    def __init__(self, **validated_data):
+    WEIGHTS = {
+        'overlap': 20,            # Duplicado
+        'teacher_overlap': 20,    # Rechazado también por la base de datos
+        'course_overlap': 25,     # Duplicado
+        'hours': 15,              # Casi duplicado
+        'lab_usage': 10,          # Duplicado
+        'course_shift': 10,       # Más que duplicado
+        'duplicate': 5,           
+        'teacher_movement': 2,    
+        'teacher_preference': 2,  
+        'split_teacher': 2,      
+        'distribution': 1.5,       
+        'odd_hours': 0.15,         
+        'daily_hours': 1,        
+        'weekly_hours': 0.5,        
+    }
+    FITNESS_ENGINES = ('numpy', 'python')
+    # Hiperparámetros de PyGAD; se pueden sobrescribir en validated_data
+    GA_PARAMS = {
+        'num_generations': 200,              # Más generaciones para mejor exploración
+        'sol_per_pop': 150,                  # Población más grande
+        'num_parents_mating': 50,            # Aumentar padres para más diversidad
+        'mutation_percent_genes': 60,        # Mutación más agresiva
+        'mutation_type': 'random',
+        'crossover_type': 'two_points',      # Crossover más disruptivo
+        'parent_selection_type': 'tournament', # Selección más competitiva
+        'K_tournament': 5,                   # Tamaño del torneo
+        'keep_parents': 2,                   # Elitismo moderado
+        'stop_criteria': ['reach_100', 'saturate_50'], # Criterios de parada más flexibles
+    }
+    # Opciones de ejecución: se pasan a generate(), no forman parte del problema
+    RUN_OPTIONS = ('engine', 'workers', 'random_seed', 'islands', 'migration_interval', 'migrants',
+                   'repair', 'seed_fraction', 'decompose', 'time_budget', 'profile', 'checkpoint',
+                   'checkpoint_interval')
+    # Restricciones duras: un horario es factible cuando estas penalizaciones valen 0
+    HARD_PENALTIES = ('overlap', 'teacher_overlap', 'course_overlap')
+    SHIFT_HOURS = {
+        'MORNING': (8, 12),
+        'AFTERNOON': (14, 18),
+        'NIGHT': (19, 23)
+    }
+
+    def __init__(self, snapshot=None, **validated_data):
+        """
+        snapshot: ProblemSnapshot a usar; por defecto se carga de la base de datos
+        en una cantidad fija de consultas.
+        """
         self.validated_data = validated_data
-        self.courses = list(Course.objects.all())
-        self.subjects = list(Subject.objects.all())
-        self.teachers = list(Teacher.objects.all())
-        self.rooms = list(Room.objects.all())
+        self.ga_params = {name: validated_data.get(name, default) for name, default in self.GA_PARAMS.items()}
+        self.snapshot = snapshot if snapshot is not None else ProblemSnapshot.load()
+        self.courses = self.snapshot.courses
+        self.subjects = self.snapshot.subjects
+        self.teachers = self.snapshot.teachers
+        self.rooms = self.snapshot.rooms
         self.DAYS = ['MON', 'TUE', 'WED', 'THU', 'FRI']
         self.TIME_SLOTS = ['08:00', '10:00', '14:00', '16:00', '19:00', '21:00']
-        self.assignment_size = 7  # course, subject, teacher, room, day, start_time, slot_hours
+        # Solo los genes variables: course, subject y slot_hours son fijos por asignación
+        # y se reconstruyen al decodificar a partir de self.assignments
+        self.assignment_size = 4  # teacher, room, day, start_time
+        # Modelo de restricciones en memoria: el loop del GA no consulta la base de datos
+        self.slot_index = {t: i for i, t in enumerate(self.TIME_SLOTS)}
+        self.slot_starts = [minutes(t) for t in self.TIME_SLOTS]
+        self.slot_at_minute = {start: i for i, start in enumerate(self.slot_starts)}
+        self.course_shifts = dict(zip(self.snapshot.course_positions, self.snapshot.course_shift))
+        self.allowed_slots = self._build_allowed_slots()
         self.assignments = self._build_assignment_list()
         self.num_assignments = len(self.assignments)
         self.num_genes = self.num_assignments * self.assignment_size
+        # Tablas de costo estático: penalizaciones que dependen de un solo gen
+        self.room_cost = self._build_room_cost()
+        self.teacher_slot_cost = self._build_teacher_slot_cost()
+        self.course_slot_cost = self._build_course_slot_cost()
+        self.prune_gene_space = validated_data.get('prune_gene_space', False)
         self.gene_space = self._build_gene_space()
+        self.vectorized = VectorizedFitness(self)
+        self.on_progress = None
+        self.feasibility = None
+        self.deadline = None
+        self.profiler = None
+        self.checkpoint_path = None
+        self.checkpoint_interval = None
+        self.fingerprint_key = None
+
+    def _build_allowed_slots(self):
+        """Máscara por curso de las franjas que caen dentro de su turno"""
+        allowed_slots = {}
+        for course_id, shift in self.course_shifts.items():
+            start, end = self.SHIFT_HOURS[shift]
+            allowed_slots[course_id] = [start <= int(t.split(':')[0]) < end for t in self.TIME_SLOTS]
+        return allowed_slots
 
     def _build_assignment_list(self):
         assignments = []
         for course in self.courses:
-            course_subjects = list(Subject.objects.filter(course=course))
-            for subject in course_subjects:
+            for subject in self.snapshot.course_subjects[course.id]:
                 hours = subject.hours_per_week
                 blocks = []
                 # Preferir bloques de 3h, el resto de 2h
@@ -37,123 +133,155 @@ class ScheduleGenerator:
                     assignments.append((course, subject, slot_hours))
         return assignments
 
+    def _build_room_cost(self):
+        """Costo de lab_usage por (asignación, salón)"""
+        is_lab = self.snapshot.room_is_lab
+        room_cost = np.zeros((self.num_assignments, len(self.rooms)), dtype=np.int64)
+        for i, (course, subject, slot_hours) in enumerate(self.assignments):
+            room_cost[i] = np.where(is_lab, 0 if subject.requires_lab else 5, 10 if subject.requires_lab else 0)
+        return room_cost
+
+    def _build_teacher_slot_cost(self):
+        """Costo de teacher_preference por (profesor, franja)"""
+        hours = np.array([int(t.split(':')[0]) for t in self.TIME_SLOTS])
+        late = np.where(hours >= 21, 5, np.where(hours >= 19, 3, 0))
+        from_montevideo = self.snapshot.teacher_from_montevideo
+        return np.outer(from_montevideo, late).astype(np.int64).reshape(len(self.teachers), len(self.TIME_SLOTS))
+
+    def _build_course_slot_cost(self):
+        """Costo de course_shift por (curso, franja)"""
+        allowed = np.array([self.allowed_slots[c.id] for c in self.courses], dtype=bool)
+        return np.where(allowed, 0, 5).reshape(len(self.courses), len(self.TIME_SLOTS))
+
     def _build_gene_space(self):
         gene_space = []
-        for course, subject, slot_hours in self.assignments:
-            # course_id
-            gene_space.append({'low': course.id, 'high': course.id})
-            # subject_id
-            gene_space.append({'low': subject.id, 'high': subject.id})
+        course_positions = self.snapshot.course_positions
+        for i, (course, subject, slot_hours) in enumerate(self.assignments):
             # teacher_id (solo los que pueden dictar la materia)
-            valid_teachers = list(Teacher.objects.filter(subjects=subject))
-            teacher_ids = [t.id for t in valid_teachers] if valid_teachers else [self.teachers[0].id]
+            teacher_ids = list(self.snapshot.subject_teachers[subject.id]) or [self.teachers[0].id]
             gene_space.append(teacher_ids)
-            # room_id (todas las posibles)
+            # room_id (todas las posibles, o solo las de menor costo de laboratorio)
             room_ids = [r.id for r in self.rooms]
+            if self.prune_gene_space:
+                room_ids = [r.id for r, cost in zip(self.rooms, self.room_cost[i]) if cost == self.room_cost[i].min()]
             gene_space.append(room_ids)
             # day
             gene_space.append(list(range(len(self.DAYS))))
-            # start_time
-            gene_space.append(list(range(len(self.TIME_SLOTS))))
-            # slot_hours (fijo para este bloque)
-            gene_space.append([slot_hours])
+            # start_time (todas, o solo las del turno del curso si existen)
+            slots = list(range(len(self.TIME_SLOTS)))
+            if self.prune_gene_space:
+                in_shift = [t for t in slots if self.course_slot_cost[course_positions[course.id], t] == 0]
+                slots = in_shift or slots
+            gene_space.append(slots)
         return gene_space
 
+    def subproblem(self, positions):
+        """
+        Generador restringido a las asignaciones en `positions` (un cluster).
+        Las franjas se limitan a las del turno de cada curso, si existen.
+        """
+        size = self.assignment_size
+        course_positions = self.snapshot.course_positions
+        sub = copy.copy(self)
+        sub.assignments = [self.assignments[i] for i in positions]
+        sub.num_assignments = len(positions)
+        sub.num_genes = sub.num_assignments * size
+        sub.room_cost = self.room_cost[positions]
+        sub.gene_space = []
+        for i in positions:
+            teachers, rooms, days, slots = self.gene_space[i * size:(i + 1) * size]
+            course = self.assignments[i][0]
+            in_shift = [t for t in slots if self.course_slot_cost[course_positions[course.id], t] == 0]
+            sub.gene_space.extend([teachers, rooms, days, in_shift or slots])
+        # Sin los métodos instrumentados por Profiler: quedan ligados al generador completo
+        for name in ('decode', 'penalty_functions'):
+            vars(sub).pop(name, None)
+        sub.vectorized = VectorizedFitness(sub)
+        sub.profiler = None
+        sub.on_progress = None
+        sub.feasibility = None
+        return sub
+
+    def decode(self, solution):
+        """Cromosoma -> lista de Assignment (enteros, sin formatear)"""
+        size = self.assignment_size
+        return [self._decode_assignment(i, solution[i * size:(i + 1) * size]) for i in range(self.num_assignments)]
+
     def _decode_solution(self, solution):
-        assignments = []
-        for i in range(self.num_assignments):
-            idx = i * self.assignment_size
-            course_id = int(solution[idx])
-            subject_id = int(solution[idx+1])
-            teacher_id = int(solution[idx+2])
-            room_id = int(solution[idx+3])
-            day_idx = int(solution[idx+4])
-            time_idx = int(solution[idx+5])
-            slot_hours = int(solution[idx+6])
-            day = self.DAYS[day_idx]
-            start_time = self.TIME_SLOTS[time_idx]
-            duration = slot_hours * 60
-            start_hour, start_minute = map(int, start_time.split(':'))
-            end_hour = start_hour + (duration // 60)
-            end_minute = start_minute + (duration % 60)
-            if end_minute >= 60:
-                end_hour += 1
-                end_minute -= 60
-            # Limitar end_time a un máximo de 23:00:00
-            if end_hour > 23 or (end_hour == 23 and end_minute > 0):
-                end_hour = 23
-                end_minute = 0
-            end_time = f"{end_hour:02d}:{end_minute:02d}:00"
-            assignments.append({
-                'course_id': course_id,
-                'subject_id': subject_id,
-                'teacher_id': teacher_id,
-                'room_id': room_id,
-                'day': day,
-                'start_time': start_time,
-                'slot_hours': slot_hours,
-                'duration': duration,
-                'end_time': end_time
-            })
-        return assignments
+        """Cromosoma -> asignaciones en el formato de la API (dicts con day y horas como texto)"""
+        return [assignment.as_dict(self.DAYS) for assignment in self.decode(solution)]
+
+    def _decode_assignment(self, position, genes):
+        """Reconstruye la asignación completa: genes variables más los datos fijos de la posición"""
+        course, subject, slot_hours = self.assignments[position]
+        return Assignment(course.id, subject.id, int(genes[0]), int(genes[1]), int(genes[2]),
+                          self.slot_starts[int(genes[3])], slot_hours * 60, slot_hours=slot_hours)
 
     def fitness_func(self, ga_instance, solution, solution_idx):
-        assignments = self._decode_solution(solution)
+        assignments = self.decode(solution)
+        penalties = self.calculate_penalties(assignments)
+        return -self.total_penalty(penalties)  # PyGAD maximiza
+
+    def calculate_penalties(self, assignments):
+        """Calcula las penalizaciones de una lista de Assignment"""
+        return {name: func(assignments) for name, func in self.penalty_functions().items()}
+
+    def penalty_functions(self):
+        """Función de cada penalización (recibe una lista de asignaciones), en el orden de la suma ponderada"""
         subjects_dict = {s.id: s for s in self.subjects}
         teachers_dict = {t.id: t for t in self.teachers}
         rooms_dict = {r.id: r for r in self.rooms}
-        penalties = {
-            'overlap': self.calculate_overlap_penalty(assignments),
-            'teacher_movement': self.calculate_teacher_movement_penalty(assignments, teachers_dict),
-            'lab_usage': self.calculate_lab_usage_penalty(assignments, subjects_dict, rooms_dict),
-            'teacher_preference': self.calculate_teacher_preference_penalty(assignments, teachers_dict),
-            'course_shift': self.calculate_course_shift_penalty(assignments),
-            'hours': self.calculate_hours_penalty(assignments, subjects_dict),
-            'duplicate': self.calculate_duplicate_penalty(assignments),
-            'distribution': self.calculate_distribution_penalty(assignments),
-            'split_teacher': self.calculate_split_teacher_penalty(assignments),
-            'odd_hours': self.calculate_odd_hours_penalty(assignments, subjects_dict),
-            'course_overlap': self.calculate_course_overlap_penalty(assignments),
-            'daily_hours': self.calculate_daily_hours_penalty(assignments),
-            'weekly_hours': self.calculate_weekly_hours_penalty(assignments),
-        }
-        weights = {
-            'overlap': 20,            # Duplicado
-            'course_overlap': 25,     # Duplicado
-            'hours': 15,              # Casi duplicado
-            'lab_usage': 10,          # Duplicado
-            'course_shift': 10,       # Más que duplicado
-            'duplicate': 5,           
-            'teacher_movement': 2,    
-            'teacher_preference': 2,  
-            'split_teacher': 2,      
-            'distribution': 1.5,       
-            'odd_hours': 0.15,         
-            'daily_hours': 1,        
-            'weekly_hours': 0.5,        
+        return {
+            'overlap': self.calculate_overlap_penalty,
+            'teacher_overlap': self.calculate_teacher_overlap_penalty,
+            'teacher_movement': lambda a: self.calculate_teacher_movement_penalty(a, teachers_dict),
+            'lab_usage': lambda a: self.calculate_lab_usage_penalty(a, subjects_dict, rooms_dict),
+            'teacher_preference': lambda a: self.calculate_teacher_preference_penalty(a, teachers_dict),
+            'course_shift': self.calculate_course_shift_penalty,
+            'hours': lambda a: self.calculate_hours_penalty(a, subjects_dict),
+            'duplicate': self.calculate_duplicate_penalty,
+            'distribution': self.calculate_distribution_penalty,
+            'split_teacher': self.calculate_split_teacher_penalty,
+            'odd_hours': lambda a: self.calculate_odd_hours_penalty(a, subjects_dict),
+            'course_overlap': self.calculate_course_overlap_penalty,
+            'daily_hours': self.calculate_daily_hours_penalty,
+            'weekly_hours': self.calculate_weekly_hours_penalty,
         }
-        total_penalty = sum(penalties[k] * weights[k] for k in penalties)
-        return -total_penalty  # PyGAD maximiza
 
-    def calculate_overlap_penalty(self, assignments):
-        """Calcula penalización por solapamientos"""
+    def total_penalty(self, penalties):
+        """Suma ponderada de las penalizaciones (mismo orden en todos los motores)"""
+        return sum(penalties[k] * self.WEIGHTS[k] for k in penalties)
+
+    def _range_overlap_penalty(self, assignments, key):
+        """Penaliza cada par de bloques del mismo `key` y día cuyos rangos horarios se superponen"""
         penalty = 0
-        schedule = {}
+        slots = {}
         for assignment in assignments:
-            key = (assignment['room_id'], assignment['day'], assignment['start_time'])
-            if key in schedule:
-                penalty += 10  # Penalización alta por solapamiento
-            schedule[key] = assignment
+            start_hour = assignment.start_hour
+            end_hour = start_hour + assignment.duration // 60
+            group = slots.setdefault((getattr(assignment, key), assignment.day), [])
+            for other_start, other_end in group:
+                if not (end_hour <= other_start or start_hour >= other_end):
+                    penalty += 10  # Penalización fuerte por solapamiento
+            group.append((start_hour, end_hour))
         return penalty
 
+    def calculate_overlap_penalty(self, assignments):
+        """Calcula penalización por solapamientos de salón (mismo criterio que la restricción de la base de datos)"""
+        return self._range_overlap_penalty(assignments, 'room_id')
+
+    def calculate_teacher_overlap_penalty(self, assignments):
+        """Penaliza si un profesor tiene dos bloques superpuestos el mismo día"""
+        return self._range_overlap_penalty(assignments, 'teacher_id')
+
     def calculate_teacher_movement_penalty(self, assignments, teachers_dict):
         """Calcula penalización por movimiento de profesores"""
         penalty = 0
         teacher_assignments = {}
         for assignment in assignments:
-            teacher_id = assignment['teacher_id']
-            day = assignment['day']
-            time = assignment['start_time']
+            teacher_id = assignment.teacher_id
+            day = assignment.day
+            time = assignment.start_hour
             if teacher_id not in teacher_assignments:
                 teacher_assignments[teacher_id] = {}
             if day not in teacher_assignments[teacher_id]:
@@ -161,7 +289,7 @@ class ScheduleGenerator:
             # Penalizar si el profesor tiene clases muy separadas
             if teacher_assignments[teacher_id][day]:
                 last_time = teacher_assignments[teacher_id][day][-1]
-                time_diff = abs(int(time.split(':')[0]) - int(last_time.split(':')[0]))
+                time_diff = abs(time - last_time)
                 if time_diff > 2:  # Más de 2 horas entre clases
                     penalty += 10 * time_diff
             teacher_assignments[teacher_id][day].append(time)
@@ -171,8 +299,8 @@ class ScheduleGenerator:
         """Verifica uso correcto de laboratorios"""
         penalty = 0
         for assignment in assignments:
-            subject = subjects_dict[assignment['subject_id']]
-            room = rooms_dict[assignment['room_id']]
+            subject = subjects_dict[assignment.subject_id]
+            room = rooms_dict[assignment.room_id]
             if subject.requires_lab and room.room_type not in ['COMP', 'LOG']:
                 penalty += 10
             if not subject.requires_lab and room.room_type in ['COMP', 'LOG']:
@@ -183,8 +311,8 @@ class ScheduleGenerator:
         """Penalización más estricta para profesores de Montevideo"""
         penalty = 0
         for assignment in assignments:
-            teacher = teachers_dict[assignment['teacher_id']]
-            hour = int(assignment['start_time'].split(':')[0])
+            teacher = teachers_dict[assignment.teacher_id]
+            hour = assignment.start_hour
             if teacher.from_montevideo:
                 if hour >= 21:
                     penalty += 5  # Penalización muy alta para horarios nocturnos
@@ -193,27 +321,28 @@ class ScheduleGenerator:
         return penalty
 
     def calculate_course_shift_penalty(self, assignments):
+        """Penaliza bloques fuera del turno del curso (usa el modelo en memoria, sin consultas)"""
         penalty = 0
-        shift_hours = {
-            'MORNING': (8, 12),
-            'AFTERNOON': (14, 18),
-            'NIGHT': (19, 23)
-        }
         for assignment in assignments:
-            course = Course.objects.get(id=assignment['course_id'])
-            hour = int(assignment['start_time'].split(':')[0])
-            start, end = shift_hours[course.shift]
-            if not (start <= hour < end):
+            if not self._in_shift(assignment.course_id, assignment.start):
                 penalty += 5  # Penalización más fuerte por bloque fuera de turno
         return penalty
 
+    def _in_shift(self, course_id, start):
+        """Si el inicio (minutos) cae en el turno del curso (también para horas fuera de TIME_SLOTS)"""
+        slot = self.slot_at_minute.get(start)
+        if slot is not None:
+            return self.allowed_slots[course_id][slot]
+        shift_start, shift_end = self.SHIFT_HOURS[self.course_shifts[course_id]]
+        return shift_start <= start // 60 < shift_end
+
     def calculate_hours_penalty(self, assignments, subjects_dict):
         """Penaliza cuando una materia no cumple sus horas semanales requeridas"""
         penalty = 0
         subject_hours = {}
         # Count assigned hours per subject
         for assignment in assignments:
-            subject_id = assignment['subject_id']
+            subject_id = assignment.subject_id
             if subject_id not in subject_hours:
                 subject_hours[subject_id] = 0
             subject_hours[subject_id] += 2
@@ -229,10 +358,7 @@ class ScheduleGenerator:
         penalty = 0
         subject_slots = {}
         for assignment in assignments:
-            subject_id = assignment['subject_id']
-            day = assignment['day']
-            time = assignment['start_time']
-            key = (subject_id, day, time)
+            key = (assignment.subject_id, assignment.day, assignment.start)
             if key in subject_slots:
                 penalty += 2  # Penalización muy alta por duplicados
             subject_slots[key] = True
@@ -244,8 +370,8 @@ class ScheduleGenerator:
         subject_days = {}
         subject_hours_per_day = {}
         for assignment in assignments:
-            subject_id = assignment['subject_id']
-            day = assignment['day']
+            subject_id = assignment.subject_id
+            day = assignment.day
             # Contabilizar horas por día para cada materia
             key = (subject_id, day)
             if key not in subject_hours_per_day:
@@ -258,9 +384,8 @@ class ScheduleGenerator:
                 subject_days[subject_id] = set()
             subject_days[subject_id].add(day)
         # Penalizar concentración de clases
-        day_order = {'MON': 0, 'TUE': 1, 'WED': 2, 'THU': 3, 'FRI': 4}
         for days in subject_days.values():
-            days_list = sorted([day_order[day] for day in days])
+            days_list = sorted(days)
             # Penalización más suave para días consecutivos
             for i in range(len(days_list) - 1):
                 if days_list[i + 1] - days_list[i] == 1:
@@ -272,8 +397,8 @@ class ScheduleGenerator:
         penalty = 0
         subject_teachers = {}
         for assignment in assignments:
-            subject_id = assignment['subject_id']
-            teacher_id = assignment['teacher_id']
+            subject_id = assignment.subject_id
+            teacher_id = assignment.teacher_id
             if subject_id not in subject_teachers:
                 subject_teachers[subject_id] = set()
             subject_teachers[subject_id].add(teacher_id)
@@ -288,9 +413,7 @@ class ScheduleGenerator:
         subject_hours_per_day = {}
         # Agrupar horas por materia y día
         for assignment in assignments:
-            subject_id = assignment['subject_id']
-            day = assignment['day']
-            key = (subject_id, day)
+            key = (assignment.subject_id, assignment.day)
             if key not in subject_hours_per_day:
                 subject_hours_per_day[key] = 0
             subject_hours_per_day[key] += 2
@@ -317,42 +440,17 @@ class ScheduleGenerator:
 
     def calculate_course_overlap_penalty(self, assignments):
         """Penaliza si dos materias del mismo curso se superponen en el mismo horario (aunque en diferentes salas)"""
-        penalty = 0
-        course_slots = {}
-        for assignment in assignments:
-            course_id = assignment['course_id']
-            day = assignment['day']
-            start = assignment['start_time']
-            duration = assignment['duration']
-            # Calcula el rango de tiempo ocupado
-            start_hour, start_minute = map(int, start.split(':'))
-            end_hour = start_hour + (duration // 60)
-            end_minute = start_minute + (duration % 60)
-            if end_minute >= 60:
-                end_hour += 1
-                end_minute -= 60
-            slot = (day, start_hour, end_hour)
-            if course_id not in course_slots:
-                course_slots[course_id] = []
-            # Verifica solapamiento con otros bloques del mismo curso
-            for other in course_slots[course_id]:
-                other_day, other_start, other_end = other
-                if day == other_day and not (end_hour <= other_start or start_hour >= other_end):
-                    penalty += 10  # Penalización fuerte por solapamiento
-            course_slots[course_id].append((day, start_hour, end_hour))
-        return penalty
+        return self._range_overlap_penalty(assignments, 'course_id')
 
     def calculate_daily_hours_penalty(self, assignments):
         """Penaliza si la suma de horas por día por curso es mayor a 4."""
         penalty = 0
         daily_hours = {}
         for assignment in assignments:
-            course_id = assignment['course_id']
-            day = assignment['day']
-            key = (course_id, day)
+            key = (assignment.course_id, assignment.day)
             if key not in daily_hours:
                 daily_hours[key] = 0
-            daily_hours[key] += assignment['slot_hours']
+            daily_hours[key] += assignment.slot_hours
         for key, hours in daily_hours.items():
             if hours > 4:
                 penalty += 5 * (hours - 4)  # Penalización fuerte por cada hora extra
@@ -363,41 +461,417 @@ class ScheduleGenerator:
         penalty = 0
         weekly_hours = {}
         for assignment in assignments:
-            course_id = assignment['course_id']
+            course_id = assignment.course_id
             if course_id not in weekly_hours:
                 weekly_hours[course_id] = 0
-            weekly_hours[course_id] += assignment['slot_hours']
+            weekly_hours[course_id] += assignment.slot_hours
         for course_id, hours in weekly_hours.items():
             if hours > 20:
                 penalty += 10 * (hours - 20)  # Penalización más suave por cada hora extra
         return penalty
 
-    def log_generation(self, ga_instance):
-        print(f"Generation {ga_instance.generations_completed} | Best Fitness: {ga_instance.best_solution()[1]}")
+    def progress_event(self, generation, population, fitness):
+        """Resumen de una generación a partir del fitness ya calculado (sin reevaluar la población)"""
+        fitness = np.asarray(fitness, dtype=float)
+        best = int(np.argmax(fitness))
+        return {
+            'generation': generation,
+            'best_fitness': float(fitness[best]),
+            'mean_fitness': float(fitness.mean()),
+            'penalties': self.vectorized.calculate_penalties(population[best]),
+        }
+
+    def log_generation(self, ga_instance, population=None):
+        """
+        Callback on_generation de PyGAD: progreso, perfil, checkpoints y time_budget.
+        population: cromosomas completos si los de ga_instance son parciales (reoptimize).
+        """
+        fitness = ga_instance.last_generation_fitness
+        logger.debug("Generation %s | Best Fitness: %s", ga_instance.generations_completed, np.max(fitness))
+        population = ga_instance.population if population is None else population
+        self.record_progress(self.progress_event(ga_instance.generations_completed, population, fitness))
+        if self.profiler is not None:
+            self.profiler.tick('generation')
+        if self.deadline_reached():
+            self.save_checkpoint(ga_instance)
+            return "stop"
+        if self.checkpoint_interval and ga_instance.generations_completed % self.checkpoint_interval == 0:
+            self.save_checkpoint(ga_instance)
+
+    def save_checkpoint(self, ga_instance):
+        """Guarda el estado de ga_instance en checkpoint_path (si se pidió en generate())"""
+        if self.checkpoint_path is not None:
+            Checkpoint.capture(self.fingerprint_key, ga_instance, self.feasibility).save(self.checkpoint_path)
+
+    def deadline_reached(self):
+        """True si se agotó el tiempo de generate(time_budget=...)"""
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def record_progress(self, event):
+        """Registra la primera generación sin violaciones duras y reenvía el evento a on_progress"""
+        if self.feasibility is None and not any(event['penalties'][k] for k in self.HARD_PENALTIES):
+            self.feasibility = {
+                'generation': event['generation'],
+                'seconds': round(time.perf_counter() - self._started, 3),
+            }
+            logger.debug("Factible en la generación %s (%s s)", event['generation'], self.feasibility['seconds'])
+        if self.on_progress is not None:
+            self.on_progress(event)
 
-    def generate(self):
-        ga_instance = pygad.GA(
-            num_generations=200,            # Más generaciones para mejor exploración
-            num_parents_mating=50,         # Aumentar padres para más diversidad
-            fitness_func=self.fitness_func,
-            sol_per_pop=150,               # Población más grande
+    def batch_fitness_func(self, ga_instance, solutions, solutions_indices):
+        """Versión por lotes del motor de referencia (una llamada por población)"""
+        return [self.fitness_func(ga_instance, solution, idx)
+                for solution, idx in zip(solutions, solutions_indices)]
+
+    def _select_fitness_func(self, engine, batch=False):
+        if engine not in self.FITNESS_ENGINES:
+            raise ValueError(f"Motor de fitness desconocido: {engine}")
+        if engine == 'python':
+            return self.batch_fitness_func if batch else self.fitness_func
+        return self.vectorized.batch_fitness_func if batch else self.vectorized.fitness_func
+
+    def random_population(self, size, seed=None):
+        """Población aleatoria (size, num_genes) tomada del gene_space"""
+        rng = np.random.default_rng(seed)
+        population = np.empty((size, self.num_genes))
+        for gene, space in enumerate(self.gene_space):
+            population[:, gene] = rng.choice(space, size)
+        return population
+
+    def initial_population(self, size, seed_fraction=0.0, seed=None):
+        """Población inicial: una fracción construida con GreedyConstructor y el resto aleatoria"""
+        population = self.random_population(size, seed=seed)
+        seeded = int(round(size * seed_fraction))
+        if seeded:
+            rng = np.random.default_rng(seed)
+            constructor = GreedyConstructor(self)
+            population[:seeded] = [constructor.construct(rng) for _ in range(seeded)]
+        return population
+
+    def ga_options(self, repair=False):
+        """Parámetros de PyGAD comunes a todos los modos de ejecución"""
+        options = dict(
+            num_parents_mating=self.ga_params['num_parents_mating'],
             num_genes=self.num_genes,
             gene_space=self.gene_space,
-            mutation_percent_genes=60,      # Mutación más agresiva
-            mutation_type="random",
-            crossover_type="two_points",   # Crossover más disruptivo
-            init_range_low=0,              # Rango inicial más amplio
-            init_range_high=100,
-            parent_selection_type="tournament", # Selección más competitiva
-            K_tournament=5,                # Tamaño del torneo
-            keep_parents=2,                # Elitismo moderado
-            stop_criteria=["reach_100", "saturate_50"], # Criterios de parada más flexibles
-            on_generation=self.log_generation
+            mutation_percent_genes=self.ga_params['mutation_percent_genes'],
+            mutation_type=self.ga_params['mutation_type'],
+            crossover_type=self.ga_params['crossover_type'],
+            parent_selection_type=self.ga_params['parent_selection_type'],
+            K_tournament=self.ga_params['K_tournament'],
+            keep_parents=self.ga_params['keep_parents'],
+        )
+        if repair:
+            # GA memético: cada descendiente pasa por la reparación local
+            options['on_mutation'] = ScheduleRepair(self).on_mutation
+        return options
+
+    def generate(self, engine='numpy', batch=True, workers=1, random_seed=None,
+                 islands=1, migration_interval=10, migrants=2, on_progress=None, repair=False,
+                 seed_fraction=0.0, decompose=False, cache=True, time_budget=None, profile=False,
+                 profile_path=None, checkpoint_dir=None, checkpoint_interval=10):
+        """
+        Ejecuta el algoritmo genético.
+        engine: 'numpy' (vectorizado) o 'python' (implementación de referencia).
+        Ambos motores asignan exactamente el mismo fitness.
+        batch: evalúa toda la población en una sola llamada por generación.
+        workers: procesos para evaluar la población (solo con engine='numpy'); con
+        decompose, procesos para los clusters (por defecto, uno por CPU).
+        random_seed: semilla de PyGAD para reproducir una ejecución.
+        islands: si es mayor a 1, ejecuta el modelo de islas (una población por
+        proceso) intercambiando `migrants` élites cada `migration_interval` generaciones.
+        on_progress: callable que recibe por generación un dict con generation,
+        best_fitness, mean_fitness y el desglose de penalizaciones del mejor.
+        repair: aplica ScheduleRepair a los descendientes (GA memético).
+        seed_fraction: fracción de la población inicial construida con el
+        constructor greedy (0 = población totalmente aleatoria).
+        decompose: resuelve por separado los clusters de cursos (mismo turno y
+        profesores o salones escasos compartidos, ver course_clusters) en paralelo
+        y luego concilia la unión (ver Decomposition).
+        cache: guarda en GenerationCache el mejor cromosoma de la entrada (élite) y,
+        con random_seed fija, el resultado de esa semilla y time_budget. Repetir
+        la misma semilla y presupuesto devuelve ese resultado sin ejecutar el GA
+        (salvo que haya un checkpoint que retomar); sin semilla, la élite arranca
+        en caliente la ejecución de una sola población.
+        time_budget: segundos de reloj; al vencer, el GA se detiene y devuelve el
+        mejor individuo encontrado hasta ese momento.
+        Los hiperparámetros de PyGAD se toman de self.ga_params (GA_PARAMS).
+        profile: mide tiempo y llamadas por penalización, decodificación, operador
+        de PyGAD y generación, y las consultas al ORM (ver Profiler). El informe se
+        agrega al resultado como `profile` y, si se indica, se escribe en profile_path.
+        checkpoint_dir: guarda cada checkpoint_interval generaciones (y al vencer
+        time_budget) un Checkpoint en checkpoint_dir/generation-<fingerprint>.npz.
+        Si ya existe uno para la misma entrada, la ejecución continúa desde esa
+        generación (`resumed_from` en el resultado); al terminar se borra. Solo
+        para la ejecución de una sola población.
+        El resultado incluye `feasibility`: generación y segundos hasta el primer
+        mejor individuo sin choques de salón, profesor ni curso (None si no se alcanzó).
+        Si el mejor individuo final todavía tiene choques, se repara antes de
+        devolverlo (`repaired` en el resultado, ver repair_best()).
+        """
+        self.on_progress = on_progress
+        self.feasibility = None
+        self._started = time.perf_counter()
+        self.deadline = time.time() + time_budget if time_budget else None
+        num_generations = self.ga_params['num_generations']
+        sol_per_pop = self.ga_params['sol_per_pop']
+        if engine != 'numpy' and (islands > 1 or decompose):
+            raise ValueError("El modelo de islas y la descomposición requieren engine='numpy'")
+        if checkpoint_dir is not None and (islands > 1 or decompose):
+            raise ValueError("Los checkpoints solo se admiten en la ejecución de una sola población")
+        self.checkpoint_path = None
+        self.checkpoint_interval = checkpoint_interval if checkpoint_dir is not None else None
+        self.profiler = Profiler() if profile else None
+        if self.profiler is None:
+            return self._generate(engine, batch, workers, random_seed, islands, migration_interval, migrants,
+                                  repair, seed_fraction, decompose, cache, num_generations, sol_per_pop,
+                                  checkpoint_dir, time_budget)
+        # El motor instrumentado no se puede enviar a otros procesos
+        self.profiler.instrument(self, vectorized=workers == 1 and islands == 1 and not decompose)
+        try:
+            with self.profiler.count_queries():
+                result = self._generate(engine, batch, workers, random_seed, islands, migration_interval,
+                                        migrants, repair, seed_fraction, decompose, cache, num_generations,
+                                        sol_per_pop, checkpoint_dir, time_budget)
+        finally:
+            self.profiler.restore()
+        result['profile'] = self.profiler.report()
+        if profile_path:
+            self.profiler.write(profile_path)
+        return result
+
+    def _generate(self, engine, batch, workers, random_seed, islands, migration_interval, migrants,
+                  repair, seed_fraction, decompose, cache, num_generations, sol_per_pop, checkpoint_dir,
+                  time_budget):
+        search = dict(islands=islands, migration_interval=migration_interval, migrants=migrants,
+                      repair=repair, seed_fraction=seed_fraction, decompose=decompose)
+        self.fingerprint_key = self.fingerprint(**search)
+        key = run_key = cached = resume = None
+        if checkpoint_dir is not None:
+            self.checkpoint_path = Path(checkpoint_dir) / f'generation-{self.fingerprint_key}.npz'
+            resume = Checkpoint.load(self.checkpoint_path)
+            if resume is not None and (resume.fingerprint != self.fingerprint_key
+                                       or resume.generation >= num_generations):
+                resume = None
+        if cache:
+            # Dos entradas: la élite de la entrada (fingerprint_key, solo para arrancar en
+            # caliente) y el resultado exacto de cada semilla y presupuesto (run_key)
+            key = self.fingerprint_key
+            if random_seed is None:
+                cached = GenerationCache.objects.filter(fingerprint=key).first()
+            else:
+                run_key = self.fingerprint(**search, random_seed=random_seed, time_budget=time_budget)
+                stored = GenerationCache.objects.filter(fingerprint=run_key).first()
+                if stored is not None and resume is None:
+                    # Misma entrada, semilla y presupuesto: se devuelve el resultado de esa ejecución
+                    return {
+                        'assignments': self._decode_solution(stored.solution),
+                        'fitness': stored.fitness,
+                        'feasibility': stored.feasibility,
+                        'cached': True,
+                        'resumed_from': None,
+                        'repaired': False,
+                    }
+        if islands > 1:
+            solution, solution_fitness = IslandModel(
+                self, islands, migration_interval, migrants, random_seed
+            ).run(num_generations, sol_per_pop, saturate=self.saturate_generations(),
+                  reach=self.reach_fitness(), on_progress=self.record_progress,
+                  repair=repair, seed_fraction=seed_fraction, deadline=self.deadline)
+        elif decompose:
+            solution, solution_fitness = Decomposition(self, random_seed).run(
+                num_generations, sol_per_pop, repair=repair, seed_fraction=seed_fraction,
+                on_generation=self.log_generation, workers=workers if workers > 1 else None,
+                on_progress=self.on_progress,
+            )
+        elif resume is not None:
+            # Continúa desde el checkpoint: misma población, generación y estado aleatorio
+            self.feasibility = resume.feasibility
+            solution, solution_fitness = self.run_ga(
+                num_generations - resume.generation, sol_per_pop, engine=engine, batch=batch,
+                workers=workers, random_seed=random_seed, repair=repair,
+                initial_population=resume.population, on_generation=self.log_generation, resume=resume,
+            )
+            self.close_checkpoint()
+        else:
+            population = None
+            if seed_fraction or cached is not None:
+                population = self.initial_population(sol_per_pop, seed_fraction, random_seed)
+            if cached is not None:
+                # Arranque en caliente: la élite guardada entra en la población inicial
+                population[0] = cached.solution
+            solution, solution_fitness = self.run_ga(
+                num_generations, sol_per_pop, engine=engine, batch=batch, workers=workers,
+                random_seed=random_seed, repair=repair, initial_population=population,
+                on_generation=self.log_generation,
+            )
+            self.close_checkpoint()
+        solution, solution_fitness, repaired = self.repair_best(solution, float(solution_fitness))
+        if key is not None:
+            stored = {
+                'solution': [int(gene) for gene in solution],
+                'fitness': solution_fitness,
+                'feasibility': self.feasibility,
+            }
+            elite = cached or GenerationCache.objects.filter(fingerprint=key).first()
+            if elite is None or solution_fitness > elite.fitness:
+                GenerationCache.objects.update_or_create(fingerprint=key, defaults=stored)
+            if run_key is not None:
+                GenerationCache.objects.update_or_create(fingerprint=run_key, defaults=stored)
+        return {
+            'assignments': self._decode_solution(solution),
+            'fitness': solution_fitness,
+            'feasibility': self.feasibility,
+            'cached': False,
+            'resumed_from': resume.generation if resume is not None else None,
+            'repaired': repaired,
+        }
+
+    def hard_violations(self, penalties):
+        return sum(penalties[name] for name in self.HARD_PENALTIES)
+
+    def repair_best(self, solution, solution_fitness, positions=None):
+        """
+        Pasa el mejor individuo por ScheduleRepair si todavía tiene choques de salón,
+        profesor o curso. En PostgreSQL las restricciones de exclusión rechazarían el
+        horario completo, así que se prefiere la versión reparada aunque pierda
+        fitness en las restricciones blandas. Con positions solo se mueven esos
+        bloques (reoptimize()). Devuelve (cromosoma, fitness, reparado).
+        """
+        violations = self.hard_violations(self.vectorized.calculate_penalties(solution))
+        if not violations:
+            return solution, solution_fitness, False
+        repaired = ScheduleRepair(self).repair(solution, positions).astype(float)
+        penalties = self.vectorized.calculate_penalties(repaired)
+        if self.hard_violations(penalties) >= violations:
+            return solution, solution_fitness, False
+        return repaired, -float(self.vectorized.total_penalty(penalties)), True
+
+    def close_checkpoint(self):
+        """
+        Fin de una ejecución con checkpoints: si terminó, el checkpoint ya no hace
+        falta; si se cortó por time_budget, queda para retomarla.
+        """
+        path, self.checkpoint_path = self.checkpoint_path, None
+        if path is not None and not self.deadline_reached():
+            path.unlink(missing_ok=True)
+
+    def saturate_generations(self):
+        """Generaciones sin mejora del criterio saturate_N (None si no hay)"""
+        for criterion in self.ga_params['stop_criteria']:
+            name, value = criterion.split('_', 1)
+            if name == 'saturate':
+                return int(value)
+        return None
+
+    def reach_fitness(self):
+        """Fitness del criterio reach_X (None si no hay)"""
+        for criterion in self.ga_params['stop_criteria']:
+            name, value = criterion.split('_', 1)
+            if name == 'reach':
+                return float(value)
+        return None
+
+    def fingerprint(self, **params):
+        """
+        Hash del modelo de restricciones (cursos, materias, profesores, salones,
+        franjas y pesos) más validated_data y los parámetros de búsqueda.
+        Se calcula con el modelo en memoria, sin consultas adicionales.
+        """
+        model = {
+            'courses': [(c.id, c.shift) for c in self.courses],
+            'subjects': [(s.id, s.course_id, s.hours_per_week, s.requires_lab) for s in self.subjects],
+            'teachers': [(t.id, t.from_montevideo) for t in self.teachers],
+            'subject_teachers': sorted(self.snapshot.subject_teachers.items()),
+            'rooms': [(r.id, r.room_type) for r in self.rooms],
+            'days': self.DAYS,
+            'time_slots': self.TIME_SLOTS,
+            'weights': self.WEIGHTS,
+            'validated_data': self.validated_data,
+            'params': params,
+        }
+        encoded = json.dumps(model, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def run_ga(self, num_generations, sol_per_pop, engine='numpy', batch=True, workers=1, random_seed=None,
+               repair=False, initial_population=None, on_generation=None, resume=None):
+        """
+        Ejecuta una población de PyGAD y devuelve (mejor cromosoma, fitness).
+        resume: Checkpoint cuya población es initial_population; la instancia
+        continúa su numeración de generaciones y su estado aleatorio.
+        """
+        parallel = None
+        if workers > 1:
+            if engine != 'numpy':
+                raise ValueError("La evaluación en paralelo requiere engine='numpy'")
+            parallel = ParallelFitness(self.vectorized, workers)
+            fitness_func = parallel.batch_fitness_func
+            batch = True
+        else:
+            fitness_func = self._select_fitness_func(engine, batch)
+        if self.profiler is not None:
+            fitness_func = self.profiler.wrap('fitness', fitness_func)
+        population = {'sol_per_pop': sol_per_pop}
+        if initial_population is not None:
+            population = {'initial_population': initial_population}
+        try:
+            ga_instance = pygad.GA(
+                num_generations=num_generations,
+                fitness_func=fitness_func,
+                fitness_batch_size=sol_per_pop if batch else None,
+                **population,
+                stop_criteria=self.ga_params['stop_criteria'],
+                on_generation=on_generation,
+                random_seed=random_seed,
+                **self.ga_options(repair)
+            )
+            if self.profiler is not None:
+                self.profiler.instrument_ga(ga_instance)
+            if resume is not None:
+                resume.restore(ga_instance)
+            ga_instance.run()
+            solution, solution_fitness, _ = ga_instance.best_solution(ga_instance.last_generation_fitness)
+        finally:
+            if parallel is not None:
+                parallel.close()
+        return solution, float(solution_fitness)
+
+    def reoptimize(self, random_seed=None, on_progress=None, time_budget=None):
+        """
+        Re-optimiza el horario guardado en lugar de resolver desde cero.
+        Solo se mueven las asignaciones afectadas (sin horario, o con un profesor
+        o salón inválido o excluido en exclude_teachers / exclude_rooms) y su
+        vecindario (ver Reoptimizer); el resto queda fijo. Los hiperparámetros
+        salen de self.ga_params y random_seed, on_progress y time_budget se usan
+        como en generate(). El resultado incluye `changes`: los bloques que cambian, y
+        `repaired` si el mejor individuo tuvo que pasar por repair_best().
+        """
+        self.on_progress = on_progress
+        self.feasibility = None
+        self._started = time.perf_counter()
+        self.deadline = time.time() + time_budget if time_budget else None
+        self.checkpoint_path = self.checkpoint_interval = None
+        reoptimizer = Reoptimizer(
+            self, Schedule.objects.order_by('id'),
+            exclude_teachers=self.validated_data.get('exclude_teachers', ()),
+            exclude_rooms=self.validated_data.get('exclude_rooms', ()),
         )
-        ga_instance.run()
-        solution, solution_fitness, _ = ga_instance.best_solution()
+
+        # Mismo callback que generate(), con los cromosomas completos para el progreso
+        solution, solution_fitness = reoptimizer.run(
+            random_seed=random_seed,
+            on_generation=lambda ga: self.log_generation(ga, reoptimizer.expand(ga.population)),
+        )
+        # Como en generate(): sin choques antes de guardar, moviendo solo los bloques libres
+        solution, solution_fitness, repaired = self.repair_best(
+            solution, solution_fitness, positions=reoptimizer.free_positions)
         assignments = self._decode_solution(solution)
         return {
             'assignments': assignments,
-            'fitness': float(solution_fitness)
-        }
\ No newline at end of file
+            'fitness': solution_fitness,
+            'feasibility': self.feasibility,
+            'affected': len(reoptimizer.affected),
+            'reoptimized': len(reoptimizer.free_positions),
+            'changes': reoptimizer.diff(assignments),
+            'repaired': repaired,
+        }
@@ -0,0 +1,161 @@
+from collections import defaultdict
+
+# Cada penalización solo relaciona bloques que comparten una clave de grupo:
+# el total es la suma de los aportes de cada grupo, así que un movimiento
+# solo cambia el aporte de los grupos que deja y de los que ocupa.
+GROUP_KEYS = {
+    'room_day': lambda position, a: (a.room_id, a.day),
+    'teacher_day': lambda position, a: (a.teacher_id, a.day),
+    'course_day': lambda position, a: (a.course_id, a.day),
+    'course': lambda position, a: a.course_id,
+    'subject': lambda position, a: a.subject_id,
+    'block': lambda position, a: position,
+}
+
+PENALTY_GROUPS = {
+    'overlap': 'room_day',
+    'teacher_overlap': 'teacher_day',
+    'teacher_movement': 'teacher_day',
+    'course_overlap': 'course_day',
+    'daily_hours': 'course_day',
+    'weekly_hours': 'course',
+    'hours': 'subject',
+    'duplicate': 'subject',
+    'distribution': 'subject',
+    'split_teacher': 'subject',
+    'odd_hours': 'subject',
+    'lab_usage': 'block',
+    'teacher_preference': 'block',
+    'course_shift': 'block',
+}
+
+# Campo de la asignación que cambia cada gen variable del cromosoma
+GENE_FIELDS = {0: 'teacher_id', 1: 'room_id', 2: 'day', 3: 'start'}
+
+
+class IncrementalFitness:
+    """
+    Evaluador incremental sobre una lista de asignaciones decodificadas (Assignment).
+
+    Mantiene los bloques de cada grupo (salón-día, profesor-día, curso-día,
+    curso, materia) y el aporte de cada grupo a cada penalización. El efecto
+    de un movimiento se calcula recalculando solo los grupos afectados con las
+    mismas funciones calculate_* del generador: O(k), con k el tamaño de esos
+    grupos, y con exactamente el mismo resultado que la evaluación completa.
+
+    Los aportes se calculan a demanda: delta() solo evalúa los grupos que toca,
+    y el total (penalties) se arma la primera vez que se pide.
+    """
+
+    def __init__(self, generator, assignments):
+        self.generator = generator
+        self.functions = generator.penalty_functions()
+        self.assignments = list(assignments)
+        self.kinds = defaultdict(list)
+        for name, kind in PENALTY_GROUPS.items():
+            self.kinds[kind].append(name)
+        # Posiciones (ordenadas) de los bloques de cada grupo
+        self.members = {kind: defaultdict(list) for kind in GROUP_KEYS}
+        for position, assignment in enumerate(self.assignments):
+            for kind, key in GROUP_KEYS.items():
+                self.members[kind][key(position, assignment)].append(position)
+        # Aporte de cada grupo a cada penalización (se completa a demanda)
+        self.contributions = {kind: {} for kind in GROUP_KEYS}
+        self._penalties = None
+
+    @property
+    def penalties(self):
+        """Total de cada penalización; la primera vez evalúa todos los grupos"""
+        if self._penalties is None:
+            penalties = {name: 0 for name in self.functions}
+            for kind, groups in self.members.items():
+                for group in groups:
+                    for name, value in self.contribution(kind, group).items():
+                        penalties[name] += value
+            self._penalties = penalties
+        return self._penalties
+
+    def contribution(self, kind, group):
+        """Aporte actual de un grupo a sus penalizaciones ({} si el grupo está vacío)"""
+        if group not in self.contributions[kind]:
+            positions = self.members[kind].get(group)
+            if not positions:
+                return {}
+            self.contributions[kind][group] = self._group_penalties(kind, positions, {})
+        return self.contributions[kind][group]
+
+    @classmethod
+    def from_solution(cls, generator, solution):
+        return cls(generator, generator.decode(solution))
+
+    def _group_penalties(self, kind, positions, moves):
+        assignments = [moves.get(p, self.assignments[p] if p < len(self.assignments) else None)
+                       for p in positions]
+        return {name: self.functions[name](assignments) for name in self.kinds[kind]}
+
+    def _affected_groups(self, kind, moves):
+        """Grupos que toca el movimiento y sus posiciones después de aplicarlo"""
+        key = GROUP_KEYS[kind]
+        groups = {}
+        for position, assignment in moves.items():
+            if position < len(self.assignments):
+                groups.setdefault(key(position, self.assignments[position]), None)
+            groups.setdefault(key(position, assignment), None)
+        for group in groups:
+            positions = [p for p in self.members[kind].get(group, ()) if p not in moves]
+            positions += [p for p, a in moves.items() if key(p, a) == group]
+            groups[group] = sorted(positions)
+        return groups
+
+    def delta(self, moves):
+        """
+        Variación de cada penalización al aplicar `moves`: {posición: asignación nueva}.
+        Una posición igual o mayor a la cantidad de asignaciones agrega un bloque.
+        """
+        delta = {name: 0 for name in self.functions}
+        for kind in GROUP_KEYS:
+            for group, positions in self._affected_groups(kind, moves).items():
+                before = self.contribution(kind, group)
+                after = self._group_penalties(kind, positions, moves)
+                for name, value in after.items():
+                    delta[name] += value - before.get(name, 0)
+        return delta
+
+    def fitness(self, penalties=None):
+        return -self.generator.total_penalty(self.penalties if penalties is None else penalties)
+
+    def fitness_after(self, moves):
+        """Fitness exacto (mismo redondeo que fitness_func) después de aplicar `moves`"""
+        delta = self.delta(moves)
+        return self.fitness({name: self.penalties[name] + delta[name] for name in self.penalties})
+
+    def apply(self, moves):
+        """Aplica los movimientos actualizando grupos, aportes y totales"""
+        for kind in GROUP_KEYS:
+            for group, positions in self._affected_groups(kind, moves).items():
+                before = self.contribution(kind, group)
+                self.contributions[kind].pop(group, None)
+                after = self._group_penalties(kind, positions, moves)
+                if self._penalties is not None:
+                    for name, value in after.items():
+                        self._penalties[name] += value - before.get(name, 0)
+                if positions:
+                    self.contributions[kind][group] = after
+                    self.members[kind][group] = positions
+                else:
+                    self.members[kind].pop(group, None)
+        for position in sorted(moves):
+            if position < len(self.assignments):
+                self.assignments[position] = moves[position]
+            else:
+                self.assignments.append(moves[position])
+
+    def gene_move(self, gene, value):
+        """Movimiento de un solo gen del cromosoma: {posición: asignación nueva}"""
+        position, field = divmod(gene, self.generator.assignment_size)
+        assignment = self.assignments[position]
+        if field == 3:
+            start = self.generator.slot_starts[int(value)]
+            return {position: assignment.replace(start=start, end=min(start + assignment.duration,
+                                                                       assignment.MAX_END))}
+        return {position: assignment.replace(**{GENE_FIELDS[field]: int(value)})}
@@ -0,0 +1,196 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+import logging
+import time
+import warnings
+
+import numpy as np
+import pygad
+
+logger = logging.getLogger(__name__)
+
+# Estado de cada proceso isla: el motor y las opciones se reciben una sola vez
+# en el initializer; la instancia de PyGAD vive en el proceso entre migraciones
+_island_engine = None
+_island_options = None
+_island = None
+
+
+def _init_island(engine, options):
+    global _island_engine, _island_options
+    _island_engine = engine
+    _island_options = options
+
+
+def stop_at_deadline(deadline, reach=None):
+    """
+    Callback on_generation de PyGAD que detiene el GA al llegar a `deadline`
+    (time.time()) o, con reach, cuando el mejor fitness alcanza ese valor.
+    """
+    if deadline is None and reach is None:
+        return None
+
+    def on_generation(ga_instance):
+        if deadline is not None and time.time() >= deadline:
+            return "stop"
+        if reach is not None and np.max(ga_instance.last_generation_fitness) >= reach:
+            return "stop"
+        return None
+    return on_generation
+
+
+class _Island:
+    """
+    Población de una isla. Se crea una sola instancia de pygad.GA y cada época
+    continúa su run(). Al comienzo de run() PyGAD vuelve a evaluar la población;
+    como ese fitness ya se conoce (el de la última generación, con los migrantes
+    ya reemplazados), fitness_func lo devuelve sin recalcularlo.
+    """
+
+    def __init__(self, population, seed, deadline, reach):
+        self.known = None
+        self.ga_instance = pygad.GA(
+            num_generations=0,
+            fitness_func=self.fitness_func,
+            fitness_batch_size=len(population),
+            initial_population=population,
+            random_seed=seed,
+            on_generation=stop_at_deadline(deadline, reach),
+            suppress_warnings=True,
+            **_island_options
+        )
+
+    def fitness_func(self, ga_instance, solutions, solutions_indices):
+        solutions = np.asarray(solutions)
+        known, self.known = self.known, None
+        if known is None:
+            return _island_engine.batch_fitness_func(ga_instance, solutions, solutions_indices)
+        fitness = np.array([known.get(tuple(solution), np.nan) for solution in solutions], dtype=float)
+        missing = np.flatnonzero(np.isnan(fitness))
+        if len(missing):
+            fitness[missing] = _island_engine.batch_fitness_func(ga_instance, solutions[missing], missing)
+        return fitness
+
+    def receive(self, positions, migrants, fitness):
+        """Reemplaza los cromosomas en positions por los migrantes (con su fitness)"""
+        ga_instance = self.ga_instance
+        ga_instance.population[positions] = migrants
+        ga_instance.last_generation_fitness[positions] = fitness
+        self.known = {tuple(solution): value
+                      for solution, value in zip(ga_instance.population, ga_instance.last_generation_fitness)}
+
+    def evolve(self, generations):
+        ga_instance = self.ga_instance
+        ga_instance.num_generations = generations
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            ga_instance.run()
+        return ga_instance.population, ga_instance.last_generation_fitness
+
+
+def _start_island(population, seed, deadline, reach):
+    global _island
+    _island = _Island(population, seed, deadline, reach)
+
+
+def _evolve_island(generations, migration=None):
+    """
+    Evoluciona la isla de este proceso `generations` generaciones más, después de
+    recibir la migración (posiciones, migrantes, fitness) si la hay.
+    """
+    if migration is not None:
+        _island.receive(*migration)
+    return _island.evolve(generations)
+
+
+class IslandModel:
+    """
+    Modelo de islas: varias poblaciones independientes, cada una en su proceso.
+
+    Cada `migration_interval` generaciones las islas envían sus `migrants`
+    mejores cromosomas a la siguiente isla del anillo, donde reemplazan a los
+    peores. Cada isla conserva su instancia de PyGAD (ver _Island), así que el
+    costo en evaluaciones es el de una población por isla, sin una pasada extra
+    por época. Devuelve el mejor cromosoma global.
+    """
+
+    def __init__(self, generator, islands, migration_interval=10, migrants=2, random_seed=None):
+        self.generator = generator
+        self.islands = islands
+        self.migration_interval = migration_interval
+        self.migrants = migrants
+        self.random_seed = random_seed
+
+    def _seed(self, epoch, island):
+        if self.random_seed is None:
+            return None
+        return self.random_seed + epoch * self.islands + island
+
+    def migrate(self, populations, fitness):
+        """
+        Migración en anillo: las élites de la isla i reemplazan a los peores de la
+        isla i+1. Devuelve, por isla, (posiciones, migrantes, fitness) recibidos.
+        """
+        elites = [pop[np.argsort(fit)[::-1][:self.migrants]].copy() for pop, fit in zip(populations, fitness)]
+        elite_fitness = [np.sort(fit)[::-1][:self.migrants].copy() for fit in fitness]
+        migrations = [None] * self.islands
+        for i in range(self.islands):
+            target = (i + 1) % self.islands
+            worst = np.argsort(fitness[target])[:self.migrants]
+            populations[target][worst] = elites[i]
+            fitness[target][worst] = elite_fitness[i]
+            migrations[target] = (worst, elites[i], elite_fitness[i])
+        return migrations
+
+    def run(self, num_generations, sol_per_pop, saturate=None, reach=None, on_progress=None, repair=False,
+            seed_fraction=0.0, deadline=None):
+        """
+        saturate y reach: criterios saturate_N y reach_X de stop_criteria, evaluados
+        sobre el mejor fitness global al final de cada época (reach también detiene
+        cada isla apenas lo alcanza).
+        """
+        engine = self.generator.vectorized
+        seeds = [self._seed(0, i) for i in range(self.islands)]
+        populations = [self.generator.initial_population(sol_per_pop, seed_fraction, seed) for seed in seeds]
+        best_fitness = -np.inf
+        stale_generations = 0
+        options = self.generator.ga_options(repair)
+        options.pop('num_genes')
+        # Un proceso por isla, siempre el mismo: la instancia de PyGAD se conserva entre épocas
+        with ExitStack() as stack:
+            pools = [stack.enter_context(ProcessPoolExecutor(max_workers=1, initializer=_init_island,
+                                                             initargs=(engine, options)))
+                     for _ in range(self.islands)]
+            for pool, population, seed in zip(pools, populations, seeds):
+                pool.submit(_start_island, population, seed, deadline, reach).result()
+            completed = 0
+            migrations = [None] * self.islands
+            while completed < num_generations:
+                generations = min(self.migration_interval, num_generations - completed)
+                futures = [pool.submit(_evolve_island, generations, migration)
+                           for pool, migration in zip(pools, migrations)]
+                results = [future.result() for future in futures]
+                populations = [np.array(pop) for pop, _ in results]
+                fitness = [np.array(fit, dtype=float) for _, fit in results]
+                completed += generations
+                epoch_best = max(fit.max() for fit in fitness)
+                logger.debug("Generation %s | Islands: %s | Best Fitness: %s", completed, self.islands, epoch_best)
+                if on_progress is not None:
+                    on_progress(self.generator.progress_event(
+                        completed, np.concatenate(populations), np.concatenate(fitness)
+                    ))
+                if epoch_best > best_fitness:
+                    best_fitness = epoch_best
+                    stale_generations = 0
+                else:
+                    stale_generations += generations
+                if saturate is not None and stale_generations >= saturate:
+                    break
+                if reach is not None and epoch_best >= reach:
+                    break
+                if deadline is not None and time.time() >= deadline:
+                    break
+                migrations = self.migrate(populations, fitness)
+        island = int(np.argmax([fit.max() for fit in fitness]))
+        best = int(np.argmax(fitness[island]))
+        return populations[island][best], fitness[island][best]
@@ -0,0 +1,165 @@
+from django.db.models import Q
+
+from scheduler.models import ConstraintVersion, Schedule
+
+from .assignment import Assignment, minutes
+from .incremental_fitness import GROUP_KEYS, IncrementalFitness
+
+# Superposiciones que se informan explícitamente: (tipo, clave de grupo)
+CONFLICT_GROUPS = (('room', 'room_day'), ('teacher', 'teacher_day'), ('course', 'course_day'))
+# Índice de cada día (mismo orden que ScheduleGenerator.DAYS)
+DAY_INDEX = {code: i for i, (code, _) in enumerate(Schedule.DAYS)}
+DAY_CODES = [code for code, _ in Schedule.DAYS]
+SCHEDULE_FIELDS = ('id', 'course_id', 'subject_id', 'teacher_id', 'room_id', 'day', 'start_time', 'end_time',
+                   'duration')
+
+# (ConstraintVersion con la que se construyó, generador)
+_shared_generator = None
+
+
+def shared_generator():
+    """
+    ScheduleGenerator reutilizado por las verificaciones (snapshot, tablas de costo).
+    Se reconstruye cuando cambia ConstraintVersion, que se lee de la base de datos
+    en cada llamada (una consulta): un cambio en salones, cursos, materias o
+    profesores hecho en otro proceso también lo invalida.
+    """
+    global _shared_generator
+    version = ConstraintVersion.current()
+    if _shared_generator is None or _shared_generator[0] != version:
+        from .genetic_algorithm import ScheduleGenerator
+        _shared_generator = (version, ScheduleGenerator())
+    return _shared_generator[1]
+
+
+def reset_shared_generator():
+    global _shared_generator
+    _shared_generator = None
+
+
+def to_assignment(schedule):
+    """Convierte un horario (dict de valores del modelo) en un Assignment"""
+    return Assignment(
+        schedule['course_id'], schedule['subject_id'], schedule['teacher_id'], schedule['room_id'],
+        DAY_INDEX[schedule['day']], minutes(schedule['start_time']), schedule['duration'],
+        end=minutes(schedule['end_time']), id=schedule['id'],
+    )
+
+
+def make_proposal(assignment, edit, number):
+    """
+    Asignación propuesta a partir de una edición (campos *_id, day, start_time, end_time).
+    Los campos omitidos se toman de assignment (el horario guardado); los bloques
+    nuevos (assignment None) reciben un id 'nuevo-N'.
+    """
+    if assignment is None:
+        assignment = Assignment(None, None, None, None, None, 0, 0, id=f'nuevo-{number}')
+    fields = {field: edit[field] for field in ('course_id', 'subject_id', 'teacher_id', 'room_id') if field in edit}
+    if 'day' in edit:
+        fields['day'] = DAY_INDEX[edit['day']]
+    if 'start_time' in edit:
+        fields['start'] = minutes(edit['start_time'])
+    if 'end_time' in edit:
+        fields['end'] = minutes(edit['end_time'])
+    if 'start_time' in edit or 'end_time' in edit:
+        start, end = fields.get('start', assignment.start), fields.get('end', assignment.end)
+        fields['duration'] = end - start
+        fields['slot_hours'] = fields['duration'] // 60
+    return assignment.replace(**fields)
+
+
+def _overlaps(a, b):
+    a_start, b_start = a.start_hour, b.start_hour
+    a_end, b_end = a_start + a.duration // 60, b_start + b.duration // 60
+    return a.day == b.day and not (a_end <= b_start or a_start >= b_end)
+
+
+class OccupancyIndex:
+    """
+    Índice en memoria del horario guardado: para cada clave de grupo
+    (salón-día, profesor-día, curso-día, curso, materia) los bloques que la ocupan.
+
+    check() evalúa ediciones propuestas tocando solo los grupos afectados,
+    con el evaluador incremental (mismas funciones calculate_* del generador),
+    sin volver a puntuar el horario completo. around() carga solo los bloques
+    de esos grupos.
+    """
+
+    def __init__(self, generator, schedules):
+        # Orden por id: el mismo orden en que el GA guarda las asignaciones
+        self.generator = generator
+        self.evaluator = IncrementalFitness(generator, [to_assignment(s) for s in schedules])
+        self.position = {a.id: i for i, a in enumerate(self.evaluator.assignments)}
+
+    @classmethod
+    def around(cls, generator, edits):
+        """
+        (índice, propuestas) para las ediciones, cargando solo los bloques editados y
+        los que comparten con ellos (antes o después) salón-día, profesor-día, curso o
+        materia: dos consultas que usan los índices de Schedule. Los grupos que tocan
+        las ediciones quedan completos; el resto del horario no se lee.
+        """
+        ids = [edit['id'] for edit in edits if 'id' in edit]
+        edited = {row['id']: to_assignment(row) for row in Schedule.objects.filter(id__in=ids).values(*SCHEDULE_FIELDS)}
+        for schedule_id in ids:
+            if schedule_id not in edited:
+                raise KeyError(schedule_id)
+        proposals = [make_proposal(edited.get(edit.get('id')), edit, number) for number, edit in enumerate(edits)]
+        neighborhood = Q(id__in=ids)
+        for assignment in list(edited.values()) + proposals:
+            day = DAY_CODES[assignment.day]
+            neighborhood |= (Q(room_id=assignment.room_id, day=day) | Q(teacher_id=assignment.teacher_id, day=day)
+                             | Q(course_id=assignment.course_id) | Q(subject_id=assignment.subject_id))
+        rows = Schedule.objects.filter(neighborhood).order_by('id').values(*SCHEDULE_FIELDS)
+        return cls(generator, rows), proposals
+
+    def proposal(self, edit, number):
+        """Asignación propuesta para una edición (ver make_proposal)"""
+        if 'id' in edit:
+            if edit['id'] not in self.position:
+                raise KeyError(edit['id'])
+            return make_proposal(self.evaluator.assignments[self.position[edit['id']]], edit, number)
+        return make_proposal(None, edit, number)
+
+    def moves(self, proposals):
+        """Movimientos del evaluador: los bloques nuevos se agregan al final"""
+        moves = {}
+        added = len(self.evaluator.assignments)
+        for proposal in proposals:
+            if proposal.id in self.position:
+                moves[self.position[proposal.id]] = proposal
+            else:
+                moves[added] = proposal
+                added += 1
+        return moves
+
+    def conflicts(self, proposals):
+        """Superposiciones de salón, profesor y curso que provocan las ediciones"""
+        proposed_ids = {p.id for p in proposals}
+        assignments = self.evaluator.assignments
+        found = []
+        for i, proposal in enumerate(proposals):
+            for conflict_type, kind in CONFLICT_GROUPS:
+                key = GROUP_KEYS[kind](None, proposal)
+                # Bloques guardados que no se están editando, y las demás propuestas
+                others = [assignments[p] for p in self.evaluator.members[kind].get(key, ())
+                          if assignments[p].id not in proposed_ids]
+                others += [p for p in proposals[i + 1:] if GROUP_KEYS[kind](None, p) == key]
+                found.extend({
+                    'type': conflict_type,
+                    'schedule': proposal.id,
+                    'conflicts_with': other.id,
+                } for other in others if _overlaps(proposal, other))
+        return found
+
+    def penalty_delta(self, proposals):
+        """Diferencia de cada penalización entre el horario guardado y el editado"""
+        return self.evaluator.delta(self.moves(proposals))
+
+    def check(self, proposals):
+        delta = self.penalty_delta(proposals)
+        return {
+            'conflicts': self.conflicts(proposals),
+            'penalty_delta': delta,
+            'fitness_delta': -self.generator.total_penalty(delta),
+        }
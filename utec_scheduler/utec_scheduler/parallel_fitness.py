@@ -0,0 +1,47 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Motor de fitness de cada proceso de trabajo (se recibe una sola vez en el initializer)
+_worker_engine = None
+
+
+def _init_worker(engine):
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _score_chunk(solutions):
+    return _worker_engine.batch_fitness(solutions)
+
+
+class ParallelFitness:
+    """
+    Evalúa la población repartiéndola entre varios procesos.
+
+    El modelo de restricciones (VectorizedFitness) se envía a cada proceso
+    una sola vez al crear el pool; en cada generación solo viajan los
+    cromosomas y los valores de fitness. Los trozos se reensamblan en orden,
+    así que el resultado es idéntico al modo en serie.
+    """
+
+    def __init__(self, engine, workers):
+        self.engine = engine
+        self.workers = workers
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine,))
+
+    def batch_fitness(self, solutions):
+        chunks = [chunk for chunk in np.array_split(np.asarray(solutions), self.workers) if len(chunk)]
+        return np.concatenate(list(self.pool.map(_score_chunk, chunks)))
+
+    def batch_fitness_func(self, ga_instance, solutions, solutions_indices):
+        return self.batch_fitness(solutions)
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,114 @@
+import json
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+class Profiler:
+    """
+    Instrumentación opcional de una ejecución del GA.
+
+    Acumula segundos y llamadas por sección: cada penalización de ambos
+    motores (penalty.<nombre>), la decodificación (decode), la evaluación de
+    la población (fitness), los operadores de PyGAD (operator.<nombre>) y
+    cada generación completa (generation). También cuenta las consultas al ORM.
+
+    No agrega costo cuando está desactivado: instrument() reemplaza métodos
+    de la instancia por versiones medidas, en lugar de preguntar en cada llamada.
+    Solo se mide el proceso actual (no las islas ni los clusters en paralelo).
+    """
+
+    PYGAD_OPERATORS = ('select_parents', 'crossover', 'mutation', 'on_mutation')
+
+    def __init__(self):
+        self.sections = {}
+        self.queries = 0
+        self.query_seconds = 0.0
+        self._started = time.perf_counter()
+        self._last_tick = None
+        self._patched = []
+
+    def record(self, name, seconds):
+        section = self.sections.setdefault(name, [0.0, 0])
+        section[0] += seconds
+        section[1] += 1
+
+    def wrap(self, name, func):
+        """Versión de func que acumula su tiempo en la sección name"""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+        return timed
+
+    def tick(self, name):
+        """Registra el tiempo transcurrido desde el tick anterior (o desde el inicio)"""
+        now = time.perf_counter()
+        self.record(name, now - (self._last_tick or self._started))
+        self._last_tick = now
+
+    def _patch(self, obj, name, section):
+        """Reemplaza el método name de la instancia obj por su versión medida"""
+        self._patched.append((obj, name, vars(obj).get(name)))
+        setattr(obj, name, self.wrap(section, getattr(obj, name)))
+
+    def instrument(self, generator, vectorized=True):
+        """Mide la decodificación y cada penalización del motor python y, si vectorized, del motor numpy"""
+        self._patch(generator, 'decode', 'decode')
+        penalty_functions = generator.penalty_functions
+        self._patched.append((generator, 'penalty_functions', None))
+        generator.penalty_functions = lambda: {
+            name: self.wrap(f'penalty.{name}', func) for name, func in penalty_functions().items()
+        }
+        if not vectorized:
+            return
+        self._patch(generator.vectorized, '_columns', 'decode')
+        for name in generator.WEIGHTS:
+            self._patch(generator.vectorized, f'{name}_penalty', f'penalty.{name}')
+
+    def instrument_ga(self, ga_instance):
+        """Mide los operadores de una instancia de pygad.GA"""
+        for name in self.PYGAD_OPERATORS:
+            if callable(getattr(ga_instance, name, None)):
+                self._patch(ga_instance, name, f'operator.{name}')
+
+    def restore(self):
+        """Deshace instrument() e instrument_ga(): vuelven los métodos originales"""
+        for obj, name, original in reversed(self._patched):
+            if original is None:
+                delattr(obj, name)
+            else:
+                setattr(obj, name, original)
+        self._patched = []
+
+    @contextmanager
+    def count_queries(self):
+        """Cuenta las consultas al ORM ejecutadas dentro del bloque"""
+        def counter(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.queries += 1
+                self.query_seconds += time.perf_counter() - start
+        with connection.execute_wrapper(counter):
+            yield
+
+    def report(self):
+        return {
+            'total_seconds': round(time.perf_counter() - self._started, 6),
+            'queries': self.queries,
+            'query_seconds': round(self.query_seconds, 6),
+            'sections': {
+                name: {'seconds': round(seconds, 6), 'calls': calls,
+                       'ms_per_call': round(seconds / calls * 1000, 6)}
+                for name, (seconds, calls) in sorted(self.sections.items(), key=lambda item: -item[1][0])
+            },
+        }
+
+    def write(self, path):
+        with open(path, 'w') as output:
+            json.dump(self.report(), output, indent=2)
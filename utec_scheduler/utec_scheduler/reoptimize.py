@@ -0,0 +1,180 @@
+import numpy as np
+import pygad
+
+# Campos que puede cambiar la re-optimización
+CHANGED_FIELDS = ('teacher_id', 'room_id', 'day', 'start_time', 'end_time')
+
+
+def _fields(schedule):
+    return {'teacher_id': schedule.teacher_id, 'room_id': schedule.room_id, 'day': schedule.day,
+            'start_time': schedule.start_time.strftime('%H:%M'), 'end_time': schedule.end_time.strftime('%H:%M:%S')}
+
+
+class Reoptimizer:
+    """
+    Re-optimización en caliente a partir del horario guardado.
+
+    Los horarios existentes se convierten en el cromosoma base. Quedan libres
+    las asignaciones afectadas (`affected`: sin horario guardado, o con un
+    profesor o salón que ya no es válido o fue excluido) y, con neighborhood,
+    su vecindario (ver _neighbors()), para que un bloque afectado pueda ocupar
+    un lugar moviendo a otros. El GA evoluciona un cromosoma reducido con los
+    genes libres; el resto queda fijo. Cada gen que se aparta del plan actual
+    suma CHANGE_WEIGHT a la penalización.
+    """
+
+    CHANGE_WEIGHT = 1
+
+    def __init__(self, generator, schedules, exclude_teachers=(), exclude_rooms=(), neighborhood=True):
+        self.generator = generator
+        size = generator.assignment_size
+        exclude_teachers, exclude_rooms = set(exclude_teachers), set(exclude_rooms)
+        # Horarios guardados por (curso, materia, horas), en orden de id
+        saved = {}
+        for schedule in schedules:
+            key = (schedule.course_id, schedule.subject_id, schedule.duration // 60)
+            saved.setdefault(key, []).append(schedule)
+        self.base = np.array([space[0] for space in generator.gene_space], dtype=float)
+        self.rows = []
+        free = []
+        for i, (course, subject, slot_hours) in enumerate(generator.assignments):
+            candidates = saved.get((course.id, subject.id, slot_hours))
+            row = candidates.pop(0) if candidates else None
+            self.rows.append(row)
+            if row is not None:
+                genes = self._genes(row)
+                valid = (genes[0] in generator.gene_space[i * size] and genes[0] not in exclude_teachers
+                         and genes[1] in generator.gene_space[i * size + 1] and genes[1] not in exclude_rooms
+                         and genes[3] is not None)
+                if genes[3] is None:
+                    # Hora de inicio fuera de TIME_SLOTS (edición manual): el bloque se vuelve a ubicar
+                    genes[3] = generator.gene_space[i * size + 3][0]
+                self.base[i * size:(i + 1) * size] = genes
+                if valid:
+                    continue
+            free.append(i)
+        # Horarios guardados que ya no corresponden a ninguna asignación
+        self.removed = [row for rows in saved.values() for row in rows]
+        self.affected = free
+        if neighborhood:
+            free = sorted(set(free) | self._neighbors(free, exclude_teachers))
+        self.free_positions = free
+        self.free_genes = np.array([i * size + g for i in free for g in range(size)], dtype=int)
+        self.gene_space = []
+        for gene in self.free_genes:
+            space = generator.gene_space[gene]
+            if gene % size == 0:
+                space = [t for t in space if t not in exclude_teachers] or space
+            elif gene % size == 1:
+                space = [r for r in space if r not in exclude_rooms] or space
+            self.gene_space.append(space)
+        # Valores actuales de los genes libres (plan vigente) para la penalización por cambios
+        self.current = self.base[self.free_genes].copy()
+
+    def _genes(self, schedule):
+        start_time = schedule.start_time.strftime('%H:%M')
+        slot = self.generator.slot_index.get(start_time)
+        return [schedule.teacher_id, schedule.room_id,
+                self.generator.DAYS.index(schedule.day), slot]
+
+    def _neighbors(self, affected, exclude_teachers):
+        """
+        Bloques guardados que comparten con un bloque afectado el curso, el salón
+        o un profesor candidato el mismo día. Un bloque nuevo (sin día) arrastra
+        a los demás bloques de su curso.
+        """
+        size = self.generator.assignment_size
+        keys = set()
+        for i in affected:
+            course = self.generator.assignments[i][0].id
+            if self.rows[i] is None:
+                keys.add(('course', course, None))
+                continue
+            day = int(self.base[i * size + 2])
+            keys.add(('course', course, day))
+            keys.add(('room', int(self.base[i * size + 1]), day))
+            keys.update(('teacher', int(teacher), day) for teacher in self.generator.gene_space[i * size]
+                        if teacher not in exclude_teachers)
+        neighbors = set()
+        for i, row in enumerate(self.rows):
+            if row is None or i in affected:
+                continue
+            course = self.generator.assignments[i][0].id
+            teacher, room, day = (int(gene) for gene in self.base[i * size:i * size + 3])
+            if keys & {('course', course, None), ('course', course, day), ('room', room, day),
+                       ('teacher', teacher, day)}:
+                neighbors.add(i)
+        return neighbors
+
+    def expand(self, solutions):
+        """Cromosomas completos a partir de los reducidos (genes libres)"""
+        solutions = np.asarray(solutions, dtype=float).reshape(-1, len(self.free_genes))
+        full = np.repeat(self.base[None, :], len(solutions), axis=0)
+        full[:, self.free_genes] = solutions
+        return full
+
+    def changes(self, solutions):
+        solutions = np.asarray(solutions, dtype=float).reshape(-1, len(self.free_genes))
+        return np.sum(solutions != self.current, axis=1)
+
+    def batch_fitness_func(self, ga_instance, solutions, solutions_indices):
+        fitness = self.generator.vectorized.batch_fitness(self.expand(solutions))
+        return fitness - self.CHANGE_WEIGHT * self.changes(solutions)
+
+    def run(self, random_seed=None, on_generation=None):
+        """
+        Devuelve el cromosoma completo y su fitness (sin la penalización por cambios).
+        Población, operadores y criterios de parada salen de generator.ga_params.
+        """
+        if not len(self.free_genes):
+            return self.base, float(self.generator.vectorized.batch_fitness(self.base)[0])
+        sol_per_pop = self.generator.ga_params['sol_per_pop']
+        rng = np.random.default_rng(random_seed)
+        population = np.array([[rng.choice(space) for space in self.gene_space] for _ in range(sol_per_pop)],
+                              dtype=float)
+        # El plan vigente (con valores válidos) es uno de los individuos iniciales
+        population[0] = [value if value in space else space[0]
+                         for value, space in zip(self.current, self.gene_space)]
+        options = self.generator.ga_options()
+        options.update(num_genes=len(self.free_genes), gene_space=self.gene_space)
+        ga_instance = pygad.GA(
+            num_generations=self.generator.ga_params['num_generations'],
+            fitness_func=self.batch_fitness_func,
+            fitness_batch_size=sol_per_pop,
+            initial_population=population,
+            stop_criteria=self.generator.ga_params['stop_criteria'],
+            on_generation=on_generation,
+            random_seed=random_seed,
+            suppress_warnings=True,
+            **options
+        )
+        ga_instance.run()
+        solution, _, _ = ga_instance.best_solution(ga_instance.last_generation_fitness)
+        full = self.expand(solution)[0]
+        return full, float(self.generator.vectorized.batch_fitness(full)[0])
+
+    def diff(self, assignments):
+        """Bloques que cambian respecto del horario guardado (before/after None = bloque nuevo/eliminado)"""
+        changes = []
+        for row, assignment in zip(self.rows, assignments):
+            after = {name: assignment[name] for name in CHANGED_FIELDS}
+            before = _fields(row) if row is not None else None
+            if before == after:
+                continue
+            changes.append({
+                'schedule_id': row.id if row is not None else None,
+                'course_id': assignment['course_id'],
+                'subject_id': assignment['subject_id'],
+                'duration': assignment['duration'],
+                'before': before,
+                'after': after,
+            })
+        changes.extend({
+            'schedule_id': row.id,
+            'course_id': row.course_id,
+            'subject_id': row.subject_id,
+            'duration': row.duration,
+            'before': _fields(row),
+            'after': None,
+        } for row in self.removed)
+        return changes
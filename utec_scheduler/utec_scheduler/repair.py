@@ -0,0 +1,96 @@
+import numpy as np
+
+
+class ScheduleRepair:
+    """
+    Operador de reparación (búsqueda local) para el GA memético.
+
+    Se aplica a cada descendiente en el hook on_mutation de PyGAD:
+    1. Cada materia queda con un solo profesor (el más frecuente entre sus bloques).
+    2. Los bloques que chocan en salón, profesor o curso se mueven a la primera
+       celda (día, franja, salón) libre de su gene_space, prefiriendo franjas
+       del turno del curso y salones sin costo de laboratorio.
+
+    Solo guarda arreglos y listas de enteros, así que se puede enviar a los
+    procesos de las islas.
+    """
+
+    def __init__(self, generator):
+        self.num_assignments = generator.num_assignments
+        self.assignment_size = generator.assignment_size
+        self.slot_hour = [int(t.split(':')[0]) for t in generator.TIME_SLOTS]
+        self.slot_hours = [slot_hours for _, _, slot_hours in generator.assignments]
+        self.courses = [course.id for course, _, _ in generator.assignments]
+        course_positions = generator.snapshot.course_positions
+        room_positions = generator.snapshot.room_positions
+        self.days = []
+        self.slots = []
+        self.rooms = []
+        for i, (course, subject, slot_hours) in enumerate(generator.assignments):
+            genes = generator.gene_space[i * self.assignment_size:(i + 1) * self.assignment_size]
+            course_cost = generator.course_slot_cost[course_positions[course.id]]
+            self.days.append(list(genes[2]))
+            self.slots.append(sorted(genes[3], key=lambda slot: course_cost[slot]))
+            self.rooms.append(sorted(genes[1], key=lambda room: generator.room_cost[i, room_positions[room]]))
+        # Bloques de cada materia, para unificar el profesor
+        subject_blocks = {}
+        for i, (course, subject, slot_hours) in enumerate(generator.assignments):
+            subject_blocks.setdefault(subject.id, []).append(i)
+        self.subject_blocks = [np.array(blocks) for blocks in subject_blocks.values() if len(blocks) > 1]
+
+    def on_mutation(self, ga_instance, offspring):
+        """Hook de PyGAD: devuelve los descendientes reparados"""
+        return np.array([self.repair(solution) for solution in offspring], dtype=float)
+
+    def _cells(self, day, slot, i):
+        start = self.slot_hour[slot]
+        return [(day, hour) for hour in range(start, start + self.slot_hours[i])]
+
+    @staticmethod
+    def _keys(cells, course, teacher, room):
+        """Claves de ocupación de un bloque: salón, profesor y curso por cada (día, hora)"""
+        for c in cells:
+            yield ('room', room, *c)
+            yield ('teacher', teacher, *c)
+            yield ('course', course, *c)
+
+    def _free_cell(self, i, occupied, course, teacher, room, day):
+        """Primera celda (salón, día, franja) libre para el bloque i, empezando por su día actual"""
+        days = sorted(self.days[i], key=lambda d: (d - day) % len(self.days[i]))
+        for candidate_day in days:
+            for slot in self.slots[i]:
+                cells = self._cells(candidate_day, slot, i)
+                for candidate_room in [room] + self.rooms[i]:
+                    if occupied.isdisjoint(self._keys(cells, course, teacher, candidate_room)):
+                        return candidate_room, candidate_day, slot
+        return None
+
+    def repair(self, solution, positions=None):
+        """
+        positions: si se indica, solo esos bloques pueden cambiar (re-optimización);
+        el resto queda fijo y se ubica primero, así que los choques se resuelven
+        moviendo los bloques libres.
+        """
+        genes = np.asarray(solution).reshape(self.num_assignments, self.assignment_size).astype(np.int64)
+        movable = np.ones(self.num_assignments, dtype=bool)
+        if positions is not None:
+            movable[:] = False
+            movable[list(positions)] = True
+        # 1. Un profesor por materia (el de los bloques fijos, si los hay)
+        for blocks in self.subject_blocks:
+            pinned = blocks[~movable[blocks]]
+            teachers, counts = np.unique(genes[pinned if len(pinned) else blocks, 0], return_counts=True)
+            genes[blocks[movable[blocks]], 0] = teachers[np.argmax(counts)]
+        # 2. Mover los bloques que chocan a celdas libres
+        occupied = set()
+        order = np.concatenate([np.flatnonzero(~movable), np.flatnonzero(movable)])
+        for i in order:
+            course = self.courses[i]
+            teacher, room, day, slot = (int(v) for v in genes[i])
+            if movable[i] and not occupied.isdisjoint(self._keys(self._cells(day, slot, i), course, teacher, room)):
+                cell = self._free_cell(i, occupied, course, teacher, room, day)
+                if cell is not None:
+                    room, day, slot = cell
+                    genes[i, 1:] = cell
+            occupied.update(self._keys(self._cells(day, slot, i), course, teacher, room))
+        return genes.reshape(-1)
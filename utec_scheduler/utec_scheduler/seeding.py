@@ -0,0 +1,68 @@
+import numpy as np
+
+from .repair import ScheduleRepair
+
+
+class GreedyConstructor(ScheduleRepair):
+    """
+    Constructor greedy aleatorizado para sembrar la población inicial.
+
+    Ubica primero los bloques más restringidos (menos celdas posibles) y a cada
+    uno le asigna la celda (día, franja, salón) libre menos disputada: la que
+    deja menos horas del mismo curso ese día, dentro del turno y en un salón
+    sin costo de laboratorio. Cada materia queda con un solo profesor, el de
+    menor carga entre los habilitados. El desempate aleatorio da diversidad.
+    """
+
+    def __init__(self, generator):
+        super().__init__(generator)
+        self.teachers = [list(generator.gene_space[i * self.assignment_size])
+                         for i in range(self.num_assignments)]
+        self.subjects = [subject.id for _, subject, _ in generator.assignments]
+        # Solo las celdas sin costo de turno ni de laboratorio, si existen
+        course_positions = generator.snapshot.course_positions
+        room_positions = generator.snapshot.room_positions
+        self.preferred_slots = []
+        self.preferred_rooms = []
+        for i, (course, subject, slot_hours) in enumerate(generator.assignments):
+            course_cost = generator.course_slot_cost[course_positions[course.id]]
+            room_cost = generator.room_cost[i]
+            self.preferred_slots.append([s for s in self.slots[i] if course_cost[s] == 0] or self.slots[i])
+            self.preferred_rooms.append([r for r in self.rooms[i] if room_cost[room_positions[r]] == 0]
+                                        or self.rooms[i])
+
+    def construct(self, rng):
+        """Un cromosoma construido de forma greedy; rng es un np.random.Generator"""
+        genes = np.zeros((self.num_assignments, self.assignment_size), dtype=np.int64)
+        occupied = set()
+        course_day_hours = {}
+        teacher_load = {}
+        subject_teacher = {}
+        sizes = [len(self.preferred_slots[i]) * len(self.preferred_rooms[i]) for i in range(self.num_assignments)]
+        order = sorted(range(self.num_assignments), key=lambda i: (sizes[i], rng.random()))
+        for i in order:
+            course = self.courses[i]
+            teacher = subject_teacher.get(self.subjects[i])
+            if teacher is None:
+                teacher = min(self.teachers[i], key=lambda t: (teacher_load.get(t, 0), rng.random()))
+                subject_teacher[self.subjects[i]] = teacher
+            best = None
+            for day in self.days[i]:
+                for slot in self.preferred_slots[i]:
+                    cells = self._cells(day, slot, i)
+                    for room in self.preferred_rooms[i]:
+                        if occupied.isdisjoint(self._keys(cells, course, teacher, room)):
+                            score = (course_day_hours.get((course, day), 0), rng.random())
+                            if best is None or score < best[0]:
+                                best = (score, room, day, slot)
+                            break  # el primer salón libre basta para esta celda
+            if best is None:
+                # Sin celdas libres: celda aleatoria, la penalización la resolverá el GA
+                room, day, slot = (rng.choice(self.rooms[i]), rng.choice(self.days[i]), rng.choice(self.slots[i]))
+            else:
+                _, room, day, slot = best
+            genes[i] = teacher, room, day, slot
+            occupied.update(self._keys(self._cells(day, slot, i), course, teacher, room))
+            course_day_hours[(course, day)] = course_day_hours.get((course, day), 0) + self.slot_hours[i]
+            teacher_load[teacher] = teacher_load.get(teacher, 0) + self.slot_hours[i]
+        return genes.reshape(-1).astype(float)
@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'django_filters',
     'scheduler',
     'corsheaders',
 ]
@@ -116,6 +117,10 @@ ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
 
 
 
+# Generación de horarios: lanzar un worker local por cada trabajo encolado
+GENERATION_WORKER_AUTOSPAWN = bool(int(os.getenv('GENERATION_WORKER_AUTOSPAWN', 1)))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
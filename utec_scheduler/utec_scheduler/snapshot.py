@@ -0,0 +1,98 @@
+import pickle
+
+import numpy as np
+
+from scheduler.models import Course, Room, Subject, Teacher
+
+LAB_ROOM_TYPES = ('COMP', 'LOG')
+
+
+def _index_lookup(ids):
+    """Arreglo id -> índice denso (-1 si el id no existe)"""
+    lookup = np.full(max(ids, default=0) + 1, -1, dtype=np.int64)
+    lookup[ids] = np.arange(len(ids))
+    return lookup
+
+
+def _frozen(values, dtype):
+    array = np.array(values, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+
+class ProblemSnapshot:
+    """
+    Modelo de restricciones inmutable, compartido por el GA, el decodificador y
+    ambos motores de fitness.
+
+    load() trae cursos, materias, salones y profesores con sus materias en una
+    cantidad fija de consultas (5), sin importar el tamaño de la institución.
+    Además de las instancias del ORM (para guardar y serializar sin consultas)
+    guarda los atributos como arreglos de NumPy de solo lectura, los mapas
+    id -> índice denso y los profesores habilitados por materia.
+    Se puede guardar en disco con save() y recuperar con from_file().
+    """
+
+    def __init__(self, courses, subjects, teachers, rooms):
+        self.courses = tuple(courses)
+        self.subjects = tuple(subjects)
+        self.teachers = tuple(teachers)
+        self.rooms = tuple(rooms)
+        # Mapas id -> índice denso (dict para el código Python, arreglo para NumPy)
+        self.course_positions = {c.id: i for i, c in enumerate(self.courses)}
+        self.subject_positions = {s.id: i for i, s in enumerate(self.subjects)}
+        self.teacher_positions = {t.id: i for i, t in enumerate(self.teachers)}
+        self.room_positions = {r.id: i for i, r in enumerate(self.rooms)}
+        self.course_index = _index_lookup([c.id for c in self.courses])
+        self.subject_index = _index_lookup([s.id for s in self.subjects])
+        self.teacher_index = _index_lookup([t.id for t in self.teachers])
+        self.room_index = _index_lookup([r.id for r in self.rooms])
+        for lookup in (self.course_index, self.subject_index, self.teacher_index, self.room_index):
+            lookup.flags.writeable = False
+        # Atributos como arreglos
+        self.course_shift = tuple(c.shift for c in self.courses)
+        self.subject_course = _frozen([self.course_positions[s.course_id] for s in self.subjects], np.int64)
+        self.subject_hours = _frozen([s.hours_per_week for s in self.subjects], np.int64)
+        self.subject_requires_lab = _frozen([s.requires_lab for s in self.subjects], bool)
+        self.teacher_from_montevideo = _frozen([t.from_montevideo for t in self.teachers], bool)
+        self.room_is_lab = _frozen([r.room_type in LAB_ROOM_TYPES for r in self.rooms], bool)
+        # Profesores habilitados por materia (ids, en orden de id) y materias de cada curso
+        subject_teachers = {s.id: [] for s in self.subjects}
+        for teacher in self.teachers:
+            for subject in teacher.subjects.all():
+                if subject.id in subject_teachers:
+                    subject_teachers[subject.id].append(teacher.id)
+        self.subject_teachers = {subject_id: tuple(ids) for subject_id, ids in subject_teachers.items()}
+        course_subjects = {c.id: [] for c in self.courses}
+        for subject in self.subjects:
+            course_subjects[subject.course_id].append(subject)
+        self.course_subjects = {course_id: tuple(subjects) for course_id, subjects in course_subjects.items()}
+
+    @classmethod
+    def load(cls):
+        """Snapshot de la base de datos actual en 5 consultas"""
+        return cls(
+            Course.objects.order_by('id'),
+            Subject.objects.order_by('id'),
+            Teacher.objects.order_by('id').prefetch_related('subjects'),
+            Room.objects.order_by('id'),
+        )
+
+    def save(self, path):
+        with open(path, 'wb') as output:
+            pickle.dump(self, output, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'rb') as source:
+            snapshot = pickle.load(source)
+        if not isinstance(snapshot, cls):
+            raise ValueError(f"{path} no contiene un ProblemSnapshot")
+        return snapshot
+
+    def __setstate__(self, state):
+        # pickle no conserva la marca de solo lectura de los arreglos
+        self.__dict__.update(state)
+        for value in state.values():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
@@ -29,9 +29,11 @@ router.register(r'courses', views.CourseViewSet)
 router.register(r'subjects', views.SubjectViewSet)
 router.register(r'teachers', views.TeacherViewSet)
 router.register(r'schedules', views.ScheduleViewSet)
+router.register(r'generation-jobs', views.GenerationJobViewSet)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/generation-jobs/<int:pk>/events/', views.generation_job_events, name='generation-job-events'),
     path('api/', include(router.urls)),
     path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
     path('horarios/', TemplateView.as_view(template_name='scheduler/schedule.html'), name='schedule-view')
@@ -0,0 +1,222 @@
+import numpy as np
+
+
+class VectorizedFitness:
+    """
+    Motor de fitness vectorizado con NumPy.
+
+    Reproduce exactamente las funciones calculate_*_penalty de
+    ScheduleGenerator, pero trabajando sobre el cromosoma como un arreglo
+    entero de forma (num_assignments, 4) en lugar de una lista de dicts.
+    Todas las penalizaciones operan sobre un lote (sol_per_pop, num_assignments, 4),
+    de modo que una población completa se evalúa en una sola pasada.
+
+    Solo guarda arreglos de NumPy (no instancias del ORM), por lo que se puede
+    enviar una sola vez a procesos de trabajo.
+    """
+
+    def __init__(self, generator):
+        self.weights = dict(generator.WEIGHTS)
+        self.num_assignments = generator.num_assignments
+        self.assignment_size = generator.assignment_size
+        self.num_days = len(generator.DAYS)
+        self.num_slots = len(generator.TIME_SLOTS)
+
+        # Mapas id -> índice denso para poder usar bincount y gathers
+        snapshot = generator.snapshot
+        self.course_index = snapshot.course_index
+        self.subject_index = snapshot.subject_index
+        self.teacher_index = snapshot.teacher_index
+        self.room_index = snapshot.room_index
+        self.num_courses = len(generator.courses)
+        self.num_subjects = len(generator.subjects)
+        self.num_teachers = len(generator.teachers)
+        self.num_rooms = len(generator.rooms)
+
+        # Atributos de las entidades como arreglos
+        self.slot_hour = np.array([int(t.split(':')[0]) for t in generator.TIME_SLOTS])
+        self.required_hours = snapshot.subject_hours
+        # Columnas fijas de cada asignación (no forman parte del cromosoma)
+        self.assignment_course = self.course_index[[course.id for course, _, _ in generator.assignments]]
+        self.assignment_subject = self.subject_index[[subject.id for _, subject, _ in generator.assignments]]
+        self.assignment_hours = np.array([slot_hours for _, _, slot_hours in generator.assignments], dtype=np.int64)
+        # Tablas de costo estático precalculadas por el generador
+        self.room_cost = generator.room_cost
+        self.teacher_slot_cost = generator.teacher_slot_cost
+        self.course_slot_cost = generator.course_slot_cost
+
+    def _columns(self, solutions):
+        """Convierte un lote de cromosomas en columnas (sol_per_pop, num_assignments) de índices densos"""
+        genes = np.asarray(solutions).reshape(-1, self.num_assignments, self.assignment_size).astype(np.int64)
+        shape = genes.shape[:2]
+        return {
+            'course': np.broadcast_to(self.assignment_course, shape),
+            'subject': np.broadcast_to(self.assignment_subject, shape),
+            'teacher': self.teacher_index[genes[:, :, 0]],
+            'room': self.room_index[genes[:, :, 1]],
+            'day': genes[:, :, 2],
+            'slot': genes[:, :, 3],
+            'hour': self.slot_hour[genes[:, :, 3]],
+            'slot_hours': np.broadcast_to(self.assignment_hours, shape),
+        }
+
+    def total_penalty(self, penalties):
+        """Suma ponderada en el mismo orden que ScheduleGenerator.total_penalty"""
+        return sum(penalties[k] * self.weights[k] for k in penalties)
+
+    def fitness_func(self, ga_instance, solution, solution_idx):
+        penalties = self.calculate_penalties(solution)
+        return -self.total_penalty(penalties)  # PyGAD maximiza
+
+    def batch_fitness(self, solutions):
+        """Fitness de un lote de cromosomas como arreglo (sol_per_pop,)"""
+        return -self.total_penalty(self.batch_penalties(solutions))
+
+    def batch_fitness_func(self, ga_instance, solutions, solutions_indices):
+        """Fitness de toda la población en una sola llamada (fitness_batch_size de PyGAD)"""
+        return self.batch_fitness(solutions)
+
+    def calculate_penalties(self, solution):
+        """Devuelve las penalizaciones con las mismas claves que ScheduleGenerator"""
+        return {k: int(v[0]) for k, v in self.batch_penalties(solution).items()}
+
+    def batch_penalties(self, solutions):
+        """Penalizaciones de un lote de cromosomas; cada valor es un arreglo (sol_per_pop,)"""
+        cols = self._columns(solutions)
+        return {
+            'overlap': self.overlap_penalty(cols),
+            'teacher_overlap': self.teacher_overlap_penalty(cols),
+            'teacher_movement': self.teacher_movement_penalty(cols),
+            'lab_usage': self.lab_usage_penalty(cols),
+            'teacher_preference': self.teacher_preference_penalty(cols),
+            'course_shift': self.course_shift_penalty(cols),
+            'hours': self.hours_penalty(cols),
+            'duplicate': self.duplicate_penalty(cols),
+            'distribution': self.distribution_penalty(cols),
+            'split_teacher': self.split_teacher_penalty(cols),
+            'odd_hours': self.odd_hours_penalty(cols),
+            'course_overlap': self.course_overlap_penalty(cols),
+            'daily_hours': self.daily_hours_penalty(cols),
+            'weekly_hours': self.weekly_hours_penalty(cols),
+        }
+
+    def _group_counts(self, key, size, weights=None):
+        """bincount por solución: devuelve (sol_per_pop, size)"""
+        num_solutions = key.shape[0]
+        offset = np.arange(num_solutions)[:, None] * size
+        counts = np.bincount((key + offset).ravel(), weights=None if weights is None else weights.ravel(),
+                             minlength=num_solutions * size)
+        return counts.reshape(num_solutions, size)
+
+    def _repeated(self, key, size):
+        """Cantidad de elementos que repiten una clave ya vista, por solución"""
+        counts = self._group_counts(key, size)
+        return key.shape[1] - np.count_nonzero(counts, axis=1)
+
+    def _subject_day_counts(self, cols):
+        key = cols['subject'] * self.num_days + cols['day']
+        counts = self._group_counts(key, self.num_subjects * self.num_days)
+        return counts.reshape(-1, self.num_subjects, self.num_days)
+
+    def _stable_order(self, *keys):
+        """Orden estable por filas según las claves dadas (la primera es la principal)"""
+        positions = np.broadcast_to(np.arange(self.num_assignments), keys[0].shape)
+        return np.lexsort((positions,) + tuple(reversed(keys)), axis=-1)
+
+    def _range_overlaps(self, cols, group, num_groups):
+        """Pares de bloques del mismo grupo y día cuyos rangos horarios se superponen"""
+        # Bloques por (grupo, día, franja de inicio)
+        key = cols[group] * self.num_days + cols['day']
+        counts = self._group_counts(
+            key * self.num_slots + cols['slot'], num_groups * self.num_days * self.num_slots
+        ).reshape(key.shape[0], -1, self.num_slots)
+        start = cols['hour']
+        end = start + cols['slot_hours']
+        # Para cada bloque, cuántos bloques del mismo grupo y día empiezan dentro de su rango
+        starts_inside = (self.slot_hour >= start[:, :, None]) & (self.slot_hour < end[:, :, None])
+        group_counts = np.take_along_axis(counts, key[:, :, None], axis=1)
+        own_slot = np.take_along_axis(starts_inside, cols['slot'][:, :, None], axis=2)[:, :, 0]
+        others_inside = np.sum(starts_inside * group_counts, axis=2) - own_slot
+        # Los pares que empiezan a la misma hora se contaron en ambos sentidos
+        same_start_pairs = np.sum(counts * (counts - 1) // 2, axis=(1, 2))
+        return np.sum(others_inside, axis=1) - same_start_pairs
+
+    def overlap_penalty(self, cols):
+        return 10 * self._range_overlaps(cols, 'room', self.num_rooms)
+
+    def teacher_overlap_penalty(self, cols):
+        return 10 * self._range_overlaps(cols, 'teacher', self.num_teachers)
+
+    def teacher_movement_penalty(self, cols):
+        # Orden estable por (profesor, día): compara cada clase con la anterior del grupo
+        order = self._stable_order(cols['teacher'], cols['day'])
+        teacher = np.take_along_axis(cols['teacher'], order, axis=1)
+        day = np.take_along_axis(cols['day'], order, axis=1)
+        hour = np.take_along_axis(cols['hour'], order, axis=1)
+        same_group = (teacher[:, 1:] == teacher[:, :-1]) & (day[:, 1:] == day[:, :-1])
+        time_diff = np.abs(hour[:, 1:] - hour[:, :-1])
+        return np.sum(10 * time_diff * (same_group & (time_diff > 2)), axis=1)
+
+    def lab_usage_penalty(self, cols):
+        return np.sum(self.room_cost[np.arange(self.num_assignments), cols['room']], axis=1)
+
+    def teacher_preference_penalty(self, cols):
+        return np.sum(self.teacher_slot_cost[cols['teacher'], cols['slot']], axis=1)
+
+    def course_shift_penalty(self, cols):
+        return np.sum(self.course_slot_cost[cols['course'], cols['slot']], axis=1)
+
+    def hours_penalty(self, cols):
+        counts = self._group_counts(cols['subject'], self.num_subjects)
+        present = counts > 0
+        return np.sum(2 * np.abs(2 * counts - self.required_hours) * present, axis=1)
+
+    def duplicate_penalty(self, cols):
+        key = (cols['subject'] * self.num_days + cols['day']) * self.num_slots + cols['slot']
+        return 2 * self._repeated(key, self.num_subjects * self.num_days * self.num_slots)
+
+    def distribution_penalty(self, cols):
+        counts = self._subject_day_counts(cols)
+        # Cada bloque extra de la misma materia en el mismo día supera las 3 horas
+        penalty = np.sum(np.maximum(counts - 1, 0), axis=(1, 2))
+        present = counts > 0
+        penalty += 5 * np.count_nonzero(present[:, :, :-1] & present[:, :, 1:], axis=(1, 2))
+        return penalty
+
+    def split_teacher_penalty(self, cols):
+        # Orden estable por materia: desde el primer profesor distinto, cada bloque penaliza
+        order = self._stable_order(cols['subject'])
+        subject = np.take_along_axis(cols['subject'], order, axis=1)
+        teacher = np.take_along_axis(cols['teacher'], order, axis=1)
+        positions = np.broadcast_to(np.arange(self.num_assignments), subject.shape)
+        group_start = np.ones(subject.shape, dtype=bool)
+        group_start[:, 1:] = subject[:, 1:] != subject[:, :-1]
+        start_idx = np.maximum.accumulate(np.where(group_start, positions, 0), axis=1)
+        differs = teacher != np.take_along_axis(teacher, start_idx, axis=1)
+        seen = np.cumsum(differs, axis=1)
+        split = (seen - np.take_along_axis(seen, start_idx, axis=1)) > 0
+        return 3 * np.count_nonzero(split, axis=1)
+
+    def odd_hours_penalty(self, cols):
+        counts = self._subject_day_counts(cols)
+        hours = 2 * counts
+        present_days = counts > 0
+        odd = (self.required_hours % 2 != 0) & present_days.any(axis=2)
+        three_hour_days = np.sum((hours == 3) & present_days, axis=2)
+        two_hour_days = np.sum((hours == 2) & present_days, axis=2)
+        expected_two_hour_days = (self.required_hours - 3) // 2
+        penalty = 10 * np.count_nonzero(odd & (three_hour_days != 1), axis=1)
+        penalty += 5 * np.sum(np.abs(two_hour_days - expected_two_hour_days) * odd, axis=1)
+        return penalty
+
+    def course_overlap_penalty(self, cols):
+        return 10 * self._range_overlaps(cols, 'course', self.num_courses)
+
+    def daily_hours_penalty(self, cols):
+        key = cols['course'] * self.num_days + cols['day']
+        hours = self._group_counts(key, self.num_courses * self.num_days, weights=cols['slot_hours'])
+        return 5 * np.sum(np.maximum(hours - 4, 0), axis=1).astype(np.int64)
+
+    def weekly_hours_penalty(self, cols):
+        hours = self._group_counts(cols['course'], self.num_courses, weights=cols['slot_hours'])
+        return 10 * np.sum(np.maximum(hours - 20, 0), axis=1).astype(np.int64)